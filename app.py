@@ -4,8 +4,15 @@ from dotenv import load_dotenv
 from routes.news import news_bp
 from routes.military_info_power import military_bp
 from routes.dynamic_scraper import dynamic_scraper_bp
+from routes.scheduler import scheduler_bp
+from routes.responses import FastJSONProvider
+from routes.compression import init_compression, compression_cache
 import os
 app = Flask(__name__)
+# orjson-backed jsonify; MessagePack for clients sending Accept: application/msgpack
+app.json = FastJSONProvider(app)
+# gzip/brotli for large bodies, negotiated via Accept-Encoding
+init_compression(app)
 CORS(app)
 load_dotenv()
 
@@ -14,11 +21,22 @@ load_dotenv()
 app.register_blueprint(news_bp, url_prefix='/api')
 app.register_blueprint(military_bp, url_prefix='/api/military')
 app.register_blueprint(dynamic_scraper_bp, url_prefix='/api')
+app.register_blueprint(scheduler_bp, url_prefix='/api/scheduler')
+
+# Background refresh is opt-in; enable it on a single long-running worker only
+if os.getenv('REFRESH_SCHEDULER_ENABLED', '').lower() in ('1', 'true', 'yes'):
+    from services.refresh_scheduler import refresh_scheduler
+    refresh_scheduler.start()
 
 
 @app.route('/')
 def index():
     return jsonify({"message": "Welcome to the Military API!"}), 200
 
+@app.route('/api/metrics/compression')
+def compression_metrics():
+    """Response compression counters: ratio, CPU time and cache hits"""
+    return jsonify({'success': True, 'compression': compression_cache.describe()}), 200
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5050, debug=True)
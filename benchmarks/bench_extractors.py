@@ -0,0 +1,120 @@
+"""
+Offline micro-benchmarks for the per-item extractors, with regression thresholds.
+
+Pages are parsed once up front; only the extractor calls are timed:
+  - WebScraper._extract_element_data     per div.mainCol on warpower list pages
+  - extract_container_data               per div.specsGenContainers on GFP pages
+  - WarPowerIndiaScraper.extract_section_divs  per warpower homepage
+
+Each benchmark's median time per call is checked against benchmarks/thresholds.json,
+and each page's extracted item count against benchmarks/fixtures/manifest.json.
+The exit code is non-zero on any regression.
+
+    python -m benchmarks.bench_extractors
+    python -m benchmarks.bench_extractors --scale 2    # allow 2x the thresholds on slow machines
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from models.html_parsing import make_soup
+from models.military_man_power import extract_container_data, find_gfp_containers
+from models.scrapper import WebScraper
+from services.overview_scrapper import WarPowerIndiaScraper
+from benchmarks.common import FIXTURE_DIR, load_fixtures, WARPOWER_LIST, WARPOWER_HOMEPAGE, GFP_DETAIL
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_per_call(func, items, repeat):
+    """Median microseconds per call of func over items, across repeat rounds"""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            func(item)
+        rounds.append((time.perf_counter() - started) / len(items) * 1e6)
+    return statistics.median(rounds)
+
+
+def bench_warpower_items(html, repeat):
+    scraper = WebScraper()
+    elements = make_soup(html, backend='html.parser').find_all('div', class_='mainCol')
+    extract = lambda element: scraper._extract_element_data(element, 'https://www.warpowerindia.com/', 'india')
+    items = [extract(element) for element in elements]
+    return '_extract_element_data', time_per_call(extract, elements, repeat), len([i for i in items if i])
+
+
+def bench_gfp_containers(html, repeat):
+    containers = find_gfp_containers(make_soup(html, backend='html.parser'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        items = [extract_container_data(container) for container in containers]
+        us = time_per_call(extract_container_data, containers, repeat)
+    return 'extract_container_data', us, len([i for i in items if i])
+
+
+def bench_overview_sections(html, repeat):
+    scraper = WarPowerIndiaScraper()
+    soup = make_soup(html, backend='html.parser')
+    items = scraper.extract_section_divs(soup)
+    return 'extract_section_divs', time_per_call(scraper.extract_section_divs, [soup], repeat), len(items)
+
+
+BENCHMARKS = {
+    WARPOWER_LIST: bench_warpower_items,
+    GFP_DETAIL: bench_gfp_containers,
+    WARPOWER_HOMEPAGE: bench_overview_sections
+}
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extractor micro-benchmarks')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed rounds per page')
+    parser.add_argument('--scale', type=float, default=float(os.getenv('BENCH_THRESHOLD_SCALE', '1')),
+                        help='Multiply every threshold, for slower machines')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    thresholds = load_json(os.path.join(BENCHMARK_DIR, 'thresholds.json'))
+    manifest = load_json(os.path.join(FIXTURE_DIR, 'manifest.json'))
+
+    results = []
+    failures = []
+    for kind, bench in BENCHMARKS.items():
+        for filename, html in load_fixtures(kind):
+            name, us, items = bench(html, args.repeat)
+            limit = thresholds[name]['max_us_per_call'] * args.scale
+            expected_items = manifest[filename]['expected_items']
+            results.append({'page': filename, 'benchmark': name, 'us_per_call': round(us, 1),
+                            'threshold_us': round(limit, 1), 'items': items})
+            if us > limit:
+                failures.append(f"{filename}: {name} took {us:.1f}us per call (threshold {limit:.1f}us)")
+            if items != expected_items:
+                failures.append(f"{filename}: {name} extracted {items} items (expected {expected_items})")
+
+    if args.json:
+        print(json.dumps({'results': results, 'failures': failures}, indent=2))
+    else:
+        print(f"{'page':<36}{'benchmark':<26}{'items':>6}{'us/call':>11}{'limit':>11}")
+        for row in results:
+            print(f"{row['page']:<36}{row['benchmark']:<26}{row['items']:>6}{row['us_per_call']:>11.1f}{row['threshold_us']:>11.1f}")
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
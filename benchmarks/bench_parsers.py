@@ -0,0 +1,110 @@
+"""
+Compare HTML parser backends over the saved fixture pages.
+
+For each page and backend this parses the page, runs the same extractor the
+scrapers use, and reports median time and peak traced memory per page. It also
+checks that every backend extracts exactly what html.parser extracts.
+
+    python -m benchmarks.bench_parsers
+    python -m benchmarks.bench_parsers --repeat 20 --json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+
+from models.html_parsing import make_soup, BACKENDS, LXML_AVAILABLE, WARPOWER_ITEMS, OVERVIEW_SECTIONS
+from models.military_man_power import parse_gfp_html
+from models.scrapper import WebScraper
+from services.overview_scrapper import WarPowerIndiaScraper
+from benchmarks.common import load_fixtures, page_kind, WARPOWER_LIST, WARPOWER_HOMEPAGE, GFP_DETAIL
+
+
+def extract_warpower(html, backend):
+    scraper = WebScraper()
+    soup = make_soup(html, WARPOWER_ITEMS, backend)
+    return [scraper._extract_element_data(element, 'https://www.warpowerindia.com/', 'india')
+            for element in soup.find_all('div', class_='mainCol')]
+
+
+def extract_gfp(html, backend):
+    # parse_gfp_html prints a container count per call
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_gfp_html(html, backend)
+
+
+def extract_overview(html, backend):
+    return WarPowerIndiaScraper().extract_section_divs(make_soup(html, OVERVIEW_SECTIONS, backend))
+
+
+EXTRACTORS = {
+    WARPOWER_LIST: extract_warpower,
+    WARPOWER_HOMEPAGE: extract_overview,
+    GFP_DETAIL: extract_gfp
+}
+
+
+def measure(extract, html, backend, repeat):
+    """Return (median ms, peak KiB, extracted data) for one page/backend pair"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(html, backend)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    data = extract(html, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTML parser backend benchmark')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed runs per page and backend')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    backends = [b for b in BACKENDS if b != 'lxml' or LXML_AVAILABLE]
+
+    results = []
+    mismatches = []
+    for filename, html in load_fixtures():
+        extract = EXTRACTORS[page_kind(filename)]
+        baseline = None
+        for backend in backends:
+            ms, peak_kib, data = measure(extract, html, backend, args.repeat)
+            if baseline is None:
+                baseline = data
+            elif data != baseline:
+                mismatches.append(f"{filename} [{backend}]")
+            results.append({
+                'page': filename,
+                'backend': backend,
+                'items': len(data),
+                'median_ms': round(ms, 2),
+                'peak_kib': round(peak_kib, 1)
+            })
+
+    if args.json:
+        print(json.dumps({'results': results, 'mismatches': mismatches}, indent=2))
+    else:
+        if not LXML_AVAILABLE:
+            print("lxml not installed: 'strained' runs on html.parser, 'lxml' skipped\n")
+        print(f"{'page':<34}{'backend':<13}{'items':>6}{'median ms':>12}{'peak KiB':>11}")
+        for row in results:
+            print(f"{row['page']:<34}{row['backend']:<13}{row['items']:>6}{row['median_ms']:>12.2f}{row['peak_kib']:>11.1f}")
+        for mismatch in mismatches:
+            print(f"MISMATCH: {mismatch} extracted different data than html.parser")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+End-to-end pipeline benchmark with replayed HTTP and an in-memory Mongo stand-in.
+
+Runs MilitaryDataPipeline.run_pipeline and routes.dynamic_scraper.run_scraping_pipeline
+against cassettes, so warpower and Sketchfab are never contacted, and reports
+pages/sec, records/sec and per-stage timings.
+
+Cassettes come from one of two places:
+  --cassettes DIR   responses captured earlier with HTTP_TRANSPORT_MODE=record, e.g.
+                    HTTP_TRANSPORT_MODE=record HTTP_CASSETTE_DIR=cassettes python -m models.scrapper
+  (default)         seeded from benchmarks/fixtures: warpower pages as-is, Sketchfab
+                    searches answered with a single matching model
+
+    python -m benchmarks.bench_pipeline --iterations 5 --concurrency 4 --latency-ms 20-80 --error-rate 0.05
+
+Requires mongomock for the Mongo stand-in (pip install mongomock), unless --mongo-uri is given.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import load_fixtures, patch_mongomock_bulk_sort, WARPOWER_LIST
+
+POWER_TYPES = ['airpower', 'navalpower', 'droneforce', 'landpower']
+
+
+def seed_cassettes_from_fixtures(transport, country_name):
+    """Write cassettes for the warpower list pages and the Sketchfab searches they trigger"""
+    from models.html_parsing import make_soup, WARPOWER_ITEMS
+    from models.scrapper import WebScraper
+
+    scraper = WebScraper()
+    base_url = f"https://www.warpower{country_name}.com/"
+    for filename, html in load_fixtures(WARPOWER_LIST):
+        power_type = filename[len('warpower_'):-len('.html')]
+        transport.save_cassette(f"{base_url}{power_type}.php", None, 200, html.encode('utf-8'), 'text/html', 'utf-8')
+
+        for element in make_soup(html, WARPOWER_ITEMS).find_all('div', class_='mainCol'):
+            item = scraper._extract_element_data(element, base_url, country_name)
+            if not item or item['model'] == 'Unknown':
+                continue
+            query = item['model'].replace(' ', '+')
+            url = f'https://api.sketchfab.com/v3/search?type=models&q={query}&sort_by=relevance&count=10'
+            body = json.dumps({'results': [{'name': item['model'], 'uid': hashlib.sha1(query.encode()).hexdigest()[:32]}]})
+            transport.save_cassette(url, None, 200, body.encode('utf-8'), 'application/json', 'utf-8')
+
+
+def summarize(label, wall_seconds, runs):
+    """runs: list of {power_type: result} dicts from process_power_type"""
+    results = [result for run in runs for result in run.values()]
+    records = sum(result['count'] for result in results)
+    stages = {}
+    for result in results:
+        for stage, seconds in result.get('timings', {}).items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+
+    return {
+        'benchmark': label,
+        'pipelines': len(runs),
+        'pages': len(results),
+        'failed_pages': sum(1 for result in results if result['status'] != 'success'),
+        'records': records,
+        'wall_seconds': round(wall_seconds, 3),
+        'pages_per_second': round(len(results) / wall_seconds, 2) if wall_seconds else None,
+        'records_per_second': round(records / wall_seconds, 2) if wall_seconds else None,
+        'stage_ms': {
+            stage: {'p50': round(statistics.median(values), 2), 'max': round(max(values), 2)}
+            for stage, values in stages.items()
+        }
+    }
+
+
+def bench_run_pipeline(country_name, power_types, iterations, concurrency):
+    from models.scrapper import MilitaryDataPipeline
+
+    def run_once(_):
+        return MilitaryDataPipeline().run_pipeline(country_name, power_types)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        runs = list(executor.map(run_once, range(iterations)))
+    return summarize('run_pipeline', time.perf_counter() - started, runs)
+
+
+def bench_run_scraping_pipeline(country_name, power_types, iterations, concurrency):
+    from routes.dynamic_scraper import run_scraping_pipeline, make_job_key
+    from services.task_store import get_task_store
+
+    task_store = get_task_store()
+
+    def run_once(_):
+        task_id = str(uuid.uuid4())
+        task_store.create(task_id, {
+            'status': 'queued', 'message': 'benchmark', 'progress': 0,
+            'job_key': make_job_key(country_name, power_types),
+            'total_power_types': len(power_types), 'completed_power_types': 0,
+            'current_power_type': None, 'data': {}
+        })
+        run_scraping_pipeline(country_name, power_types, task_id)
+        # The task only records counts, so stage timings are not available here
+        return {power_type: dict(result, timings={}) for power_type, result in task_store.get(task_id)['data'].items()}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        runs = list(executor.map(run_once, range(iterations)))
+    return summarize('run_scraping_pipeline', time.perf_counter() - started, runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark (offline)')
+    parser.add_argument('--cassettes', help='Directory of recorded cassettes (default: seed from fixtures)')
+    parser.add_argument('--country', default='india')
+    parser.add_argument('--power-types', default='all', help="Comma-separated power types or 'all'")
+    parser.add_argument('--iterations', type=int, default=3, help='Pipelines run per benchmark')
+    parser.add_argument('--concurrency', type=int, default=1, help='Pipelines run in parallel')
+    parser.add_argument('--latency-ms', default='0', help="Injected latency, fixed '50' or range '20-80'")
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Injected request failure probability')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mongo-uri', default='mongomock://', help='Mongo URI (default: in-memory stand-in)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    power_types = POWER_TYPES if args.power_types == 'all' else [p.strip() for p in args.power_types.split(',')]
+
+    # Configure the environment before the application modules read it
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    os.environ['MONGO_URI'] = args.mongo_uri
+    os.environ['TASK_STORE_BACKEND'] = 'sqlite'
+    os.environ['TASK_STORE_PATH'] = os.path.join(workdir, 'tasks.sqlite3')
+    os.environ['SKETCHFAB_RATE_LIMIT_SECONDS'] = '0'
+    # Injected faults are reported in the transport stats; keep their log lines out of the output
+    logging.disable(logging.CRITICAL)
+    if args.mongo_uri.startswith('mongomock://'):
+        patch_mongomock_bulk_sort()
+
+    from models.http_transport import HttpTransport, set_transport
+
+    cassette_dir = args.cassettes or os.path.join(workdir, 'cassettes')
+    if not args.cassettes:
+        seed_cassettes_from_fixtures(HttpTransport(mode='record', cassette_dir=cassette_dir), args.country)
+
+    transport = HttpTransport(mode='replay', cassette_dir=cassette_dir, latency_ms=args.latency_ms,
+                              error_rate=args.error_rate, seed=args.seed)
+    set_transport(transport)
+
+    reports = [
+        bench_run_pipeline(args.country, power_types, args.iterations, args.concurrency),
+        bench_run_scraping_pipeline(args.country, power_types, args.iterations, args.concurrency)
+    ]
+    output = {'transport': transport.stats, 'reports': reports}
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        for report in reports:
+            print(f"{report['benchmark']}: {report['pipelines']} pipelines, {report['pages']} pages "
+                  f"({report['failed_pages']} failed), {report['records']} records in {report['wall_seconds']}s")
+            print(f"  {report['pages_per_second']} pages/s, {report['records_per_second']} records/s")
+            for stage, timing in report['stage_ms'].items():
+                print(f"  {stage:<10} p50 {timing['p50']:>9.2f} ms   max {timing['max']:>9.2f} ms")
+        print(f"transport: {transport.stats}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Cold-start benchmark: import time per blueprint module, each in a fresh interpreter.
+
+For every target this starts a new Python process, imports the module and reports
+the median import time over --repeat processes, plus which heavy dependencies the
+import pulled in. 'app (GET /)' also times the first request to the index route.
+
+Limits come from the "startup" section of benchmarks/thresholds.json: a maximum
+median import time and modules that must not be loaded at import. The exit code
+is non-zero on any regression.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --scale 2 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+
+TARGETS = ['routes.news', 'routes.scheduler', 'routes.dynamic_scraper', 'routes.military_info_power', 'app']
+FIRST_REQUEST = 'app (GET /)'
+# Reported when loaded; thresholds decide which of them are regressions
+HEAVY_MODULES = ['pandas', 'numpy', 'bs4', 'lxml', 'requests', 'pymongo', 'orjson', 'mongomock', 'openai']
+
+PROBE = '''
+import json, logging, sys, time
+logging.disable(logging.CRITICAL)
+started = time.perf_counter()
+module = __import__({module!r}, fromlist=['_'])
+imported = time.perf_counter()
+request_ms = None
+if {first_request!r}:
+    response = module.app.test_client().get('/')
+    assert response.status_code == 200, response.status_code
+    request_ms = (time.perf_counter() - imported) * 1000
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'request_ms': request_ms,
+    'loaded': [name for name in {heavy!r} if name in sys.modules]
+}}))
+'''
+
+
+def probe(module: str, first_request: bool = False) -> dict:
+    """Import module in a new interpreter and return its timings"""
+    code = PROBE.format(module=module, first_request=first_request, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure(module: str, repeat: int, first_request: bool = False) -> dict:
+    runs = [probe(module, first_request) for _ in range(repeat)]
+    result = {
+        'import_ms': round(statistics.median(run['import_ms'] for run in runs), 1),
+        'loaded': runs[-1]['loaded']
+    }
+    if first_request:
+        result['request_ms'] = round(statistics.median(run['request_ms'] for run in runs), 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold-start import benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per target')
+    parser.add_argument('--scale', type=float, default=float(os.getenv('BENCH_THRESHOLD_SCALE', '1')),
+                        help='Multiply every time threshold, for slower machines')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(BENCHMARK_DIR, 'thresholds.json'), encoding='utf-8') as f:
+        thresholds = json.load(f)['startup']
+
+    # Warm the bytecode cache so the first probe does not time compilation
+    probe('app')
+
+    results = []
+    failures = []
+    for target in TARGETS + [FIRST_REQUEST]:
+        first_request = target == FIRST_REQUEST
+        result = measure('app' if first_request else target, args.repeat, first_request)
+        limits = thresholds.get(target, {})
+        limit = limits.get('max_import_ms', float('inf')) * args.scale
+        result.update(target=target, threshold_ms=limit if limit != float('inf') else None)
+        results.append(result)
+
+        if result['import_ms'] > limit:
+            failures.append(f"{target}: import took {result['import_ms']:.1f}ms (threshold {limit:.1f}ms)")
+        forbidden = sorted(set(result['loaded']) & set(limits.get('forbidden_modules', [])))
+        if forbidden:
+            failures.append(f"{target}: imports {', '.join(forbidden)} at startup")
+
+    if args.json:
+        print(json.dumps({'results': results, 'failures': failures}, indent=2))
+    else:
+        print(f"{'target':<30}{'import ms':>11}{'limit':>9}{'first GET ms':>14}  heavy modules loaded")
+        for row in results:
+            limit = f"{row['threshold_ms']:.0f}" if row['threshold_ms'] else '-'
+            request_ms = f"{row['request_ms']:.1f}" if row.get('request_ms') is not None else '-'
+            print(f"{row['target']:<30}{row['import_ms']:>11.1f}{limit:>9}{request_ms:>14}  {', '.join(row['loaded']) or '-'}")
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Shared helpers for the offline benchmark suite"""
+import os
+from typing import List, Optional, Tuple
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Page kinds in the fixture corpus, keyed by filename
+WARPOWER_LIST = 'warpower_list'        # warpower{country}.com/<power_type>.php
+WARPOWER_HOMEPAGE = 'warpower_homepage'
+GFP_DETAIL = 'gfp_detail'              # globalfirepower.com country-military-strength-detail.php
+
+
+def page_kind(filename: str) -> Optional[str]:
+    if filename == 'warpower_homepage.html':
+        return WARPOWER_HOMEPAGE
+    if filename.startswith('warpower_'):
+        return WARPOWER_LIST
+    if filename.startswith('gfp_'):
+        return GFP_DETAIL
+    return None
+
+
+def patch_mongomock_bulk_sort():
+    """pymongo 4.9+ passes `sort` to bulk update/replace builders; older mongomock rejects it"""
+    import mongomock
+
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ('add_update', 'add_replace'):
+        method = getattr(builder, name)
+        if getattr(method, '_drops_sort', False):
+            continue
+
+        def drop_sort(self, *args, _method=method, **kwargs):
+            kwargs.pop('sort', None)
+            return _method(self, *args, **kwargs)
+
+        drop_sort._drops_sort = True
+        setattr(builder, name, drop_sort)
+
+
+def load_fixtures(kind: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Return (filename, html) for every fixture page, optionally filtered by kind"""
+    pages = []
+    for filename in sorted(os.listdir(FIXTURE_DIR)):
+        if not filename.endswith('.html') or page_kind(filename) is None:
+            continue
+        if kind and page_kind(filename) != kind:
+            continue
+        with open(os.path.join(FIXTURE_DIR, filename), encoding='utf-8') as f:
+            pages.append((filename, f.read()))
+    return pages
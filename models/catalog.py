@@ -0,0 +1,237 @@
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLLECTION = 'equipment_catalog'
+
+# Platform-level fields stored once per catalog entry instead of once per country record
+SHARED_FIELDS = ('description', 'image_url', 'sketchfab_embed_url')
+# What a record shows when the catalog has nothing better; these never overwrite a real value
+PLACEHOLDERS = {'description': 'No description available', 'image_url': None, 'sketchfab_embed_url': 'NOT FOUND'}
+
+# Catalog entries read by the API are cached in-process for this long; saves in this process invalidate them.
+# Anything persisted beyond one response (pre-rendered artifacts) reads through an uncached catalog
+CACHE_SECONDS = float(os.getenv('CATALOG_CACHE_SECONDS', '300'))
+# Models without a Sketchfab match are searched again after this long
+SKETCHFAB_RECHECK_DAYS = float(os.getenv('SKETCHFAB_RECHECK_DAYS', '30'))
+
+# Process-wide, so every DatabaseManager / service instance shares one cache
+_cache = {}  # catalog_id -> (cached_at, fields)
+_cache_lock = threading.Lock()
+
+
+def catalog_id(record: Dict, power_type: str) -> str:
+    """
+    Normalized platform identity within a power type: the model, or the name when the model
+    is unknown. The power type is part of the key, so an aircraft and a ship that share a
+    name (or an unknown model) never share a description or image
+    """
+    identity = record.get('model')
+    if not identity or identity == 'Unknown':
+        identity = record.get('name') or 'unknown'
+    slug = re.sub(r'[^a-z0-9]+', '-', str(identity).lower()).strip('-') or 'unknown'
+    return f"{power_type.lower()}:{slug}"
+
+
+def split_record(record: Dict, power_type: str) -> Tuple[Dict, Dict]:
+    """(country-specific document with catalog_id, shared platform fields)"""
+    shared = {field: record[field] for field in SHARED_FIELDS if field in record}
+    doc = {field: value for field, value in record.items() if field not in SHARED_FIELDS}
+    doc['catalog_id'] = catalog_id(record, power_type)
+    return doc, shared
+
+
+def _is_real(field: str, value) -> bool:
+    return value is not None and value != PLACEHOLDERS.get(field)
+
+
+class EquipmentCatalog:
+    """Shared platform data (descriptions, images, Sketchfab embeds) keyed by catalog_id"""
+
+    def __init__(self, db, cached: bool = True):
+        self.collection = db[CATALOG_COLLECTION]
+        self.cached = cached
+
+    def upsert(self, entries: Dict[str, Dict]) -> Set[str]:
+        """
+        Merge {catalog_id: shared fields (+ model, name)} into the catalog in one bulk write.
+        The latest real value replaces the stored one unless a curator set that field;
+        placeholders only fill gaps. Returns the catalog ids whose shared fields changed.
+        """
+        from pymongo import UpdateOne
+
+        if not entries:
+            return set()
+
+        now = datetime.utcnow()
+        recheck_before = now - timedelta(days=SKETCHFAB_RECHECK_DAYS)
+        existing = {doc['_id']: doc for doc in self.collection.find({'_id': {'$in': list(entries)}})}
+        operations = []
+        changed = set()
+
+        for entry_id, fields in entries.items():
+            current = existing.get(entry_id)
+            curated = set((current or {}).get('curated', ()))
+            updates = {}
+            for field, value in fields.items():
+                if field not in SHARED_FIELDS or field in curated or not _is_real(field, value):
+                    continue
+                if (current or {}).get(field) != value:
+                    updates[field] = value
+            if 'sketchfab_embed_url' in updates:
+                updates['sketchfab_checked_at'] = now
+            elif (current and fields.get('sketchfab_embed_url') == PLACEHOLDERS['sketchfab_embed_url']
+                    and current.get('sketchfab_checked_at', now) < recheck_before):
+                # The pipeline searched again and still found nothing
+                updates['sketchfab_checked_at'] = now
+
+            on_insert = {}
+            if current is None:
+                on_insert = {field: fields.get(field, placeholder) for field, placeholder in PLACEHOLDERS.items()
+                             if field not in updates}
+                on_insert.update(model=fields.get('model'), name=fields.get('name'), created_at=now)
+                if 'sketchfab_checked_at' not in updates and 'sketchfab_embed_url' in fields:
+                    on_insert['sketchfab_checked_at'] = now
+
+            if not updates and current is not None:
+                continue
+            if any(field in SHARED_FIELDS for field in updates):
+                changed.add(entry_id)
+
+            operation = {'$set': dict(updates, updated_at=now)}
+            if on_insert:
+                operation['$setOnInsert'] = on_insert
+            operations.append(UpdateOne({'_id': entry_id}, operation, upsert=True))
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        self.invalidate(changed | (set(entries) - set(existing)))
+        return changed
+
+    def curate(self, entry_id: str, fields: Dict) -> bool:
+        """
+        Set shared fields by hand; curated fields are never overwritten by scraped values.
+        Returns False when there is no such catalog entry.
+        """
+        fields = {field: value for field, value in fields.items() if field in SHARED_FIELDS}
+        if not fields:
+            raise ValueError(f"Nothing to curate; shared fields are {', '.join(SHARED_FIELDS)}")
+        result = self.collection.update_one({'_id': entry_id}, {
+            '$set': dict(fields, updated_at=datetime.utcnow()),
+            '$addToSet': {'curated': {'$each': list(fields)}}
+        })
+        self.invalidate([entry_id])
+        return result.matched_count > 0
+
+    @staticmethod
+    def invalidate(entry_ids: Iterable[str]):
+        with _cache_lock:
+            for entry_id in entry_ids:
+                _cache.pop(entry_id, None)
+
+    def lookup(self, entry_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Shared fields per catalog id, from the cache where fresh and one $in query for the rest;
+        an uncached catalog always queries, and refreshes the cache with what it read
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with _cache_lock:
+            for entry_id in set(entry_ids):
+                cached = _cache.get(entry_id) if self.cached else None
+                if cached and now - cached[0] < CACHE_SECONDS:
+                    found[entry_id] = cached[1]
+                else:
+                    missing.append(entry_id)
+
+        if missing:
+            projection = {field: 1 for field in SHARED_FIELDS + ('sketchfab_checked_at',)}
+            fetched = {doc.pop('_id'): doc for doc in self.collection.find({'_id': {'$in': missing}}, projection)}
+            with _cache_lock:
+                for entry_id, fields in fetched.items():
+                    _cache[entry_id] = (now, fields)
+            found.update(fetched)
+        return found
+
+    def hydrate(self, docs: List[Dict], fields: Iterable[str] = SHARED_FIELDS) -> List[Dict]:
+        """
+        Fill shared fields (those of fields, by default all) into country documents;
+        values stored on a document (older data) win
+        """
+        fields = [field for field in fields if field in SHARED_FIELDS]
+        if not fields:
+            return docs
+        entries = self.lookup(doc['catalog_id'] for doc in docs if doc.get('catalog_id'))
+        for doc in docs:
+            entry = entries.get(doc.get('catalog_id'), {})
+            for field in fields:
+                if field not in doc:
+                    doc[field] = entry.get(field, PLACEHOLDERS[field])
+        return docs
+
+    def known_sketchfab_links(self, records: List[Dict], power_type: str) -> Dict[str, str]:
+        """{model: embed URL or 'NOT FOUND'} for models whose Sketchfab search need not be repeated"""
+        recheck_before = datetime.utcnow() - timedelta(days=SKETCHFAB_RECHECK_DAYS)
+        entries = self.lookup(catalog_id(record, power_type) for record in records)
+        known = {}
+        for record in records:
+            if not record.get('model') or record['model'] == 'Unknown':
+                continue
+            entry = entries.get(catalog_id(record, power_type))
+            if not entry or 'sketchfab_embed_url' not in entry:
+                continue
+            url = entry['sketchfab_embed_url']
+            if _is_real('sketchfab_embed_url', url) or entry.get('sketchfab_checked_at', recheck_before) > recheck_before:
+                known[record.get('model')] = url
+        return known
+
+
+def migrate_to_catalog(db, power_types=('airpower', 'navalpower', 'droneforce', 'landpower')) -> Dict[str, int]:
+    """
+    Move shared fields of records saved before the catalog existed into it, and re-key
+    records whose catalog_id predates the power type being part of the key
+    """
+    from pymongo import UpdateOne
+
+    catalog = EquipmentCatalog(db)
+    migrated = {}
+    for power_type in power_types:
+        collection = db[power_type]
+        legacy = list(collection.find({'catalog_id': {'$not': re.compile(f'^{re.escape(power_type)}:')}}))
+        # Entries under the old, power-type-less ids carry the shared fields of re-keyed records
+        old_entries = {doc['_id']: doc for doc in catalog.collection.find(
+            {'_id': {'$in': list({doc['catalog_id'] for doc in legacy if doc.get('catalog_id')})}})}
+        entries = {}
+        operations = []
+        for doc in legacy:
+            old_entry = old_entries.get(doc.get('catalog_id'), {})
+            slim, shared = split_record(dict({field: old_entry[field] for field in SHARED_FIELDS if field in old_entry},
+                                             **doc), power_type)
+            entries.setdefault(slim['catalog_id'], dict(shared, model=doc.get('model'), name=doc.get('name')))
+            operations.append(UpdateOne({'_id': doc['_id']}, {
+                '$set': {'catalog_id': slim['catalog_id']},
+                '$unset': {field: '' for field in SHARED_FIELDS}
+            }))
+        catalog.upsert(entries)
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        migrated[power_type] = len(operations)
+        logger.info(f"Moved {len(operations)} {power_type} records onto the equipment catalog")
+    return migrated
+
+
+if __name__ == '__main__':
+    from models.scrapper import DatabaseManager
+
+    db_manager = DatabaseManager()
+    try:
+        print(migrate_to_catalog(db_manager.db))
+    finally:
+        db_manager.close_connection()
@@ -0,0 +1,140 @@
+import re
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import Tag
+
+MODEL_PATTERN = re.compile(r'\((.*?)\)')
+
+
+class Scope:
+    """
+    A container element (first match only) that scoped fields are searched within.
+    Like find() on a found container followed by .text, a container missing one of
+    its fields makes extract() raise; without the container the fields take their defaults.
+    """
+
+    def __init__(self, name: str, tag: str, css_class: str):
+        self.name = name
+        self.tag = tag
+        self.css_class = css_class
+
+
+class Field:
+    """
+    One extracted value: field name -> tag + CSS class selector -> post-processor.
+
+    The selector follows BeautifulSoup's find(tag, class_=...) semantics: a single
+    class matches any element carrying it, while a space separated selector such
+    as 'textWhite textNormal textBold' must equal the whole class attribute.
+    """
+
+    def __init__(self, name: str, tag: str, css_class: str, post: Callable[[Tag, Dict], object],
+                 default=None, scope: Optional[str] = None):
+        self.name = name
+        self.tag = tag
+        self.post = post
+        self.default = default
+        self.scope = scope
+        self.exact = ' ' in css_class
+        self.css_class = css_class
+
+    def matches(self, classes) -> bool:
+        if self.exact:
+            return ' '.join(classes) == self.css_class
+        return self.css_class in classes
+
+
+class ExtractionEngine:
+    """Collects every field of an item in a single depth-first traversal"""
+
+    def __init__(self, fields: List[Field], scopes: Optional[List[Scope]] = None):
+        self.fields = fields
+        self.scopes = scopes or []
+        # Compile: index fields and scopes by tag name so each node is checked against few candidates
+        self._fields_by_tag = {}
+        for field in fields:
+            self._fields_by_tag.setdefault(field.tag, []).append(field)
+        self._scopes_by_tag = {}
+        for scope in self.scopes:
+            self._scopes_by_tag.setdefault(scope.tag, []).append(scope)
+
+    def extend(self, fields: List[Field]) -> 'ExtractionEngine':
+        """Return a new engine with extra fields, sharing this engine's scopes"""
+        return ExtractionEngine(self.fields + fields, self.scopes)
+
+    def extract(self, element: Tag, context: Optional[Dict] = None) -> Dict:
+        """Return {field name: value} for one item element"""
+        context = context or {}
+        matched = {}
+        entered_scopes = set()
+        total = len(self.fields)
+
+        # Pre-order traversal matches the document order BeautifulSoup.find() uses
+        stack = [(child, None) for child in reversed(element.contents) if isinstance(child, Tag)]
+        while stack and len(matched) < total:
+            node, scope = stack.pop()
+            classes = node.get('class') or ()
+
+            for field in self._fields_by_tag.get(node.name, ()):
+                if field.name not in matched and (field.scope is None or field.scope == scope) and field.matches(classes):
+                    matched[field.name] = node
+
+            child_scope = scope
+            if scope is None:
+                for candidate in self._scopes_by_tag.get(node.name, ()):
+                    if candidate.name not in entered_scopes and candidate.css_class in classes:
+                        entered_scopes.add(candidate.name)
+                        child_scope = candidate.name
+                        break
+
+            stack.extend((child, child_scope) for child in reversed(node.contents) if isinstance(child, Tag))
+
+        result = {}
+        for field in self.fields:
+            node = matched.get(field.name)
+            if node is None and field.scope in entered_scopes:
+                raise ValueError(f"{field.scope} has no {field.name}")
+            result[field.name] = field.post(node, context) if node is not None else field.default
+        return result
+
+
+# Post-processors
+
+def text(node: Tag, context: Dict) -> str:
+    return node.get_text().strip()
+
+
+def image_src(node: Tag, context: Dict) -> Optional[str]:
+    src = node.get('src')
+    return urljoin(context['base_url'], src) if src else None
+
+
+def units_count(node: Tag, context: Dict) -> int:
+    # A count that is not a plain integer raises, so the item is skipped rather than saved as 0 units
+    return int(node.get_text().strip())
+
+
+def model_in_parentheses(node: Tag, context: Dict) -> str:
+    match = MODEL_PATTERN.search(node.get_text().strip())
+    return match.group(1).strip() if match else "Unknown"
+
+
+def role_text(node: Tag, context: Dict) -> str:
+    return node.get_text().replace('Role:', '').strip()
+
+
+# Field spec for one warpower equipment entry (div.mainCol)
+WARPOWER_ITEM_ENGINE = ExtractionEngine(
+    fields=[
+        Field('service', 'span', 'textWhite textNormal textBold', text, default="Unknown"),
+        Field('image_url', 'img', 'entryImg', image_src),
+        Field('assessment', 'span', 'textNormal textWhite', text, default="Unknown", scope='assessmentBox'),
+        Field('units', 'span', 'textJumbo', units_count, default=0),
+        Field('name', 'span', 'textYellowOrange', text, default="Unknown"),
+        Field('model', 'span', 'textWhite textLarge textBold', model_in_parentheses, default="Unknown"),
+        Field('role', 'span', 'textNormal textLtstGray', role_text, default="Unknown"),
+        Field('description', 'span', 'textSmall1 textWhite', text, default="No description available"),
+    ],
+    scopes=[Scope('assessmentBox', 'div', 'assessmentBox')]
+)
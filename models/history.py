@@ -0,0 +1,203 @@
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.mongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_COLLECTION = 'history_snapshots'
+HEADS_COLLECTION = 'history_heads'
+
+# A full snapshot is stored after this many deltas, bounding reconstruction to one base plus N deltas
+KEYFRAME_INTERVAL = int(os.getenv('HISTORY_KEYFRAME_INTERVAL', '20'))
+
+# Storage bookkeeping that changes on every scrape without the data changing
+METADATA_FIELDS = {'_id', 'country_id', 'scraped_at', 'last_updated', 'record_key', 'change_token'}
+
+
+def warpower_stream(country_id: str, power_type: str) -> str:
+    return f"{power_type.lower()}:{country_id}"
+
+
+def gfp_stream(country_id: str) -> str:
+    return f"gfp:{country_id}"
+
+
+def equipment_key(record: Dict) -> str:
+    """Identity of a warpower equipment record across scrapes"""
+    return f"{record.get('service')}|{record.get('name')}|{record.get('model')}"
+
+
+def assign_record_keys(records, key_func: Callable[[Dict], str]) -> List[Tuple[str, Dict]]:
+    """(key, record) pairs; repeated keys get a #n suffix so no record is lost"""
+    pairs = []
+    seen = set()
+    for record in records:
+        key = base_key = key_func(record)
+        n = 1
+        while key in seen:
+            n += 1
+            key = f"{base_key}#{n}"
+        seen.add(key)
+        pairs.append((key, record))
+    return pairs
+
+
+def record_content(record: Dict) -> Dict:
+    return {field: value for field, value in record.items() if field not in METADATA_FIELDS}
+
+
+def keyed_records(records: List[Dict], key_func: Callable[[Dict], str]) -> Dict[str, Dict]:
+    """{key: record without metadata}"""
+    return {key: record_content(record) for key, record in assign_record_keys(records, key_func)}
+
+
+def diff_records(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Dict:
+    """Added records, removed keys, and changed fields per record between two keyed states"""
+    added = [{'key': key, 'fields': current[key]} for key in current.keys() - previous.keys()]
+    removed = sorted(previous.keys() - current.keys())
+    changed = []
+    for key in current.keys() & previous.keys():
+        old, new = previous[key], current[key]
+        set_fields = {field: value for field, value in new.items() if old.get(field, object()) != value}
+        unset_fields = sorted(old.keys() - new.keys())
+        if set_fields or unset_fields:
+            changed.append({'key': key, 'set': set_fields, 'unset': unset_fields})
+    # Keys are stored as values, not document field names: they can contain '.' and '$'
+    return {'added': sorted(added, key=lambda item: item['key']), 'removed': removed,
+            'changed': sorted(changed, key=lambda item: item['key'])}
+
+
+def apply_delta(state: Dict[str, Dict], delta: Dict) -> Dict[str, Dict]:
+    for key in delta['removed']:
+        state.pop(key, None)
+    for item in delta['added']:
+        state[item['key']] = dict(item['fields'])
+    for item in delta['changed']:
+        record = state.setdefault(item['key'], {})
+        record.update(item['set'])
+        for field in item['unset']:
+            record.pop(field, None)
+    return state
+
+
+def _to_list(state: Dict[str, Dict]) -> List[Dict]:
+    return [{'key': key, 'fields': fields} for key, fields in sorted(state.items())]
+
+
+def _to_state(records: List[Dict]) -> Dict[str, Dict]:
+    return {item['key']: dict(item['fields']) for item in records}
+
+
+class SnapshotHistory:
+    """
+    Scrape history stored as deltas against the previous snapshot.
+
+    Each stream (one country's power type, or one country's GFP metrics) keeps its
+    current state in history_heads and appends to history_snapshots only when the
+    data changed, with a full keyframe every KEYFRAME_INTERVAL versions.
+    """
+
+    def __init__(self, db, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.snapshots = db[SNAPSHOTS_COLLECTION]
+        self.heads = db[HEADS_COLLECTION]
+        self.keyframe_interval = keyframe_interval
+
+    def ensure_indexes(self):
+        self.snapshots.create_index([('stream', ASCENDING), ('seq', ASCENDING)], unique=True)
+        self.snapshots.create_index([('stream', ASCENDING), ('taken_at', ASCENDING)])
+        self.heads.create_index('stream', unique=True)
+
+    def record(self, stream: str, records: List[Dict], key_func: Callable[[Dict], str] = equipment_key,
+               taken_at: Optional[datetime] = None) -> Optional[int]:
+        """Record one scrape; returns the new version, or None when nothing changed"""
+        self.ensure_indexes()
+        taken_at = taken_at or datetime.utcnow()
+        current = keyed_records(records, key_func)
+        head = self.heads.find_one({'stream': stream})
+
+        if head is None:
+            seq, since_keyframe = 1, 0
+            snapshot = {'kind': 'keyframe', 'records': _to_list(current),
+                        'summary': {'added': len(current), 'removed': 0, 'changed': 0}}
+        else:
+            delta = diff_records(_to_state(head['records']), current)
+            summary = {name: len(items) for name, items in delta.items()}
+            if not any(summary.values()):
+                self.heads.update_one({'stream': stream}, {'$set': {'last_checked_at': taken_at}})
+                return None
+
+            seq = head['seq'] + 1
+            since_keyframe = head['since_keyframe'] + 1
+            if since_keyframe >= self.keyframe_interval:
+                since_keyframe = 0
+                snapshot = {'kind': 'keyframe', 'records': _to_list(current), 'summary': summary}
+            else:
+                snapshot = {'kind': 'delta', 'delta': delta, 'summary': summary}
+
+        snapshot.update({'stream': stream, 'seq': seq, 'taken_at': taken_at})
+        # Unique (stream, seq) rejects a concurrent writer that raced from the same head
+        self.snapshots.insert_one(snapshot)
+        self.heads.update_one({'stream': stream}, {'$set': {
+            'seq': seq, 'since_keyframe': since_keyframe, 'records': _to_list(current),
+            'last_changed_at': taken_at, 'last_checked_at': taken_at
+        }}, upsert=True)
+        logger.info(f"History {stream} v{seq}: {snapshot['summary']}")
+        return seq
+
+    def versions(self, stream: str) -> List[Dict]:
+        """Version list with change counts, oldest first"""
+        cursor = self.snapshots.find({'stream': stream}, {'_id': 0, 'seq': 1, 'taken_at': 1, 'kind': 1, 'summary': 1})
+        return list(cursor.sort('seq', ASCENDING))
+
+    def snapshot_at(self, stream: str, at: Optional[datetime] = None,
+                    seq: Optional[int] = None) -> Tuple[Optional[int], Dict[str, Dict]]:
+        """(version, {key: record}) as of a time or version: the nearest keyframe plus the deltas after it"""
+        bound = {'stream': stream}
+        if seq is not None:
+            bound['seq'] = {'$lte': seq}
+        if at is not None:
+            bound['taken_at'] = {'$lte': at}
+
+        keyframe = self.snapshots.find_one(dict(bound, kind='keyframe'), sort=[('seq', DESCENDING)])
+        if keyframe is None:
+            return None, {}
+
+        state = _to_state(keyframe['records'])
+        version = keyframe['seq']
+        deltas = self.snapshots.find(dict(bound, kind='delta', seq=dict(bound.get('seq', {}), **{'$gt': version})))
+        for snapshot in deltas.sort('seq', ASCENDING):
+            apply_delta(state, snapshot['delta'])
+            version = snapshot['seq']
+        return version, state
+
+    def field_series(self, stream: str, field: str, match: Callable[[str, Dict], bool]) -> Dict[str, List[Dict]]:
+        """
+        {key: [{'taken_at', 'seq', field: value}]} for records accepted by match(key, record),
+        with a point only where the value changed.
+        """
+        series = {}
+        state = {}
+        for snapshot in self.snapshots.find({'stream': stream}).sort('seq', ASCENDING):
+            if snapshot['kind'] == 'keyframe':
+                touched = _to_state(snapshot['records'])
+                gone = set(state) - set(touched)
+                state = touched
+            else:
+                apply_delta(state, snapshot['delta'])
+                touched = {item['key']: None for item in snapshot['delta']['added'] + snapshot['delta']['changed']}
+                gone = set(snapshot['delta']['removed'])
+
+            for key in touched:
+                record = state.get(key)
+                if record is None or not match(key, record):
+                    continue
+                points = series.setdefault(key, [])
+                if not points or points[-1][field] != record.get(field):
+                    points.append({'taken_at': snapshot['taken_at'], 'seq': snapshot['seq'], field: record.get(field)})
+            for key in gone:
+                if key in series and series[key][-1][field] is not None:
+                    series[key].append({'taken_at': snapshot['taken_at'], 'seq': snapshot['seq'], field: None})
+        return series
@@ -0,0 +1,59 @@
+import logging
+import os
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# 'html.parser' (stdlib), 'lxml', or 'strained' (only build the subtrees we extract).
+# The full stdlib parse stays the default; 'strained' is opt-in
+DEFAULT_BACKEND = os.getenv('HTML_PARSER_BACKEND', 'html.parser')
+BACKENDS = ('html.parser', 'lxml', 'strained')
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+def _has_class(class_name: str):
+    """
+    Strainer attribute matcher for one CSS class. Strainers see the raw
+    class attribute string, so 'mainCol' would not match class="mainCol wide".
+    """
+    def match(value) -> bool:
+        return value is not None and class_name in value.split()
+    return match
+
+
+# Subtrees each extractor actually reads
+WARPOWER_ITEMS = SoupStrainer('div', attrs={'class': _has_class('mainCol')})
+# Keeps the wrapping <a> of clickable containers, which extract_container_data inspects
+GFP_CONTAINERS = SoupStrainer('div', attrs={'class': _has_class('contentSpecs')})
+OVERVIEW_SECTIONS = SoupStrainer('a', attrs={'class': _has_class('picTrans')})
+
+
+def _tree_builder(backend: str) -> str:
+    if backend == 'html.parser':
+        return 'html.parser'
+    if LXML_AVAILABLE:
+        return 'lxml'
+    if backend == 'lxml':
+        logger.warning("lxml is not installed, falling back to html.parser")
+    return 'html.parser'
+
+
+def make_soup(markup, strainer: Optional[SoupStrainer] = None, backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parse markup with the configured backend.
+    The strainer is only applied by the 'strained' backend; other backends build the full tree.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {backend}. Available backends: {', '.join(BACKENDS)}")
+
+    if backend == 'strained' and strainer is not None:
+        return BeautifulSoup(markup, _tree_builder(backend), parse_only=strainer)
+    return BeautifulSoup(markup, _tree_builder(backend))
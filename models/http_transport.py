@@ -0,0 +1,184 @@
+"""
+HTTP transport shared by the scrapers, with record/replay support.
+
+HTTP_TRANSPORT_MODE selects the behaviour:
+  live    - plain requests.get (default)
+  record  - live requests, each response also saved as a cassette
+  replay  - responses served from cassettes only; no network access
+
+Replay can inject faults to exercise retry and error paths deterministically:
+  HTTP_REPLAY_LATENCY_MS   fixed '50' or uniform range '20-80' added per request
+  HTTP_REPLAY_ERROR_RATE   probability (0-1) that a request fails
+  HTTP_REPLAY_ERROR_KIND   'status' (503 response), 'connection' (raises) or 'mixed'
+  HTTP_REPLAY_SEED         seed for latency and error sampling
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlencode, urlparse
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MODES = ('live', 'record', 'replay')
+
+# Query parameters that carry credentials are dropped from cassette keys and files
+SECRET_PARAMS = {'apikey', 'api_key', 'token', 'key'}
+
+
+# Base class of every error http_get raises, so callers can catch it without importing requests
+RequestException = requests.exceptions.RequestException
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """Raised in replay mode when no cassette exists for a request"""
+
+
+class InjectedConnectionError(requests.exceptions.ConnectionError):
+    """Connection failure injected by replay mode"""
+
+
+def _parse_latency(value: str):
+    if not value:
+        return 0.0, 0.0
+    if '-' in value:
+        low, high = value.split('-')
+        return float(low) / 1000, float(high) / 1000
+    return float(value) / 1000, float(value) / 1000
+
+
+class HttpTransport:
+    """Drop-in replacement for requests.get with record/replay and fault injection"""
+
+    def __init__(self, mode: Optional[str] = None, cassette_dir: Optional[str] = None,
+                 latency_ms: Optional[str] = None, error_rate: Optional[float] = None,
+                 error_kind: Optional[str] = None, seed: Optional[int] = None):
+        self.mode = mode or os.getenv('HTTP_TRANSPORT_MODE', 'live')
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown HTTP_TRANSPORT_MODE: {self.mode}. Available modes: {', '.join(MODES)}")
+        self.cassette_dir = cassette_dir or os.getenv('HTTP_CASSETTE_DIR', 'cassettes')
+        self.latency = _parse_latency(latency_ms if latency_ms is not None else os.getenv('HTTP_REPLAY_LATENCY_MS', ''))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv('HTTP_REPLAY_ERROR_RATE', '0'))
+        self.error_kind = error_kind or os.getenv('HTTP_REPLAY_ERROR_KIND', 'mixed')
+        seed = seed if seed is not None else os.getenv('HTTP_REPLAY_SEED')
+        self._random = random.Random(int(seed) if seed is not None else None)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'replayed': 0, 'recorded': 0, 'misses': 0, 'injected_errors': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def _public_params(params: Optional[Dict]) -> Dict:
+        return {k: v for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS}
+
+    def cassette_path(self, url: str, params: Optional[Dict] = None) -> str:
+        """Cassettes are stored per host, named by a hash of the URL and non-secret params"""
+        public_params = self._public_params(params)
+        key = url + ('?' + urlencode(sorted(public_params.items())) if public_params else '')
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cassette_dir, urlparse(url).netloc or 'local', f"{digest}.json")
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> requests.Response:
+        self._count('requests')
+        if self.mode == 'replay':
+            return self._replay(url, params)
+
+        response = requests.get(url, params=params, headers=headers, timeout=timeout)
+        if self.mode == 'record':
+            self.save_cassette(url, params, response.status_code, response.content,
+                               response.headers.get('Content-Type'), response.encoding)
+        return response
+
+    def save_cassette(self, url: str, params: Optional[Dict], status_code: int, body: bytes,
+                      content_type: Optional[str] = None, encoding: Optional[str] = None):
+        """Write one response to its cassette file"""
+        path = self.cassette_path(url, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        cassette = {
+            'request': {'method': 'GET', 'url': url, 'params': self._public_params(params)},
+            'response': {
+                'status_code': status_code,
+                'content_type': content_type,
+                'encoding': encoding or 'utf-8',
+                'body': body.decode(encoding or 'utf-8', errors='replace')
+            }
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cassette, f)
+        self._count('recorded')
+
+    def _replay(self, url: str, params: Optional[Dict]) -> requests.Response:
+        low, high = self.latency
+        if high:
+            time.sleep(self._random.uniform(low, high))
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self._count('injected_errors')
+            kind = self.error_kind if self.error_kind != 'mixed' else self._random.choice(['status', 'connection'])
+            if kind == 'connection':
+                raise InjectedConnectionError(f"Injected connection error for {url}")
+            return self._build_response(url, 503, b'Service Unavailable', 'text/plain', 'utf-8')
+
+        path = self.cassette_path(url, params)
+        if not os.path.exists(path):
+            self._count('misses')
+            raise CassetteMissError(f"No cassette for {url} ({path})")
+
+        with open(path, encoding='utf-8') as f:
+            cassette = json.load(f)['response']
+        self._count('replayed')
+        encoding = cassette.get('encoding') or 'utf-8'
+        return self._build_response(url, cassette['status_code'], cassette['body'].encode(encoding),
+                                    cassette.get('content_type'), encoding)
+
+    @staticmethod
+    def _build_response(url: str, status_code: int, body: bytes, content_type: Optional[str], encoding: str) -> requests.Response:
+        response = requests.Response()
+        response.url = url
+        response.status_code = status_code
+        response._content = body
+        response.encoding = encoding
+        if content_type:
+            response.headers['Content-Type'] = content_type
+        return response
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Return the process-wide transport configured from the environment"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+                if _transport.mode != 'live':
+                    logger.info(f"HTTP transport in {_transport.mode} mode ({_transport.cassette_dir})")
+    return _transport
+
+
+def set_transport(transport: HttpTransport):
+    """Replace the process-wide transport (used by benchmarks)"""
+    global _transport
+    _transport = transport
+
+
+def http_get(url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+             timeout: Optional[float] = None) -> requests.Response:
+    """requests.get through the configured transport"""
+    return get_transport().get(url, params=params, headers=headers, timeout=timeout)
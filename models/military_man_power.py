@@ -1,8 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
 
+from models.html_parsing import make_soup, GFP_CONTAINERS, DEFAULT_BACKEND
+from models.http_transport import http_get
+
 def scrape_gfp_data(url):
     """
     Scrape Global Firepower military data from the given URL
@@ -13,28 +14,10 @@ def scrape_gfp_data(url):
         }
         
         print(f"Fetching data from: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find all containers - both clickable and non-clickable
-        clickable_containers = soup.find_all('div', class_='specsGenContainers picTrans3 zoom')
-        non_clickable_containers = soup.find_all('div', class_='specsGenContainers')
-        
-        # Filter out clickable containers from non-clickable to avoid duplicates
-        non_clickable_only = [c for c in non_clickable_containers if 'picTrans3' not in c.get('class', [])]
-        
-        all_containers = clickable_containers + non_clickable_only
-        
-        print(f"Found {len(all_containers)} data containers")
-        
-        data = []
-        
-        for container in all_containers:
-            entry = extract_container_data(container)
-            if entry:
-                data.append(entry)
+        data = parse_gfp_html(response.content)
         
         return data
         
@@ -120,31 +103,43 @@ def extract_container_data(container):
         print(f"Error processing container: {e}")
         return None
 
+def find_gfp_containers(soup):
+    """
+    Find all data containers - both clickable and non-clickable
+    """
+    clickable_containers = soup.find_all('div', class_='specsGenContainers picTrans3 zoom')
+    non_clickable_containers = soup.find_all('div', class_='specsGenContainers')
+    
+    # Filter out clickable containers from non-clickable to avoid duplicates
+    non_clickable_only = [c for c in non_clickable_containers if 'picTrans3' not in c.get('class', [])]
+    
+    return clickable_containers + non_clickable_only
+
+def parse_gfp_html(html_content, backend=None):
+    """
+    Parse a Global Firepower country page into metric entries
+    """
+    all_containers = find_gfp_containers(make_soup(html_content, GFP_CONTAINERS, backend))
+    if not all_containers and (backend or DEFAULT_BACKEND) == 'strained':
+        # Page without the usual contentSpecs wrapper - fall back to a full parse
+        all_containers = find_gfp_containers(make_soup(html_content, backend='html.parser'))
+    
+    print(f"Found {len(all_containers)} data containers")
+    
+    data = []
+    for container in all_containers:
+        entry = extract_container_data(container)
+        if entry:
+            data.append(entry)
+    
+    return data
+
 def scrape_from_html_file(html_content):
     """
     Scrape from HTML content (for testing with provided HTML)
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Find all containers
-        clickable_containers = soup.find_all('div', class_='specsGenContainers picTrans3 zoom')
-        non_clickable_containers = soup.find_all('div', class_='specsGenContainers')
-        
-        # Filter out clickable containers from non-clickable
-        non_clickable_only = [c for c in non_clickable_containers if 'picTrans3' not in c.get('class', [])]
-        
-        all_containers = clickable_containers + non_clickable_only
-        
-        print(f"Found {len(all_containers)} data containers")
-        
-        data = []
-        for container in all_containers:
-            entry = extract_container_data(container)
-            if entry:
-                data.append(entry)
-        
-        return data
+        return parse_gfp_html(html_content)
         
     except Exception as e:
         print(f"Error processing HTML: {e}")
@@ -0,0 +1,35 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# pymongo's sort/index directions, so model modules need not import pymongo just to declare indexes
+ASCENDING = 1
+DESCENDING = -1
+
+# URI scheme for the in-process Mongo stand-in used by offline benchmarks
+STANDIN_SCHEME = 'mongomock://'
+
+_standin_store = None
+_standin_lock = threading.Lock()
+
+
+def create_mongo_client(mongo_uri: str):
+    """
+    Create a client for mongo_uri.
+    'mongomock://' returns an in-memory stand-in (requires mongomock); every
+    stand-in client in the process shares one store, like clients of one server.
+    """
+    if not mongo_uri.startswith(STANDIN_SCHEME):
+        from pymongo import MongoClient
+        return MongoClient(mongo_uri)
+
+    global _standin_store
+    import mongomock
+    from mongomock.store import ServerStore
+
+    with _standin_lock:
+        if _standin_store is None:
+            _standin_store = ServerStore()
+            logger.info("Using in-memory Mongo stand-in")
+    return mongomock.MongoClient(_store=_standin_store)
@@ -0,0 +1,130 @@
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.mongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+RANKINGS_COLLECTION = 'gfp_rankings'
+
+# Sources of a row's rank: Global Firepower's own rank, or our ordering by value (largest first)
+RANK_SOURCE_GFP = 'gfp'
+RANK_SOURCE_VALUE = 'value'
+
+
+def metric_slug(label: str) -> str:
+    """'Tot Mil. Personnel (est.)' -> 'tot-mil-personnel-est'"""
+    return re.sub(r'[^a-z0-9]+', '-', label.lower()).strip('-')
+
+
+def numeric_metric_value(entry: Dict):
+    """Numeric value of a GFP entry, including the currency values extract_container_data leaves as text"""
+    value = entry.get('numeric_value')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    cleaned = re.sub(r'[^\d.]', '', str(entry.get('value') or ''))
+    if not cleaned:
+        return None
+    try:
+        return float(cleaned) if '.' in cleaned else int(cleaned)
+    except ValueError:
+        return None
+
+
+class RankingIndex:
+    """
+    Per-metric leaderboard over the gfp_metrics documents.
+
+    One row per (metric, country_id) with a precomputed rank, indexed so that
+    top-k and single-country lookups are index reads rather than scans.
+    """
+
+    def __init__(self, db):
+        self.collection = db[RANKINGS_COLLECTION]
+
+    def ensure_indexes(self):
+        self.collection.create_index([('metric', ASCENDING), ('country_id', ASCENDING)], unique=True)
+        self.collection.create_index([('metric', ASCENDING), ('rank', ASCENDING)])
+
+    def ingest(self, documents: List[Dict]):
+        """Update the rows of the ingested countries, then re-rank only the metrics they touched"""
+        from pymongo import UpdateOne, DeleteMany
+
+        self.ensure_indexes()
+        now = datetime.utcnow()
+        operations = []
+        touched_metrics = set()
+
+        for doc in documents:
+            country_id = doc['country_id']
+            country_metrics = []
+            for entry in doc.get('metrics', []):
+                value = numeric_metric_value(entry)
+                if value is None:
+                    continue
+                slug = metric_slug(entry['label'])
+                ranking = entry.get('ranking') or {}
+                row = {
+                    'label': entry['label'].rstrip(':').strip(),
+                    'value': value,
+                    'display_value': entry['value'],
+                    'percentage': entry.get('percentage'),
+                    'rank': ranking.get('current_rank'),
+                    'total_countries': ranking.get('total_countries'),
+                    'rank_source': RANK_SOURCE_GFP if ranking else RANK_SOURCE_VALUE,
+                    'last_updated': now
+                }
+                operations.append(UpdateOne({'metric': slug, 'country_id': country_id}, {'$set': row}, upsert=True))
+                country_metrics.append(slug)
+                touched_metrics.add(slug)
+
+            # Metrics the country no longer reports drop out of their leaderboards
+            stale = {'country_id': country_id, 'metric': {'$nin': country_metrics}}
+            touched_metrics.update(self.collection.distinct('metric', stale))
+            operations.append(DeleteMany(stale))
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+        for slug in touched_metrics:
+            self._rerank_by_value(slug)
+        logger.info(f"Ranking index updated for {len(documents)} countries, {len(touched_metrics)} metrics")
+
+    def _rerank_by_value(self, slug: str):
+        """Assign ranks (ties share a rank) to rows without a Global Firepower rank"""
+        from pymongo import UpdateOne
+
+        rows = self.collection.find({'metric': slug, 'rank_source': RANK_SOURCE_VALUE},
+                                    {'country_id': 1, 'value': 1, 'rank': 1}).sort('value', DESCENDING)
+        rows = list(rows)
+        operations = []
+        rank = 0
+        previous_value = None
+        for position, row in enumerate(rows, 1):
+            if row['value'] != previous_value:
+                rank = position
+                previous_value = row['value']
+            if row.get('rank') != rank or row.get('total_countries') != len(rows):
+                operations.append(UpdateOne({'_id': row['_id']}, {'$set': {'rank': rank, 'total_countries': len(rows)}}))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def metrics(self) -> List[Dict]:
+        """Every ranked metric with its label and number of ranked countries"""
+        pipeline = [
+            {'$group': {'_id': '$metric', 'label': {'$first': '$label'}, 'countries': {'$sum': 1}}},
+            {'$sort': {'_id': 1}}
+        ]
+        return [{'metric': row['_id'], 'label': row['label'], 'countries': row['countries']}
+                for row in self.collection.aggregate(pipeline)]
+
+    def top(self, slug: str, limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+        """(rows ordered by rank, total ranked countries) for one metric"""
+        query = {'metric': slug}
+        rows = self.collection.find(query, {'_id': 0, 'metric': 0}).sort('rank', ASCENDING).skip(offset).limit(limit)
+        return list(rows), self.collection.count_documents(query)
+
+    def rank_of(self, slug: str, country_id: str) -> Optional[Dict]:
+        return self.collection.find_one({'metric': slug, 'country_id': country_id}, {'_id': 0, 'metric': 0})
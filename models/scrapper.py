@@ -1,15 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
 import re
 import os
 import time
 from urllib.parse import urljoin, urlparse
-from pymongo import MongoClient
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
 from typing import List, Dict, Optional
 
+from models.mongo import create_mongo_client
+from models.ranking_index import RankingIndex, metric_slug
+from models.history import SnapshotHistory, warpower_stream, gfp_stream, equipment_key, assign_record_keys, record_content
+from models.sync import next_change_token, finish_change_token, ensure_sync_indexes, record_dataset_scrape, stamp_catalog_references, TOMBSTONES_COLLECTION
+from models.catalog import EquipmentCatalog, split_record, SHARED_FIELDS
+# HTML parsing and HTTP modules are imported where scraping uses them, keeping them off the API's import path
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +21,65 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Global Firepower per-country metrics, one document per GFP country id
+GFP_COLLECTION = 'gfp_metrics'
+
+# Fields of a military record as served by the API, selectable with ?fields=
+RECORD_FIELDS = ('service', 'name', 'model', 'country', 'units', 'role', 'assessment', 'description',
+                 'image_url', 'flag_url', 'sketchfab_embed_url', 'record_key', 'catalog_id')
+# Named field sets, e.g. ?fields=compact for list screens
+FIELD_PRESETS = {'compact': ('name', 'model', 'units', 'image_url')}
+
+def parse_fields(value: str) -> Optional[tuple]:
+    """?fields= as a tuple of record fields, None for whole records; ValueError on unknown names"""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    if not names:
+        return None
+    fields = []
+    for name in names:
+        fields.extend(FIELD_PRESETS.get(name, (name,)))
+    unknown = [field for field in fields if field not in RECORD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(RECORD_FIELDS)} "
+                         f"or presets: {', '.join(FIELD_PRESETS)}")
+    return tuple(dict.fromkeys(fields))
+
+def record_projection(fields: Optional[tuple]) -> Optional[Dict]:
+    """Mongo projection for selected fields; catalog_id comes along when a catalog field is wanted"""
+    if not fields:
+        return None
+    projection = {field: 1 for field in fields}
+    if any(field in SHARED_FIELDS for field in fields):
+        projection['catalog_id'] = 1
+    projection['_id'] = 0
+    return projection
+
+def select_fields(docs: List[Dict], fields: Optional[tuple], catalog: EquipmentCatalog) -> List[Dict]:
+    """Join catalog fields into projected records and drop the helper catalog_id"""
+    if not fields:
+        return catalog.hydrate(docs)
+    catalog.hydrate(docs, fields)
+    if 'catalog_id' not in fields:
+        for doc in docs:
+            doc.pop('catalog_id', None)
+    return docs
+
+# Callables notified as listener(country_id, power_type, change_token) after save_military_data
+# commits; change_token is None when the scrape changed nothing
+_commit_listeners = []
+
+def register_commit_listener(listener):
+    """Subscribe to committed military data saves (e.g. to refresh derived views)"""
+    if listener not in _commit_listeners:
+        _commit_listeners.append(listener)
+
+def _notify_commit(country_id: str, power_type: str, change_token):
+    for listener in list(_commit_listeners):
+        try:
+            listener(country_id, power_type, change_token)
+        except Exception as e:
+            logger.error(f"Commit listener {getattr(listener, '__name__', listener)} failed: {e}")
+
 class DatabaseManager:
     """Handles MongoDB operations for military data"""
     
@@ -25,8 +88,10 @@ class DatabaseManager:
         if not self.mongo_uri:
             raise ValueError("MONGO_URI not found in environment variables")
         
-        self.client = MongoClient(self.mongo_uri)
+        self.client = create_mongo_client(self.mongo_uri)
         self.db = self.client['militaryDB']
+        self._sync_indexed = set()
+        self.catalog = EquipmentCatalog(self.db)
         logger.info("Connected to MongoDB")
     
     def get_or_create_country(self, country_name: str) -> str:
@@ -51,35 +116,178 @@ class DatabaseManager:
         return str(result.inserted_id)
     
     def save_military_data(self, country_id: str, power_type: str, data: List[Dict]) -> bool:
-        """Save military data to appropriate collection"""
+        """
+        Save military data to appropriate collection.
+        Only inserted, changed and removed records are written; they are stamped with
+        a new change token, and removals leave a tombstone for delta sync.
+        Descriptions, images and Sketchfab links go to the shared equipment catalog;
+        country records keep a catalog_id reference instead. A catalog change also stamps
+        the records of every other country joined with that entry.
+        """
+        from pymongo import InsertOne, ReplaceOne, DeleteOne
+
         collection_name = f"{power_type.lower()}"
         collection = self.db[collection_name]
+        now = datetime.utcnow()
         
         # Add metadata to each record
         for item in data:
             item['country_id'] = country_id
-            item['scraped_at'] = datetime.utcnow()
-            item['last_updated'] = datetime.utcnow()
+            item['scraped_at'] = now
+            item['last_updated'] = now
         
+        change_token = None
         try:
-            # Clear existing data for this country and power type
-            collection.delete_many({'country_id': country_id})
+            if collection_name not in self._sync_indexed:
+                ensure_sync_indexes(self.db, collection_name)
+                self._sync_indexed.add(collection_name)
+            
+            records = []
+            catalog_entries = {}
+            for item in data:
+                record, shared = split_record(item, collection_name)
+                records.append(record)
+                catalog_entries.setdefault(record['catalog_id'], dict(shared, model=item.get('model'), name=item.get('name')))
+            changed_entries = self.catalog.upsert(catalog_entries)
+            
+            # Records saved before change tokens existed have no record_key yet
+            existing = dict(assign_record_keys(collection.find({'country_id': country_id}),
+                                               lambda doc: doc.get('record_key') or equipment_key(doc)))
+            
+            changed = []
+            current_keys = set()
+            for key, item in assign_record_keys(records, equipment_key):
+                current_keys.add(key)
+                previous = existing.get(key)
+                if (previous is None or 'change_token' not in previous or item['catalog_id'] in changed_entries
+                        or record_content(previous) != record_content(item)):
+                    changed.append((key, item, previous))
+            removed = [(key, doc) for key, doc in existing.items() if key not in current_keys]
             
-            # Insert new data
-            result = collection.insert_many(data)
-            logger.info(f"Saved {len(result.inserted_ids)} {power_type} records for country_id: {country_id}")
-            return True
+            change_token = next_change_token(self.db) if changed or removed else None
+            operations = []
+            for key, item, previous in changed:
+                doc = dict(item, record_key=key, change_token=change_token)
+                if previous is None:
+                    operations.append(InsertOne(doc))
+                else:
+                    operations.append(ReplaceOne({'_id': previous['_id']}, doc))
+            operations.extend(DeleteOne({'_id': doc['_id']}) for _, doc in removed)
+            
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+            if removed:
+                self.db[TOMBSTONES_COLLECTION].insert_many([{
+                    'country_id': country_id,
+                    'power_type': collection_name,
+                    'record_key': key,
+                    'change_token': change_token,
+                    'deleted_at': now
+                } for key, _ in removed])
+            
+            record_dataset_scrape(self.db, country_id, collection_name, len(data), change_token, now)
+            # Other countries' records joined with a changed catalog entry changed too
+            restamped = []
+            if changed_entries:
+                restamped = stamp_catalog_references(self.db, changed_entries, change_token, now,
+                                                     exclude=(country_id, collection_name))
+            logger.info(f"Saved {len(data)} {power_type} records for country_id: {country_id} "
+                        f"({len(changed)} changed, {len(removed)} removed)")
         except Exception as e:
             logger.error(f"Error saving {power_type} data: {e}")
             return False
-    
-    def get_military_data(self, country_id: str, power_type: str) -> List[Dict]:
-        """Retrieve military data from database"""
+        finally:
+            # Readers sync past this token only once all of its writes are in
+            if change_token is not None:
+                finish_change_token(self.db, change_token)
+        
+        try:
+            SnapshotHistory(self.db).record(warpower_stream(country_id, power_type), data)
+        except Exception as e:
+            logger.error(f"Error recording {power_type} history: {e}")
+        
+        _notify_commit(country_id, collection_name, change_token)
+        for other_country_id, other_power_type in restamped:
+            _notify_commit(other_country_id, other_power_type, change_token)
+        return True
+
+    def curate_catalog_entry(self, entry_id: str, fields: Dict) -> bool:
+        """
+        Set shared fields of a catalog entry by hand and stamp every record joined with it,
+        so delta sync and derived views pick the change up. Later scrapes keep curated fields.
+        """
+        if not self.catalog.curate(entry_id, fields):
+            return False
+        change_token = next_change_token(self.db)
+        try:
+            restamped = stamp_catalog_references(self.db, [entry_id], change_token, datetime.utcnow())
+        finally:
+            finish_change_token(self.db, change_token)
+        for country_id, power_type in restamped:
+            _notify_commit(country_id, power_type, change_token)
+        return True
+
+    def save_gfp_metrics(self, documents: List[Dict]) -> int:
+        """Upsert Global Firepower country documents in one unordered bulk write"""
+        from pymongo import ReplaceOne
+        from pymongo.errors import BulkWriteError
+
+        if not documents:
+            return 0
+
+        collection = self.db[GFP_COLLECTION]
+        collection.create_index('country_id', unique=True)
+        operations = [ReplaceOne({'country_id': doc['country_id']}, doc, upsert=True) for doc in documents]
+
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            saved = result.upserted_count + result.matched_count
+            logger.info(f"Saved GFP metrics for {saved} countries")
+        except BulkWriteError as e:
+            # Unordered writes keep going past failures; report what made it in
+            details = e.details
+            failed = {documents[error['index']]['country_id'] for error in details.get('writeErrors', [])}
+            documents = [doc for doc in documents if doc['country_id'] not in failed]
+            saved = details.get('nUpserted', 0) + details.get('nMatched', 0)
+            logger.error(f"Error saving GFP metrics for {len(failed)} countries")
+        except Exception as e:
+            logger.error(f"Error saving GFP metrics: {e}")
+            return 0
+
+        try:
+            RankingIndex(self.db).ingest(documents)
+        except Exception as e:
+            logger.error(f"Error updating GFP ranking index: {e}")
+
+        history = SnapshotHistory(self.db)
+        for doc in documents:
+            try:
+                history.record(gfp_stream(doc['country_id']), doc['metrics'],
+                               key_func=lambda entry: metric_slug(entry['label']), taken_at=doc['scraped_at'])
+            except Exception as e:
+                logger.error(f"Error recording GFP history for {doc['country_id']}: {e}")
+        return saved
+
+    def get_military_data(self, country_id: str, power_type: str, fields: Optional[tuple] = None) -> List[Dict]:
+        """Retrieve military data from database, optionally only the given record fields"""
         collection_name = f"{power_type.lower()}"
         collection = self.db[collection_name]
         
-        data = list(collection.find({'country_id': country_id}))
-        return data
+        data = list(collection.find({'country_id': country_id}, record_projection(fields)))
+        return select_fields(data, fields, self.catalog)
+    
+    def iter_military_data(self, country_id: str, power_type: str, batch_size: int = 500,
+                           fields: Optional[tuple] = None):
+        """Yield a country's records in batches of at most batch_size, joined with the catalog"""
+        cursor = self.db[power_type.lower()].find({'country_id': country_id}, record_projection(fields)).batch_size(batch_size)
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield select_fields(batch, fields, self.catalog)
+                batch = []
+        if batch:
+            yield select_fields(batch, fields, self.catalog)
     
     def close_connection(self):
         """Close MongoDB connection"""
@@ -96,15 +304,18 @@ class WebScraper:
     
     def scrape_military_data(self, power_name: str, country_name: str) -> Optional[List[Dict]]:
         """Scrape military data from warpower website"""
+        from models.html_parsing import make_soup, WARPOWER_ITEMS
+        from models.http_transport import http_get
+        
         url = f"https://www.warpower{country_name}.com/{power_name}.php"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = http_get(url, headers=self.headers)
             if response.status_code != 200:
                 logger.error(f"Failed to retrieve webpage. Status code: {response.status_code}")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text, WARPOWER_ITEMS)
             aircraft_elements = soup.find_all('div', class_='mainCol')
             
             military_data = []
@@ -128,58 +339,23 @@ class WebScraper:
     
     def _extract_element_data(self, element, base_url: str, country_name: str) -> Optional[Dict]:
         """Extract data from a single HTML element"""
+        from models.extractors import WARPOWER_ITEM_ENGINE
+        
         try:
-            # Extract service information
-            service_element = element.find('span', class_='textWhite textNormal textBold')
-            service = service_element.text.strip() if service_element else "Unknown"
-            
-            # Extract image URL
-            img_element = element.find('img', class_='entryImg')
-            img_url = urljoin(base_url, img_element['src']) if img_element and img_element.get('src') else None
-            
-            # Extract assessment information
-            assessment_element = element.find('div', class_='assessmentBox')
-            assessment = assessment_element.find('span', class_='textNormal textWhite').text.strip() if assessment_element else "Unknown"
-            
-            # Set static flag URL based on country name
-            flag_url = f"flags/{country_name.lower()}.jpg"
-            
-            # Extract units count
-            units_element = element.find('span', class_='textJumbo')
-            units = int(units_element.text.strip()) if units_element else 0
-            
-            # Extract aircraft name and model
-            name_element = element.find('span', class_='textYellowOrange')
-            model_element = element.find('span', class_='textWhite textLarge textBold')
-            
-            aircraft_name = name_element.text.strip() if name_element else "Unknown"
-            full_model_text = model_element.text.strip() if model_element else ""
-            
-            # Extract model in parentheses
-            model = "Unknown"
-            model_match = re.search(r'\((.*?)\)', full_model_text)
-            if model_match:
-                model = model_match.group(1).strip()
-            
-            # Extract role
-            role_element = element.find('span', class_='textNormal textLtstGray')
-            role = role_element.text.replace('Role:', '').strip() if role_element else "Unknown"
-            
-            # Extract description
-            desc_element = element.find('span', class_='textSmall1 textWhite')
-            description = desc_element.text.strip() if desc_element else "No description available"
+            fields = WARPOWER_ITEM_ENGINE.extract(element, {'base_url': base_url})
             
             return {
-                "service": service,
-                "name": aircraft_name,
-                "model": model,
+                "service": fields['service'],
+                "name": fields['name'],
+                "model": fields['model'],
                 "country": country_name.title(),
-                "units": units,
-                "role": role,
-                "assessment": assessment,
-                "description": description,
-                "image_url": img_url,
-                "flag_url": flag_url
+                "units": fields['units'],
+                "role": fields['role'],
+                "assessment": fields['assessment'],
+                "description": fields['description'],
+                "image_url": fields['image_url'],
+                # Set static flag URL based on country name
+                "flag_url": f"flags/{country_name.lower()}.jpg"
             }
             
         except Exception as e:
@@ -192,6 +368,7 @@ class SketchfabIntegrator:
     def __init__(self, api_token: str = os.getenv('SKETCHFAB_API_KEY')):
         self.api_token = api_token
         self.headers = {'Authorization': f'Token {api_token}'} if api_token else {}
+        self.rate_limit_seconds = float(os.getenv('SKETCHFAB_RATE_LIMIT_SECONDS', '0.5'))
     
     def normalize_name(self, name: str) -> str:
         """Normalize aircraft name for better matching"""
@@ -227,11 +404,13 @@ class SketchfabIntegrator:
     
     def get_sketchfab_link(self, model_name: str) -> str:
         """Get Sketchfab embed link for a model"""
+        from models.http_transport import http_get
+        
         query = model_name.replace(' ', '+')
         url = f'https://api.sketchfab.com/v3/search?type=models&q={query}&sort_by=relevance&count=10'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = http_get(url, headers=self.headers)
             
             if response.status_code != 200:
                 logger.warning(f"Sketchfab API error {response.status_code} for model: {model_name}")
@@ -254,18 +433,21 @@ class SketchfabIntegrator:
             logger.error(f"Error fetching Sketchfab data for {model_name}: {e}")
             return "NOT FOUND"
     
-    def add_sketchfab_links(self, military_data: List[Dict]) -> List[Dict]:
-        """Add Sketchfab embed URLs to military data"""
+    def add_sketchfab_links(self, military_data: List[Dict], known: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """Add Sketchfab embed URLs to military data; models in known (model -> URL) are not searched again"""
         total_items = len(military_data)
+        known = known or {}
         
         for i, item in enumerate(military_data):
             model_name = item.get("model", "")
             logger.info(f"Processing Sketchfab link {i+1}/{total_items}: {model_name}")
             
-            if model_name and model_name != "Unknown":
+            if model_name in known:
+                item["sketchfab_embed_url"] = known[model_name]
+            elif model_name and model_name != "Unknown":
                 sketchfab_url = self.get_sketchfab_link(model_name)
                 item["sketchfab_embed_url"] = sketchfab_url
-                time.sleep(0.5)  # Rate limiting
+                time.sleep(self.rate_limit_seconds)  # Rate limiting
             else:
                 item["sketchfab_embed_url"] = "NOT FOUND"
                 logger.info(f"No model name found for: {item.get('name', 'Unknown')}")
@@ -280,8 +462,39 @@ class MilitaryDataPipeline:
         self.scraper = WebScraper()
         self.sketchfab = SketchfabIntegrator()
     
-    def run_pipeline(self, country_name: str, power_types: List[str]):
-        """Run the complete data pipeline"""
+    def process_power_type(self, country_id: str, country_name: str, power_type: str) -> Dict:
+        """Scrape, enrich and save one power type. Returns status, record count and stage timings."""
+        timings = {}
+        
+        # Step 1: Scrape data
+        started = time.perf_counter()
+        military_data = self.scraper.scrape_military_data(power_type, country_name.lower())
+        timings['scrape'] = time.perf_counter() - started
+        if not military_data:
+            logger.warning(f"No data scraped for {power_type}")
+            return {'status': 'failed', 'message': 'No data found', 'count': 0, 'timings': timings}
+        
+        # Step 2: Add Sketchfab links
+        started = time.perf_counter()
+        known = self.db_manager.catalog.known_sketchfab_links(military_data, power_type)
+        military_data = self.sketchfab.add_sketchfab_links(military_data, known)
+        timings['sketchfab'] = time.perf_counter() - started
+        
+        # Step 3: Save to database
+        started = time.perf_counter()
+        success = self.db_manager.save_military_data(country_id, power_type, military_data)
+        timings['save'] = time.perf_counter() - started
+        
+        if success:
+            logger.info(f"Successfully completed {power_type} pipeline for {country_name}")
+            return {'status': 'success', 'message': 'Data saved successfully', 'count': len(military_data), 'timings': timings}
+        
+        logger.error(f"Failed to save {power_type} data for {country_name}")
+        return {'status': 'failed', 'message': 'Failed to save data', 'count': 0, 'timings': timings}
+    
+    def run_pipeline(self, country_name: str, power_types: List[str]) -> Dict[str, Dict]:
+        """Run the complete data pipeline. Returns the process_power_type result per power type."""
+        results = {}
         try:
             logger.info(f"Starting pipeline for {country_name} - {', '.join(power_types)}")
             
@@ -290,22 +503,7 @@ class MilitaryDataPipeline:
             
             for power_type in power_types:
                 logger.info(f"Processing {power_type} for {country_name}")
-                
-                # Step 1: Scrape data
-                military_data = self.scraper.scrape_military_data(power_type, country_name.lower())
-                if not military_data:
-                    logger.warning(f"No data scraped for {power_type}")
-                    continue
-                
-                # Step 2: Add Sketchfab links
-                military_data = self.sketchfab.add_sketchfab_links(military_data)
-                
-                # Step 3: Save to database
-                success = self.db_manager.save_military_data(country_id, power_type, military_data)
-                if success:
-                    logger.info(f"Successfully completed {power_type} pipeline for {country_name}")
-                else:
-                    logger.error(f"Failed to save {power_type} data for {country_name}")
+                results[power_type] = self.process_power_type(country_id, country_name, power_type)
             
             logger.info(f"Pipeline completed for {country_name}")
             
@@ -313,12 +511,14 @@ class MilitaryDataPipeline:
             logger.error(f"Pipeline error: {e}")
         finally:
             self.cleanup()
+        
+        return results
     
-    def get_country_data(self, country_name: str, power_type: str) -> List[Dict]:
+    def get_country_data(self, country_name: str, power_type: str, fields: Optional[tuple] = None) -> List[Dict]:
         """Retrieve data for a specific country and power type"""
         try:
             country_id = self.db_manager.get_or_create_country(country_name)
-            return self.db_manager.get_military_data(country_id, power_type)
+            return self.db_manager.get_military_data(country_id, power_type, fields)
         except Exception as e:
             logger.error(f"Error retrieving data: {e}")
             return []
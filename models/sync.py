@@ -0,0 +1,131 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models.mongo import ASCENDING
+
+COUNTERS_COLLECTION = 'counters'
+DATASETS_COLLECTION = 'datasets'
+TOMBSTONES_COLLECTION = 'tombstones'
+
+CHANGE_TOKEN_COUNTER = 'change_token'
+# A save that crashed without finishing its token stops holding back delta sync after this long
+IN_FLIGHT_TIMEOUT_SECONDS = float(os.getenv('SYNC_IN_FLIGHT_TIMEOUT_SECONDS', '600'))
+# Collections whose records reference the shared equipment catalog
+POWER_TYPES = ('airpower', 'navalpower', 'droneforce', 'landpower')
+
+
+def dataset_id(country_id: str, power_type: str) -> str:
+    return f"{power_type.lower()}:{country_id}"
+
+
+def next_change_token(db) -> int:
+    """
+    Allocate the next value of the global, monotonically increasing change token and mark it
+    in flight until finish_change_token; both happen in one compare-and-set on the counter
+    """
+    counters = db[COUNTERS_COLLECTION]
+    counters.update_one({'_id': CHANGE_TOKEN_COUNTER}, {'$setOnInsert': {'value': 0, 'in_flight': []}}, upsert=True)
+    while True:
+        value = counters.find_one({'_id': CHANGE_TOKEN_COUNTER}, {'value': 1})['value']
+        result = counters.update_one(
+            {'_id': CHANGE_TOKEN_COUNTER, 'value': value},
+            {'$set': {'value': value + 1}, '$push': {'in_flight': {'token': value + 1, 'at': datetime.utcnow()}}}
+        )
+        if result.modified_count:
+            return value + 1
+
+
+def finish_change_token(db, change_token: int):
+    """Mark every write stamped with change_token as done"""
+    db[COUNTERS_COLLECTION].update_one({'_id': CHANGE_TOKEN_COUNTER},
+                                       {'$pull': {'in_flight': {'token': change_token}}})
+
+
+def committed_token(db) -> int:
+    """
+    Highest token whose writes, and those of every lower token, are finished. Saves finish
+    out of order, so delta sync never reads or hands out tokens past this one.
+    """
+    counter = db[COUNTERS_COLLECTION].find_one({'_id': CHANGE_TOKEN_COUNTER})
+    if not counter:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(seconds=IN_FLIGHT_TIMEOUT_SECONDS)
+    in_flight = [entry['token'] for entry in counter.get('in_flight', []) if entry['at'] > cutoff]
+    return min(in_flight) - 1 if in_flight else counter['value']
+
+
+def ensure_sync_indexes(db, power_type: str):
+    db[power_type].create_index([('country_id', ASCENDING), ('change_token', ASCENDING)])
+    db[power_type].create_index([('country_id', ASCENDING), ('last_updated', ASCENDING)])
+    db[power_type].create_index('catalog_id')
+    db[TOMBSTONES_COLLECTION].create_index(
+        [('country_id', ASCENDING), ('power_type', ASCENDING), ('change_token', ASCENDING)])
+
+
+def record_dataset_scrape(db, country_id: str, power_type: str, record_count: int,
+                          change_token: Optional[int], scraped_at: datetime):
+    """
+    Note a completed scrape of one dataset. version only moves when the data changed,
+    so it doubles as a cache key for anything derived from the dataset.
+    """
+    update = {
+        '$set': {
+            'country_id': country_id,
+            'power_type': power_type.lower(),
+            'record_count': record_count,
+            'last_scraped_at': scraped_at
+        }
+    }
+    if change_token is not None:
+        update['$max'] = {'version': change_token}
+        update['$set']['last_changed_at'] = scraped_at
+    else:
+        update['$setOnInsert'] = {'version': 0}
+    db[DATASETS_COLLECTION].update_one({'_id': dataset_id(country_id, power_type)}, update, upsert=True)
+
+
+def stamp_catalog_references(db, catalog_ids, change_token: int, changed_at: datetime,
+                             exclude: Optional[Tuple[str, str]] = None) -> List[Tuple[str, str]]:
+    """
+    Give every record joined with a changed catalog entry a new change token and move the
+    versions of their datasets, since their served output changed with the catalog.
+    exclude is a (country_id, power_type) dataset already stamped by its own save.
+    Returns the (country_id, power_type) datasets stamped.
+    """
+    stamped = []
+    for power_type in POWER_TYPES:
+        query = {'catalog_id': {'$in': list(catalog_ids)}}
+        if exclude and exclude[1] == power_type:
+            query['country_id'] = {'$ne': exclude[0]}
+        country_ids = db[power_type].distinct('country_id', query)
+        if not country_ids:
+            continue
+        db[power_type].update_many(query, {'$set': {'change_token': change_token, 'last_updated': changed_at}})
+        db[DATASETS_COLLECTION].update_many(
+            {'_id': {'$in': [dataset_id(country_id, power_type) for country_id in country_ids]}},
+            {'$max': {'version': change_token}, '$set': {'last_changed_at': changed_at}}
+        )
+        stamped.extend((country_id, power_type) for country_id in country_ids)
+    return stamped
+
+
+def get_dataset(db, country_id: str, power_type: str) -> Optional[Dict]:
+    return db[DATASETS_COLLECTION].find_one({'_id': dataset_id(country_id, power_type)})
+
+
+def changes_since(db, country_id: str, power_type: str, since: int,
+                  until: Optional[int] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    (records inserted or updated after since, tombstones of records deleted after since),
+    up to and including until when given
+    """
+    window = {'$gt': since}
+    if until is not None:
+        window['$lte'] = until
+    upserts = list(db[power_type.lower()].find(
+        {'country_id': country_id, 'change_token': window}).sort('change_token', ASCENDING))
+    deletes = list(db[TOMBSTONES_COLLECTION].find(
+        {'country_id': country_id, 'power_type': power_type.lower(), 'change_token': window},
+        {'_id': 0, 'record_key': 1, 'change_token': 1, 'deleted_at': 1}).sort('change_token', ASCENDING))
+    return upserts, deletes
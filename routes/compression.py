@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are sent as is; compressing them costs more than it saves
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+# Compressed bodies kept for reuse, bounded by their total size
+COMPRESS_CACHE_MB = float(os.getenv('COMPRESS_CACHE_MB', '64'))
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/msgpack', 'text/html', 'text/plain', 'text/csv'}
+
+
+def _gzip(body: bytes) -> bytes:
+    # mtime=0 keeps output identical for identical bodies
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+ENCODERS = {'gzip': _gzip}
+if BROTLI_AVAILABLE:
+    ENCODERS['br'] = lambda body: brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+# Preferred first when the client accepts several
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+class CompressionCache:
+    """
+    Compressed bodies keyed by (encoding, mimetype, body digest), so an identical payload
+    is compressed once and a changed one can never be served stale.
+    """
+
+    def __init__(self, max_bytes: int = int(COMPRESS_CACHE_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'compressed': 0, 'skipped_small': 0, 'cache_hits': 0, 'cache_misses': 0,
+            'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0
+        }
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def compress(self, body: bytes, encoding: str, mimetype: str) -> bytes:
+        key = (encoding, mimetype, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self.get(key)
+        hit = compressed is not None
+        if not hit:
+            started = time.process_time()
+            compressed = ENCODERS[encoding](body)
+            cpu = time.process_time() - started
+            self.put(key, compressed)
+
+        with self._lock:
+            self.stats['compressed'] += 1
+            self.stats['cache_hits' if hit else 'cache_misses'] += 1
+            self.stats['bytes_in'] += len(body)
+            self.stats['bytes_out'] += len(compressed)
+            if not hit:
+                self.stats['cpu_seconds'] += cpu
+        return compressed
+
+    def record_skip(self):
+        with self._lock:
+            self.stats['skipped_small'] += 1
+
+    def describe(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            entries, size = len(self._entries), self._size
+        return {
+            **stats,
+            'cpu_seconds': round(stats['cpu_seconds'], 4),
+            'ratio': round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else None,
+            'encodings': list(ENCODERS),
+            'min_bytes': COMPRESS_MIN_BYTES,
+            'cache_entries': entries,
+            'cache_bytes': size
+        }
+
+
+compression_cache = CompressionCache()
+
+
+def _negotiate_encoding():
+    accepted = request.accept_encodings
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in ENCODERS and accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress_response(response):
+    """after_request hook: compress eligible bodies with the client's preferred encoding"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        compression_cache.record_skip()
+        return response
+
+    try:
+        response.set_data(compression_cache.compress(body, encoding, response.mimetype))
+        response.headers['Content-Encoding'] = encoding
+    except Exception as e:
+        logger.error(f"Error compressing response with {encoding}: {e}")
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -1,18 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
 import logging
-from typing import List, Dict
-import threading
+import os
+import time
+import uuid
+from typing import List, Dict, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
-# Import your existing classes (assuming they're in a separate module)
-# If the classes are in the same file, you can import them directly
-
-from models.scrapper import (
-    MilitaryDataPipeline, 
-    DatabaseManager, 
-    WebScraper, 
-    SketchfabIntegrator
-)
+# models.scrapper is imported by the handlers that use it, keeping it off the app's import path
+from services.task_store import get_task_store
+from routes.responses import wants_ndjson, ndjson_response, STREAM_BATCH_SIZE
 
 
 # Configure logging
@@ -22,108 +19,181 @@ logger = logging.getLogger(__name__)
 # Create Blueprint
 dynamic_scraper_bp = Blueprint('dynamic_scraper', __name__)
 
-# Global variable to track scraping status
-scraping_status = {}
+# How long a completed job keeps answering identical submissions
+RECENT_JOB_WINDOW_SECONDS = int(os.getenv('SCRAPE_RECENT_JOB_WINDOW_SECONDS', '300'))
+
+# Server-Sent Events stream settings
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_MAX_DURATION_SECONDS = int(os.getenv('SCRAPE_STREAM_MAX_SECONDS', '1800'))
+TERMINAL_STATUSES = ('completed', 'error')
+
+def make_job_key(country_name: str, power_types: List[str]) -> str:
+    """Build the coalescing key for a (country, power_types) set"""
+    return f"{country_name.lower()}:{','.join(sorted(set(power_types)))}"
+
+def submit_scrape_job(country_name: str, power_types: List[str], force: bool = False) -> Tuple[str, bool]:
+    """
+    Start a scraping job unless an identical one is in flight or just finished.
+    Returns (task_id, coalesced) where coalesced is True for a reused job.
+    """
+    job_key = make_job_key(country_name, power_types)
+    
+    # The store decides atomically, across processes, whether an identical job can be joined
+    task_id, created = get_task_store().claim(job_key, str(uuid.uuid4()), {
+        'status': 'queued',
+        'message': f'Queued pipeline for {country_name}',
+        'progress': 0,
+        'total_power_types': len(power_types),
+        'completed_power_types': 0,
+        'current_power_type': None,
+        'data': {}
+    }, RECENT_JOB_WINDOW_SECONDS, force=force)
+    if not created:
+        logger.info(f"Coalescing scrape request for {job_key} into task {task_id}")
+        return task_id, True
+    
+    # Start scraping in background thread
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(run_scraping_pipeline, country_name, power_types, task_id)
+    executor.shutdown(wait=False)
+    
+    return task_id, False
 
 def run_scraping_pipeline(country_name: str, power_types: List[str], task_id: str):
     """Run the scraping pipeline in a separate thread"""
+    from models.scrapper import MilitaryDataPipeline
+    
+    task_store = get_task_store()
+    completed = 0
     try:
-        scraping_status[task_id] = {
+        task_store.update(task_id, {
             'status': 'running',
             'message': f'Initializing pipeline for {country_name}',
-            'progress': 5,  # Set initial progress
-            'total_power_types': len(power_types),
-            'completed_power_types': 0,
-            'current_power_type': None,
-            'data': {}
-        }
+            'progress': 5  # Set initial progress
+        })
         
         pipeline = MilitaryDataPipeline()
         
         # Update progress for pipeline initialization
-        scraping_status[task_id]['progress'] = 10
-        scraping_status[task_id]['message'] = f'Getting country information for {country_name}'
+        task_store.update(task_id, {
+            'progress': 10,
+            'message': f'Getting country information for {country_name}'
+        })
         
         # Get or create country
         country_id = pipeline.db_manager.get_or_create_country(country_name)
         
         # Update progress after country setup
-        scraping_status[task_id]['progress'] = 15
+        task_store.update(task_id, {'progress': 15})
         
         for i, power_type in enumerate(power_types):
-            scraping_status[task_id]['current_power_type'] = power_type
-            
             # Calculate base progress for this power type
             base_progress = 15 + (i * 80 / len(power_types))  # 15% initial + 80% for processing
             
             # Step 1: Scrape data
-            scraping_status[task_id]['message'] = f'Scraping {power_type} data for {country_name}'
-            scraping_status[task_id]['progress'] = base_progress + (10 / len(power_types))
+            task_store.update(task_id, {
+                'current_power_type': power_type,
+                'message': f'Scraping {power_type} data for {country_name}',
+                'progress': base_progress + (10 / len(power_types))
+            })
             
             logger.info(f"Processing {power_type} for {country_name}")
             
             military_data = pipeline.scraper.scrape_military_data(power_type, country_name.lower())
             if not military_data:
                 logger.warning(f"No data scraped for {power_type}")
-                scraping_status[task_id]['data'][power_type] = {
-                    'status': 'failed',
-                    'message': 'No data found',
-                    'count': 0
-                }
                 # Update progress even for failed items
-                scraping_status[task_id]['completed_power_types'] += 1
-                scraping_status[task_id]['progress'] = 15 + (scraping_status[task_id]['completed_power_types'] * 80 / len(power_types))
+                completed += 1
+                task_store.update(task_id, {
+                    f'data.{power_type}': {
+                        'status': 'failed',
+                        'message': 'No data found',
+                        'count': 0
+                    },
+                    'completed_power_types': completed,
+                    'progress': 15 + (completed * 80 / len(power_types))
+                })
                 continue
             
             # Step 2: Add Sketchfab links
-            scraping_status[task_id]['message'] = f'Adding Sketchfab links for {power_type}'
-            scraping_status[task_id]['progress'] = base_progress + (40 / len(power_types))
-            military_data = pipeline.sketchfab.add_sketchfab_links(military_data)
+            task_store.update(task_id, {
+                'message': f'Adding Sketchfab links for {power_type}',
+                'progress': base_progress + (40 / len(power_types))
+            })
+            known = pipeline.db_manager.catalog.known_sketchfab_links(military_data, power_type)
+            military_data = pipeline.sketchfab.add_sketchfab_links(military_data, known)
             
             # Step 3: Save to database
-            scraping_status[task_id]['message'] = f'Saving {power_type} data to database'
-            scraping_status[task_id]['progress'] = base_progress + (70 / len(power_types))
+            task_store.update(task_id, {
+                'message': f'Saving {power_type} data to database',
+                'progress': base_progress + (70 / len(power_types))
+            })
             success = pipeline.db_manager.save_military_data(country_id, power_type, military_data)
             
             # Update progress after completion
-            scraping_status[task_id]['completed_power_types'] += 1
-            scraping_status[task_id]['progress'] = 15 + (scraping_status[task_id]['completed_power_types'] * 80 / len(power_types))
-            
+            completed += 1
             if success:
-                scraping_status[task_id]['data'][power_type] = {
+                result = {
                     'status': 'success',
                     'message': 'Data saved successfully',
                     'count': len(military_data)
                 }
                 logger.info(f"Successfully completed {power_type} pipeline for {country_name}")
             else:
-                scraping_status[task_id]['data'][power_type] = {
+                result = {
                     'status': 'failed',
                     'message': 'Failed to save data',
                     'count': 0
                 }
                 logger.error(f"Failed to save {power_type} data for {country_name}")
+            
+            task_store.update(task_id, {
+                f'data.{power_type}': result,
+                'completed_power_types': completed,
+                'progress': 15 + (completed * 80 / len(power_types))
+            })
         
         # Mark as completed
-        scraping_status[task_id]['status'] = 'completed'
-        scraping_status[task_id]['message'] = f'Pipeline completed for {country_name}'
-        scraping_status[task_id]['progress'] = 100
+        task_store.update(task_id, {
+            'status': 'completed',
+            'message': f'Pipeline completed for {country_name}',
+            'progress': 100,
+            'finished_at': time.time()
+        })
         
         pipeline.cleanup()
         
     except Exception as e:
-        scraping_status[task_id]['status'] = 'error'
-        scraping_status[task_id]['message'] = f'Pipeline error: {str(e)}'
-        scraping_status[task_id]['progress'] = 0  # Reset progress on error
+        task_store.update(task_id, {
+            'status': 'error',
+            'message': f'Pipeline error: {str(e)}',
+            'progress': 0,  # Reset progress on error
+            'finished_at': time.time()
+        })
         logger.error(f"Pipeline error: {e}")
 
 # Debug endpoint to check status directly
 @dynamic_scraper_bp.route('/debug/status', methods=['GET'])
 def debug_all_status():
-    """Debug endpoint to see all current task statuses"""
+    """
+    Debug endpoint to page through task statuses, newest first.
+    Query params: offset (default 0), limit (default 50, max 200)
+    """
+    offset = max(request.args.get('offset', default=0, type=int), 0)
+    limit = min(max(request.args.get('limit', default=50, type=int), 1), 200)
+    
+    tasks, total = get_task_store().list_tasks(offset=offset, limit=limit)
+    
     return jsonify({
         'success': True,
-        'all_tasks': scraping_status
+        'total_tasks': total,
+        'tasks': tasks,
+        'pagination': {
+            'limit': limit,
+            'offset': offset,
+            'has_more': offset + limit < total,
+            'next_offset': offset + limit if offset + limit < total else None
+        }
     }), 200
 
 @dynamic_scraper_bp.route('/scrape', methods=['POST'])
@@ -134,8 +204,12 @@ def create_military_tables():
     Expected JSON payload:
     {
         "country_name": "india",
-        "power": "airpower" or "all" or ["airpower", "navalpower"]
+        "power": "airpower" or "all" or ["airpower", "navalpower"],
+        "force": false  # optional, start a fresh run even if an identical job exists
     }
+    
+    Identical submissions (same country and power type set) that arrive while a
+    job is running, or shortly after it completed, return the existing task_id.
     """
     try:
         # Validate request data
@@ -200,18 +274,20 @@ def create_military_tables():
                 'message': 'power must be a string or list of strings'
             }), 400
         
-        # Generate unique task ID
-        import uuid
-        task_id = str(uuid.uuid4())
+        force = data.get('force', False)
+        if not isinstance(force, bool):
+            return jsonify({
+                'success': False,
+                'message': 'force must be a boolean'
+            }), 400
         
-        # Start scraping in background thread
-        executor = ThreadPoolExecutor(max_workers=1)
-        executor.submit(run_scraping_pipeline, country_name, power_types, task_id)
+        task_id, coalesced = submit_scrape_job(country_name, power_types, force=force)
         
         return jsonify({
             'success': True,
-            'message': 'Scraping pipeline started',
+            'message': 'Existing scraping task reused' if coalesced else 'Scraping pipeline started',
             'task_id': task_id,
+            'coalesced': coalesced,
             'country_name': country_name,
             'power_types': power_types,
             'status_url': f'/api/dynamic_scraper/status/{task_id}'
@@ -230,17 +306,15 @@ def get_scraping_status(task_id: str):
     GET endpoint to check the status of a scraping task
     """
     try:
-        if task_id not in scraping_status:
+        status_info = get_task_store().get(task_id)
+        if not status_info:
             return jsonify({
                 'success': False,
                 'message': 'Task not found'
             }), 404
         
-        status_info = scraping_status[task_id]
-        
         return jsonify({
             'success': True,
-            'task_id': task_id,
             **status_info
         }), 200
         
@@ -251,11 +325,92 @@ def get_scraping_status(task_id: str):
             'message': f'Internal server error: {str(e)}'
         }), 500
 
+def _sse_event(event: str, payload: Dict) -> str:
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _progress_payload(status_info: Dict) -> Dict:
+    return {
+        'task_id': status_info['task_id'],
+        'status': status_info['status'],
+        'progress': status_info['progress'],
+        'message': status_info['message'],
+        'current_power_type': status_info.get('current_power_type'),
+        'completed_power_types': status_info.get('completed_power_types', 0),
+        'total_power_types': status_info.get('total_power_types', 0)
+    }
+
+def _stream_task_events(task_id: str, status_info: Dict):
+    """Yield SSE events for a task until it reaches a terminal status"""
+    task_store = get_task_store()
+    started = time.monotonic()
+    last_progress = None
+    sent_results = {}
+    
+    yield f"retry: {STREAM_HEARTBEAT_SECONDS * 1000}\n\n"
+    
+    while True:
+        progress = _progress_payload(status_info)
+        if progress != last_progress:
+            yield _sse_event('progress', progress)
+            last_progress = progress
+        
+        # Push each per-power-type result once, as soon as it is recorded
+        for power_type, result in status_info.get('data', {}).items():
+            if sent_results.get(power_type) != result:
+                yield _sse_event('result', {'task_id': task_id, 'power_type': power_type, **result})
+                sent_results[power_type] = result
+        
+        if status_info['status'] in TERMINAL_STATUSES:
+            yield _sse_event('complete' if status_info['status'] == 'completed' else 'error', status_info)
+            return
+        
+        if time.monotonic() - started > STREAM_MAX_DURATION_SECONDS:
+            yield _sse_event('timeout', {'task_id': task_id, 'message': 'Stream closed, reconnect to continue'})
+            return
+        
+        latest = task_store.wait_for_change(task_id, status_info.get('updated_at', 0), STREAM_HEARTBEAT_SECONDS)
+        if latest is None:
+            yield _sse_event('error', {'task_id': task_id, 'message': 'Task expired or not found'})
+            return
+        
+        if latest.get('updated_at') == status_info.get('updated_at'):
+            # Comment line keeps proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+        status_info = latest
+
+@dynamic_scraper_bp.route('/status/<task_id>/stream', methods=['GET'])
+def stream_scraping_status(task_id: str):
+    """
+    GET endpoint streaming task progress as Server-Sent Events.
+    Emits 'progress' and 'result' events as they change, then a terminal
+    'complete' or 'error' event before closing.
+    """
+    status_info = get_task_store().get(task_id)
+    if not status_info:
+        return jsonify({
+            'success': False,
+            'message': 'Task not found'
+        }), 404
+    
+    return Response(
+        stream_with_context(_stream_task_events(task_id, status_info)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @dynamic_scraper_bp.route('/data/<country_name>/<power_type>', methods=['GET'])
 def get_country_data(country_name: str, power_type: str):
     """
-    GET endpoint to retrieve scraped data for a specific country and power type
+    GET endpoint to retrieve scraped data for a specific country and power type.
+    With Accept: application/x-ndjson, records are streamed from the cursor one per line.
+    Query params: fields (comma-separated record fields or a preset such as "compact")
     """
+    from models.scrapper import MilitaryDataPipeline, parse_fields
+    
     try:
         # Validate power type
         available_power_types = ['airpower', 'navalpower', 'droneforce', 'landpower']
@@ -265,16 +420,27 @@ def get_country_data(country_name: str, power_type: str):
                 'message': f'Invalid power type. Available types: {", ".join(available_power_types)}'
             }), 400
         
+        try:
+            fields = parse_fields(request.args.get('fields', ''))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
         pipeline = MilitaryDataPipeline()
-        data = pipeline.get_country_data(country_name.lower(), power_type.lower())
-        pipeline.cleanup()
+        if wants_ndjson():
+            try:
+                country_id = pipeline.db_manager.get_or_create_country(country_name.lower())
+                batches = pipeline.db_manager.iter_military_data(country_id, power_type.lower(), STREAM_BATCH_SIZE, fields)
+            except Exception:
+                pipeline.cleanup()
+                raise
+            # The connection stays open until the last batch is sent
+            return ndjson_response(batches, on_close=pipeline.cleanup)
         
-        # Convert ObjectId to string for JSON serialization
-        for item in data:
-            if '_id' in item:
-                item['_id'] = str(item['_id'])
-            if 'country_id' in item:
-                item['country_id'] = str(item['country_id'])
+        data = pipeline.get_country_data(country_name.lower(), power_type.lower(), fields)
+        pipeline.cleanup()
         
         return jsonify({
             'success': True,
@@ -296,6 +462,8 @@ def get_available_countries():
     """
     GET endpoint to retrieve all available countries in the database
     """
+    from models.scrapper import DatabaseManager
+    
     try:
         db_manager = DatabaseManager()
         countries_collection = db_manager.db['countries']
@@ -321,6 +489,8 @@ def health_check():
     """
     GET endpoint for health check
     """
+    from models.scrapper import DatabaseManager
+    
     try:
         # Test database connection
         db_manager = DatabaseManager()
@@ -1,10 +1,28 @@
-from flask import Blueprint, jsonify, request
-from pymongo import MongoClient
+from flask import Blueprint, jsonify, request, send_file
 from bson import ObjectId
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
 import logging
 
+from models.mongo import create_mongo_client
+from models.scrapper import GFP_COLLECTION, register_commit_listener, parse_fields, record_projection, select_fields
+from models.ranking_index import RankingIndex, metric_slug
+from models.history import SnapshotHistory, warpower_stream, gfp_stream
+from models.catalog import EquipmentCatalog
+from services.overview_scrapper import OverviewService
+from services.compare import CompareService
+from services.artifacts import ArtifactStore, ARTIFACT_RENDER_WORKERS
+from services.autocomplete import AutocompleteIndex, SUGGEST_FIELDS, MAX_SUGGESTIONS
+from services.analytics import EquipmentAnalytics, DIMENSIONS, AGGREGATIONS, EXACT_FILTERS, CONTAINS_FILTERS
+from models.sync import get_dataset, changes_since, committed_token, dataset_id, DATASETS_COLLECTION, CHANGE_TOKEN_COUNTER, COUNTERS_COLLECTION
+from routes.responses import wants_ndjson, wants_msgpack, ndjson_response, batched, dumps_bytes, STREAM_BATCH_SIZE
+
 # Load environment variables
 load_dotenv()
 
@@ -15,6 +33,25 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 military_bp = Blueprint('military', __name__)
 
+def power_type_payload(country_name: str, power_type: str, sync_token, data):
+    """Body of an unfiltered /<country>/<power_type> response"""
+    return {
+        'success': True,
+        'country': country_name.title(),
+        'power_type': power_type.title(),
+        'total_records': len(data),
+        'sync_token': sync_token,
+        'data': data
+    }
+
+def summary_payload(country_name: str, summary):
+    """Body of a /<country> response"""
+    return {
+        'success': True,
+        'country': country_name.title(),
+        'military_powers': summary
+    }
+
 class MilitaryDataService:
     """Service class for handling military data operations"""
     
@@ -23,8 +60,21 @@ class MilitaryDataService:
         if not self.mongo_uri:
             raise ValueError("MONGO_URI not found in environment variables")
         
-        self.client = MongoClient(self.mongo_uri)
+        self.client = create_mongo_client(self.mongo_uri)
         self.db = self.client['militaryDB']
+        self.rankings = RankingIndex(self.db)
+        self.history = SnapshotHistory(self.db)
+        self.overviews = OverviewService(self.db)
+        self.analytics = EquipmentAnalytics(self.db)
+        self.comparisons = CompareService(self.db)
+        self.autocomplete = AutocompleteIndex(self.db)
+        self.catalog = EquipmentCatalog(self.db)
+        # Artifacts outlive the catalog cache of the worker that renders them
+        self.fresh_catalog = EquipmentCatalog(self.db, cached=False)
+        self.artifacts = ArtifactStore()
+        self._render_executor = None
+        self._render_queued = set()
+        self._render_lock = threading.Lock()
     
     def get_country_id(self, country_name: str):
         """Get country ID by name"""
@@ -35,8 +85,32 @@ class MilitaryDataService:
             logger.error(f"Error getting country ID for {country_name}: {e}")
             return None
     
-    def get_military_power_data(self, country_name: str, power_type: str):
-        """Get military power data for a specific country and power type"""
+    @staticmethod
+    def clean_record(doc):
+        """Remove MongoDB-specific and bookkeeping fields from a record"""
+        doc.pop('_id', None)
+        doc.pop('country_id', None)
+        doc.pop('scraped_at', None)
+        doc.pop('last_updated', None)
+        doc.pop('change_token', None)
+        return doc
+    
+    def prepare_records(self, docs, fields=None, catalog=None):
+        """Clean records and join catalog fields; with fields, only the selected ones"""
+        return select_fields([self.clean_record(doc) for doc in docs], fields, catalog or self.catalog)
+    
+    @staticmethod
+    def power_type_query(country_id: str, search: str = ''):
+        """Records of one country, optionally those whose name, model or role contains search"""
+        query = {'country_id': country_id}
+        if search:
+            pattern = {'$regex': re.escape(search), '$options': 'i'}
+            query['$or'] = [{'name': pattern}, {'model': pattern}, {'role': pattern}]
+        return query
+    
+    def get_military_power_data(self, country_name: str, power_type: str, search: str = '', fields=None,
+                                fresh: bool = False):
+        """Get military power data for a specific country and power type (fresh: bypass the catalog cache)"""
         try:
             # Validate power type
             valid_power_types = ['airpower', 'navalpower', 'droneforce', 'landpower']
@@ -48,20 +122,12 @@ class MilitaryDataService:
             if not country_id:
                 return None, f"Country '{country_name}' not found"
             
-            # Get military data
+            # Get military data, only the selected fields when given
             collection = self.db[power_type.lower()]
-            cursor = collection.find({'country_id': country_id})
+            cursor = collection.find(self.power_type_query(country_id, search), record_projection(fields))
             
-            # Convert to list and clean up MongoDB-specific fields
-            data = []
-            for doc in cursor:
-                # Remove MongoDB-specific fields
-                doc.pop('_id', None)
-                doc.pop('country_id', None)
-                doc.pop('scraped_at', None)
-                doc.pop('last_updated', None)
-                
-                data.append(doc)
+            # Convert to list, clean up MongoDB-specific fields and join the shared catalog fields
+            data = self.prepare_records(cursor, fields, self.fresh_catalog if fresh else None)
             
             return data, None
             
@@ -69,6 +135,110 @@ class MilitaryDataService:
             logger.error(f"Error getting military data for {country_name}/{power_type}: {e}")
             return None, f"Database error: {str(e)}"
     
+    def stream_military_power_data(self, country_name: str, power_type: str, search: str = '',
+                                   offset: int = 0, limit=None, fields=None):
+        """
+        Cleaned, catalog-joined record batches straight from the cursor, for NDJSON
+        responses; search, offset and limit are applied by Mongo.
+        """
+        country_id, error = self.resolve_dataset(country_name, power_type)
+        if error:
+            return None, error
+        
+        cursor = self.db[power_type.lower()].find(self.power_type_query(country_id, search), record_projection(fields))
+        cursor = cursor.skip(offset).batch_size(STREAM_BATCH_SIZE)
+        if limit:
+            cursor = cursor.limit(limit)
+        
+        def batches():
+            for batch in batched(cursor):
+                yield self.prepare_records(batch, fields)
+        
+        return batches(), None
+    
+    def _resolve_batch_pairs(self, pairs):
+        """({country name: country_id}, {power_type: {country names}}, [errors]) for requested pairs"""
+        valid_power_types = ['airpower', 'navalpower', 'droneforce', 'landpower']
+        errors = []
+        
+        names = sorted({country for country, _ in pairs})
+        country_ids = {country['name']: str(country['_id'])
+                       for country in self.db['countries'].find({'name': {'$in': names}}, {'name': 1})}
+        
+        wanted = {}  # power_type -> set of country names
+        for country, power_type in pairs:
+            if power_type not in valid_power_types:
+                errors.append({'country': country, 'power_type': power_type,
+                               'error': f"Invalid power type. Valid types: {', '.join(valid_power_types)}"})
+            elif country not in country_ids:
+                errors.append({'country': country, 'power_type': power_type,
+                               'error': f"Country '{country}' not found"})
+            else:
+                wanted.setdefault(power_type, set()).add(country)
+        
+        return country_ids, wanted, errors
+    
+    def get_batch_data(self, pairs, fields=None):
+        """
+        Records for many (country_name, power_type) pairs with one query for the
+        countries, one for sync tokens, and one per power type collection.
+        Returns ({country: {power_type: {...}}}, [errors]).
+        """
+        country_ids, wanted, errors = self._resolve_batch_pairs(pairs)
+        
+        dataset_ids = [dataset_id(country_ids[country], power_type)
+                       for power_type, countries in wanted.items() for country in countries]
+        versions = {dataset['_id']: dataset.get('version') or None
+                    for dataset in self.db[DATASETS_COLLECTION].find({'_id': {'$in': dataset_ids}}, {'version': 1})}
+        
+        # country_id is needed to group records even when not selected
+        projection = record_projection(fields)
+        if projection:
+            projection['country_id'] = 1
+        
+        results = {}
+        for power_type, countries in wanted.items():
+            names_by_id = {country_ids[country]: country for country in countries}
+            grouped = {country: [] for country in countries}
+            for doc in self.db[power_type].find({'country_id': {'$in': list(names_by_id)}}, projection):
+                grouped[names_by_id[doc['country_id']]].append(self.clean_record(doc))
+            select_fields([doc for data in grouped.values() for doc in data], fields, self.catalog)
+            
+            for country, data in grouped.items():
+                results.setdefault(country, {})[power_type] = {
+                    'total_records': len(data),
+                    'sync_token': versions.get(dataset_id(country_ids[country], power_type)),
+                    'data': data
+                }
+        
+        return results, errors
+    
+    def stream_batch_data(self, pairs, fields=None):
+        """
+        Record batches for many pairs, each record tagged with its country and power_type,
+        followed by one {"country", "power_type", "error"} line per pair that could not be served.
+        """
+        country_ids, wanted, errors = self._resolve_batch_pairs(pairs)
+        
+        # country_id attributes records to countries even when not selected
+        projection = record_projection(fields)
+        if projection:
+            projection['country_id'] = 1
+        
+        for power_type, countries in wanted.items():
+            names_by_id = {country_ids[country]: country for country in countries}
+            cursor = self.db[power_type].find(
+                {'country_id': {'$in': list(names_by_id)}}, projection).batch_size(STREAM_BATCH_SIZE)
+            for batch in batched(cursor):
+                owners = [names_by_id[doc['country_id']] for doc in batch]
+                batch = self.prepare_records(batch, fields)
+                for doc, country in zip(batch, owners):
+                    doc['country'] = country
+                    doc['power_type'] = power_type
+                yield batch
+        if errors:
+            yield errors
+    
     def get_country_summary(self, country_name: str):
         """Get summary of all military powers for a country"""
         try:
@@ -118,12 +288,168 @@ class MilitaryDataService:
             logger.error(f"Error getting countries list: {e}")
             return None, f"Database error: {str(e)}"
     
+    def get_gfp_metrics(self, country_id: str):
+        """Get crawled Global Firepower metrics for a GFP country id"""
+        try:
+            doc = self.db[GFP_COLLECTION].find_one({'country_id': country_id.lower()}, {'_id': 0})
+            if not doc:
+                return None, f"No Global Firepower data for '{country_id}'"
+            return doc, None
+        except Exception as e:
+            logger.error(f"Error getting GFP metrics for {country_id}: {e}")
+            return None, f"Database error: {str(e)}"
+    
+    def resolve_dataset(self, country_name: str, power_type: str):
+        """Validate a power type and return the country ID"""
+        valid_power_types = ['airpower', 'navalpower', 'droneforce', 'landpower']
+        if power_type.lower() not in valid_power_types:
+            return None, f"Invalid power type. Valid types: {', '.join(valid_power_types)}"
+        
+        country_id = self.get_country_id(country_name)
+        if not country_id:
+            return None, f"Country '{country_name}' not found"
+        
+        return country_id, None
+    
+    def get_history_stream(self, country_name: str, power_type: str):
+        """Resolve the history stream of a country's power type"""
+        country_id, error = self.resolve_dataset(country_name, power_type)
+        if error:
+            return None, error
+        return warpower_stream(country_id, power_type), None
+    
+    def get_sync_token(self, country_name: str, power_type: str):
+        """
+        Change token of the latest write to a dataset, held back to the committed token while
+        lower tokens are still being written; None for data saved before change tokens
+        """
+        try:
+            country_id = self.get_country_id(country_name)
+            dataset = get_dataset(self.db, country_id, power_type) if country_id else None
+            if not dataset or not dataset.get('version'):
+                return None
+            return min(dataset['version'], committed_token(self.db)) or None
+        except Exception as e:
+            logger.error(f"Error getting sync token for {country_name}/{power_type}: {e}")
+            return None
+    
+    def get_military_changes(self, country_name: str, power_type: str, since: int):
+        """Records inserted, updated or deleted after a sync token"""
+        try:
+            country_id, error = self.resolve_dataset(country_name, power_type)
+            if error:
+                return None, error
+            
+            counter = self.db[COUNTERS_COLLECTION].find_one({'_id': CHANGE_TOKEN_COUNTER})
+            latest_token = counter['value'] if counter else 0
+            if since > latest_token:
+                # A token this server never issued (e.g. the database was rebuilt)
+                return {'resync_required': True, 'sync_token': latest_token}, None
+            
+            # Writes of tokens above the committed one may still be landing; they are sent next time
+            committed = committed_token(self.db)
+            upserts, deletes = changes_since(self.db, country_id, power_type, since, committed)
+            sync_token = max(since, committed)
+            
+            for doc in upserts:
+                doc.pop('_id', None)
+                doc.pop('country_id', None)
+                doc.pop('scraped_at', None)
+                doc.pop('last_updated', None)
+            self.catalog.hydrate(upserts)
+            
+            return {'resync_required': False, 'sync_token': sync_token, 'upserts': upserts, 'deletes': deletes}, None
+            
+        except Exception as e:
+            logger.error(f"Error getting military changes for {country_name}/{power_type}: {e}")
+            return None, f"Database error: {str(e)}"
+    
+    def get_summary_version(self, country_id: str) -> int:
+        """Latest version among a country's datasets; the summary changes only with them"""
+        ids = [dataset_id(country_id, power_type) for power_type in ['airpower', 'navalpower', 'droneforce', 'landpower']]
+        return max((dataset.get('version') or 0
+                    for dataset in self.db[DATASETS_COLLECTION].find({'_id': {'$in': ids}}, {'version': 1})), default=0)
+    
+    def render_power_type_artifact(self, country_name: str, power_type: str, sync_token) -> bool:
+        """Write the unfiltered response for one dataset version to the artifact store"""
+        data, error = self.get_military_power_data(country_name, power_type, fresh=True)
+        if error:
+            return False
+        body = dumps_bytes(power_type_payload(country_name, power_type, sync_token, data), sort_keys=True) + b'\n'
+        return self.artifacts.write(country_name.lower(), power_type.lower(), sync_token, body) is not None
+    
+    def render_summary_artifact(self, country_name: str, version) -> bool:
+        summary, error = self.get_country_summary(country_name)
+        if error:
+            return False
+        body = dumps_bytes(summary_payload(country_name, summary), sort_keys=True) + b'\n'
+        return self.artifacts.write(country_name.lower(), 'summary', version, body) is not None
+    
+    def render_artifacts(self, country_id: str, power_type: str):
+        """Render a dataset's current response and its country summary"""
+        if not self.artifacts.enabled:
+            return
+        try:
+            country = self.db['countries'].find_one({'_id': ObjectId(country_id)}, {'name': 1})
+            dataset = get_dataset(self.db, country_id, power_type)
+            if not country or not dataset or not dataset.get('version'):
+                return
+            self.render_power_type_artifact(country['name'], power_type, dataset['version'])
+            self.render_summary_artifact(country['name'], self.get_summary_version(country_id))
+        except Exception as e:
+            logger.error(f"Error rendering artifacts for {power_type}:{country_id}: {e}")
+    
+    def queue_artifacts(self, country_id: str, power_type: str) -> bool:
+        """
+        Render a dataset's artifacts on a background thread, unless a render of it is already
+        queued (that one reads the latest version when it starts)
+        """
+        if not self.artifacts.enabled:
+            return False
+        key = dataset_id(country_id, power_type)
+        with self._render_lock:
+            if key in self._render_queued:
+                return False
+            self._render_queued.add(key)
+            if self._render_executor is None:
+                self._render_executor = ThreadPoolExecutor(max_workers=ARTIFACT_RENDER_WORKERS,
+                                                           thread_name_prefix='artifact-render')
+        
+        def run():
+            with self._render_lock:
+                self._render_queued.discard(key)
+            self.render_artifacts(country_id, power_type)
+        
+        self._render_executor.submit(run)
+        return True
+    
     def close_connection(self):
         """Close database connection"""
         self.client.close()
 
-# Initialize service
-military_service = MilitaryDataService()
+# The service (and its Mongo client) is created on first use rather than at import,
+# so cold starts that never touch these routes do not pay for it
+_military_service = None
+_military_service_lock = threading.Lock()
+
+def get_military_service() -> MilitaryDataService:
+    global _military_service
+    if _military_service is None:
+        with _military_service_lock:
+            if _military_service is None:
+                service = MilitaryDataService()
+                service.autocomplete.warm()
+                _military_service = service
+    return _military_service
+
+military_service = LocalProxy(get_military_service)
+
+def _queue_artifacts(country_id: str, power_type: str, change_token):
+    """Registered at import so saves made before the first request are still pre-rendered"""
+    if change_token is not None:
+        get_military_service().queue_artifacts(country_id, power_type)
+
+register_commit_listener(_queue_artifacts)
 
 @military_bp.route('/', methods=['GET'])
 def get_available_countries():
@@ -151,10 +477,433 @@ def get_available_countries():
             'error': 'Internal server error'
         }), 500
 
+@military_bp.route('/gfp/<string:country_id>', methods=['GET'])
+def get_gfp_metrics(country_id):
+    """Get Global Firepower metrics for a country (GFP country id, e.g. united-states-of-america)"""
+    try:
+        doc, error = military_service.get_gfp_metrics(country_id)
+        
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'country_id': doc['country_id'],
+            'source_url': doc['source_url'],
+            'last_updated': doc['last_updated'].isoformat(),
+            'total_metrics': doc['metric_count'],
+            'metrics': doc['metrics']
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_gfp_metrics: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+def _history_response(stream, label):
+    """Version list, or the reconstructed snapshot for ?version=N / ?at=<ISO time>"""
+    version = request.args.get('version', type=int)
+    at = request.args.get('at', '').strip()
+    
+    if version is None and not at:
+        versions = military_service.history.versions(stream)
+        if not versions:
+            return jsonify({
+                'success': False,
+                'error': f"No history for {label}"
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'total_versions': len(versions),
+            'versions': versions
+        }), 200
+    
+    try:
+        at_time = datetime.fromisoformat(at) if at else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid "at" timestamp, expected ISO 8601'
+        }), 400
+    
+    found_version, state = military_service.history.snapshot_at(stream, at=at_time, seq=version)
+    if found_version is None:
+        return jsonify({
+            'success': False,
+            'error': f"No history for {label} at that point"
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'version': found_version,
+        'total_records': len(state),
+        'data': list(state.values())
+    }), 200
+
+@military_bp.route('/gfp/<string:country_id>/history', methods=['GET'])
+def get_gfp_history(country_id):
+    """GFP metric versions, a past snapshot (?version / ?at), or a metric time series (?metric=)"""
+    try:
+        stream = gfp_stream(country_id.lower())
+        metric = request.args.get('metric', '').strip()
+        
+        if not metric:
+            return _history_response(stream, f"'{country_id}'")
+        
+        slug = metric_slug(metric)
+        series = military_service.history.field_series(stream, 'numeric_value', lambda key, record: key == slug)
+        if not series:
+            return jsonify({
+                'success': False,
+                'error': f"No '{slug}' history for '{country_id}'"
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'country_id': country_id.lower(),
+            'metric': slug,
+            'series': series[slug]
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_gfp_history: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+MAX_BATCH_PAIRS = 200
+
+@military_bp.route('/batch', methods=['GET', 'POST'])
+def get_batch_data():
+    """
+    Records for many countries and power types in one round trip.
+    GET:  ?countries=india,russia&power_types=airpower,navalpower (every combination)
+    POST: {"requests": [{"country": "india", "power_type": "airpower"}, ...]}
+    Either method takes ?fields= to select record fields.
+    """
+    try:
+        fields, error_response = _requested_fields()
+        if error_response:
+            return error_response
+        
+        if request.method == 'POST':
+            payload = request.get_json(silent=True) or {}
+            items = payload.get('requests')
+            if not isinstance(items, list) or not all(
+                    isinstance(item, dict) and isinstance(item.get('country'), str) and isinstance(item.get('power_type'), str)
+                    for item in items):
+                return jsonify({
+                    'success': False,
+                    'error': '"requests" must be a list of {"country", "power_type"} objects'
+                }), 400
+            pairs = [(item['country'].strip().lower(), item['power_type'].strip().lower()) for item in items]
+        else:
+            countries = [c.strip().lower() for c in request.args.get('countries', '').split(',') if c.strip()]
+            power_types = [p.strip().lower() for p in request.args.get('power_types', 'airpower,navalpower,droneforce,landpower').split(',') if p.strip()]
+            if not countries:
+                return jsonify({
+                    'success': False,
+                    'error': 'Query parameter "countries" is required'
+                }), 400
+            pairs = [(country, power_type) for country in countries for power_type in power_types]
+        
+        # Repeated pairs are served once
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return jsonify({
+                'success': False,
+                'error': 'No (country, power_type) pairs requested'
+            }), 400
+        if len(pairs) > MAX_BATCH_PAIRS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_BATCH_PAIRS} (country, power_type) pairs per batch'
+            }), 400
+        
+        if wants_ndjson():
+            return ndjson_response(military_service.stream_batch_data(pairs, fields))
+        
+        results, errors = military_service.get_batch_data(pairs, fields)
+        
+        return jsonify({
+            'success': True,
+            'total_requests': len(pairs),
+            'total_records': sum(entry['total_records'] for country in results.values() for entry in country.values()),
+            'results': results,
+            'errors': errors
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_batch_data: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@military_bp.route('/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Cross-country aggregates over all equipment records, e.g.
+    ?group_by=country&agg=sum&power_type=airpower&role=fighter&top=10
+    ?group_by=service,role&agg=count
+    Filters: country, power_type (comma-separated, exact); service, name, model, role, assessment (substring).
+    """
+    try:
+        group_by = [d.strip().lower() for d in request.args.get('group_by', '').split(',') if d.strip()]
+        agg = request.args.get('agg', 'sum').strip().lower()
+        top = request.args.get('top', type=int)
+        
+        invalid = [d for d in group_by if d not in DIMENSIONS]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid group_by: {', '.join(invalid)}. Valid dimensions: {', '.join(DIMENSIONS)}"
+            }), 400
+        if agg not in AGGREGATIONS:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid agg. Valid aggregations: {', '.join(AGGREGATIONS)}"
+            }), 400
+        
+        filters = {name: request.args[name] for name in EXACT_FILTERS + CONTAINS_FILTERS if request.args.get(name, '').strip()}
+        
+        started = time.perf_counter()
+        result = military_service.analytics.query(group_by, agg, filters, top)
+        
+        return jsonify({
+            'success': True,
+            'group_by': group_by,
+            'agg': agg,
+            'measure': 'records' if agg == 'count' else 'units',
+            'filters': filters,
+            'total_groups': result['total_groups'],
+            'matched_records': result['matched_records'],
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'rows': result['rows']
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_analytics: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+MAX_COMPARE_COUNTRIES = 10
+
+@military_bp.route('/compare', methods=['GET'])
+def compare_countries():
+    """
+    Compare countries server-side: unit totals, counts by role and assessment,
+    and models only one of the countries fields.
+    ?countries=india,russia,china[&power_type=airpower,navalpower] (default: all power types)
+    """
+    try:
+        valid_power_types = ['airpower', 'navalpower', 'droneforce', 'landpower']
+        countries = list(dict.fromkeys(c.strip().lower() for c in request.args.get('countries', '').split(',') if c.strip()))
+        power_types = [p.strip().lower() for p in request.args.get('power_type', '').split(',') if p.strip()] or valid_power_types
+        
+        if not 2 <= len(countries) <= MAX_COMPARE_COUNTRIES:
+            return jsonify({
+                'success': False,
+                'error': f'Query parameter "countries" must list 2 to {MAX_COMPARE_COUNTRIES} countries'
+            }), 400
+        
+        invalid = [p for p in power_types if p not in valid_power_types]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid power type. Valid types: {', '.join(valid_power_types)}"
+            }), 400
+        
+        country_ids = {country['name']: str(country['_id'])
+                       for country in military_service.db['countries'].find({'name': {'$in': countries}}, {'name': 1})}
+        missing = [c for c in countries if c not in country_ids]
+        if missing:
+            return jsonify({
+                'success': False,
+                'error': f"Countries not found: {', '.join(missing)}"
+            }), 404
+        
+        comparison, cached = military_service.comparisons.compare(country_ids, list(dict.fromkeys(power_types)))
+        
+        return jsonify({
+            'success': True,
+            'countries': countries,
+            'power_types': list(dict.fromkeys(power_types)),
+            'cached': cached,
+            'comparison': comparison
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in compare_countries: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@military_bp.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    """Typeahead suggestions over equipment names, models and roles, ranked by units"""
+    try:
+        prefix = request.args.get('prefix', '').strip()
+        limit = request.args.get('limit', default=10, type=int)
+        kinds = [k.strip().lower() for k in request.args.get('kind', '').split(',') if k.strip()]
+        
+        if not prefix:
+            return jsonify({
+                'success': False,
+                'error': 'Query parameter "prefix" is required'
+            }), 400
+        
+        invalid = [k for k in kinds if k not in SUGGEST_FIELDS]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid kind. Valid kinds: {', '.join(SUGGEST_FIELDS)}"
+            }), 400
+        
+        started = time.perf_counter()
+        suggestions = military_service.autocomplete.suggest(prefix, max(1, min(limit, MAX_SUGGESTIONS)), kinds)
+        
+        return jsonify({
+            'success': True,
+            'prefix': prefix,
+            'total_suggestions': len(suggestions),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+            'suggestions': suggestions
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in autocomplete: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@military_bp.route('/rankings', methods=['GET'])
+def get_ranking_metrics():
+    """List metrics that have a ranking"""
+    try:
+        metrics = military_service.rankings.metrics()
+        return jsonify({
+            'success': True,
+            'total_metrics': len(metrics),
+            'metrics': metrics
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_ranking_metrics: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@military_bp.route('/rankings/<string:metric>', methods=['GET'])
+def get_metric_ranking(metric):
+    """Top countries for a metric, or one country's rank with ?country=<GFP country id>"""
+    try:
+        slug = metric_slug(metric)
+        country_id = request.args.get('country', '').strip().lower()
+        
+        if country_id:
+            entry = military_service.rankings.rank_of(slug, country_id)
+            if not entry:
+                return jsonify({
+                    'success': False,
+                    'error': f"No '{slug}' ranking for '{country_id}'"
+                }), 404
+            
+            return jsonify({
+                'success': True,
+                'metric': slug,
+                'ranking': entry
+            }), 200
+        
+        limit = min(request.args.get('limit', default=20, type=int), 200)
+        offset = request.args.get('offset', default=0, type=int)
+        rows, total = military_service.rankings.top(slug, limit, offset)
+        
+        if not total:
+            return jsonify({
+                'success': False,
+                'error': f"No ranking for metric '{slug}'"
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'metric': slug,
+            'label': rows[0]['label'] if rows else None,
+            'total_countries': total,
+            'rankings': rows,
+            'pagination': {
+                'limit': limit,
+                'offset': offset,
+                'has_more': offset + limit < total,
+                'next_offset': offset + limit if offset + limit < total else None
+            }
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_metric_ranking: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+def _requested_fields():
+    """(fields, None) from ?fields=, or (None, 400 response) when it names unknown fields"""
+    try:
+        return parse_fields(request.args.get('fields', '')), None
+    except ValueError as e:
+        return None, (jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400)
+
+def _artifact_response(country_name: str, name: str, version, render):
+    """
+    Serve a pre-rendered response file for this dataset version (rendering it first
+    if missing), or None when the request must go through Mongo and the serializer.
+    """
+    store = military_service.artifacts
+    if not store.enabled or not version or wants_msgpack():
+        return None
+    
+    gzip_ok = bool(request.accept_encodings['gzip'])
+    path, encoding = store.lookup(country_name.lower(), name, version, gzip_ok)
+    if path is None and render():
+        path, encoding = store.lookup(country_name.lower(), name, version, gzip_ok)
+    if path is None:
+        return None
+    
+    response = send_file(path, mimetype='application/json', conditional=True, max_age=0)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
 @military_bp.route('/<string:country_name>', methods=['GET'])
 def get_country_summary(country_name):
     """Get summary of all military powers for a specific country"""
     try:
+        # Summary endpoints echo the requested name, so only the canonical spelling is pre-rendered
+        if country_name == country_name.lower():
+            country_id = military_service.get_country_id(country_name)
+            if country_id:
+                version = military_service.get_summary_version(country_id)
+                response = _artifact_response(country_name, 'summary', version,
+                                              lambda: military_service.render_summary_artifact(country_name, version))
+                if response is not None:
+                    return response
+        
         summary, error = military_service.get_country_summary(country_name)
         
         if error:
@@ -163,29 +912,128 @@ def get_country_summary(country_name):
                 'error': error
             }), 404
         
+        return jsonify(summary_payload(country_name, summary)), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_country_summary: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@military_bp.route('/<string:country_name>/overview', methods=['GET'])
+def get_country_overview(country_name):
+    """Homepage section overview for a country, served from the database cache"""
+    try:
+        if not military_service.get_country_id(country_name):
+            return jsonify({
+                'success': False,
+                'error': f"Country '{country_name}' not found"
+            }), 404
+        
+        overview, stale = military_service.overviews.get_overview(country_name)
+        
+        if overview is None:
+            return jsonify({
+                'success': True,
+                'message': 'Overview is being fetched, retry shortly',
+                'country': country_name.title()
+            }), 202
+        
         return jsonify({
             'success': True,
             'country': country_name.title(),
-            'military_powers': summary
+            'fetched_at': overview['fetched_at'].isoformat(),
+            'stale': stale,
+            'total_sections': len(overview['sections']),
+            'sections': overview['sections']
         }), 200
         
     except Exception as e:
-        logger.error(f"Error in get_country_summary: {e}")
+        logger.error(f"Error in get_country_overview: {e}")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
         }), 500
 
+def _military_power_changes(country_name, power_type, since):
+    """Delta-sync response for get_military_power_data"""
+    try:
+        since_token = int(since)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Parameter "since" must be a sync_token from a previous response'
+        }), 400
+    
+    changes, error = military_service.get_military_changes(country_name, power_type, since_token)
+    
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 404
+    
+    if changes['resync_required']:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown sync token, fetch the full dataset again',
+            'resync_required': True
+        }), 410
+    
+    return jsonify({
+        'success': True,
+        'country': country_name.title(),
+        'power_type': power_type.title(),
+        'since': since_token,
+        'sync_token': changes['sync_token'],
+        'total_changes': len(changes['upserts']) + len(changes['deletes']),
+        'upserts': changes['upserts'],
+        'deletes': changes['deletes']
+    }), 200
+
 @military_bp.route('/<string:country_name>/<string:power_type>', methods=['GET'])
 def get_military_power_data(country_name, power_type):
-    """Get military power data for a specific country and power type"""
+    """
+    Get military power data for a specific country and power type.
+    With ?since=<sync_token>, return only records changed after that token plus
+    tombstones (record_key) for deleted ones; apply both in change_token order.
+    ?fields=name,units (or a preset such as ?fields=compact) returns only those record fields.
+    """
     try:
+        since = request.args.get('since', '').strip()
+        if since:
+            return _military_power_changes(country_name, power_type, since)
+        
         # Get query parameters for filtering/pagination
         limit = request.args.get('limit', type=int)
         offset = request.args.get('offset', default=0, type=int)
         search = request.args.get('search', '').strip()
+        fields, error_response = _requested_fields()
+        if error_response:
+            return error_response
         
-        data, error = military_service.get_military_power_data(country_name, power_type)
+        # Read the token first so that writes racing this request are re-sent on the next sync
+        sync_token = military_service.get_sync_token(country_name, power_type)
+        
+        if wants_ndjson():
+            batches, error = military_service.stream_military_power_data(country_name, power_type, search, offset, limit, fields)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': error
+                }), 404
+            return ndjson_response(batches, headers={'X-Sync-Token': str(sync_token or '')})
+        
+        # Full inventories are served from files rendered once per dataset version
+        if not (search or limit or offset or fields):
+            response = _artifact_response(country_name, power_type.lower(), sync_token,
+                                          lambda: military_service.render_power_type_artifact(country_name, power_type, sync_token))
+            if response is not None:
+                return response
+        
+        # search and fields are applied by Mongo
+        data, error = military_service.get_military_power_data(country_name, power_type, search, fields)
         
         if error:
             return jsonify({
@@ -193,17 +1041,6 @@ def get_military_power_data(country_name, power_type):
                 'error': error
             }), 404
         
-        # Apply filtering if search parameter is provided
-        if search:
-            filtered_data = []
-            search_lower = search.lower()
-            for item in data:
-                if (search_lower in item.get('name', '').lower() or 
-                    search_lower in item.get('model', '').lower() or 
-                    search_lower in item.get('role', '').lower()):
-                    filtered_data.append(item)
-            data = filtered_data
-        
         # Apply pagination if limit is provided
         total_records = len(data)
         if limit:
@@ -215,6 +1052,7 @@ def get_military_power_data(country_name, power_type):
             'country': country_name.title(),
             'power_type': power_type.title(),
             'total_records': total_records,
+            'sync_token': sync_token,
             'data': data
         }
         
@@ -236,9 +1074,69 @@ def get_military_power_data(country_name, power_type):
             'error': 'Internal server error'
         }), 500
 
+@military_bp.route('/<string:country_name>/<string:power_type>/history', methods=['GET'])
+def get_military_power_history(country_name, power_type):
+    """Scrape versions, or a past snapshot with ?version=N or ?at=<ISO time>"""
+    try:
+        stream, error = military_service.get_history_stream(country_name, power_type)
+        
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 404
+        
+        return _history_response(stream, f"{country_name}/{power_type}")
+        
+    except Exception as e:
+        logger.error(f"Error in get_military_power_history: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@military_bp.route('/<string:country_name>/<string:power_type>/history/units', methods=['GET'])
+def get_unit_history(country_name, power_type):
+    """Units over time for items whose name or model contains ?item="""
+    try:
+        item = request.args.get('item', '').strip().lower()
+        if not item:
+            return jsonify({
+                'success': False,
+                'error': 'Query parameter "item" is required'
+            }), 400
+        
+        stream, error = military_service.get_history_stream(country_name, power_type)
+        
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 404
+        
+        def matches(key, record):
+            return item in str(record.get('name', '')).lower() or item in str(record.get('model', '')).lower()
+        
+        series = military_service.history.field_series(stream, 'units', matches)
+        
+        return jsonify({
+            'success': True,
+            'country': country_name.title(),
+            'power_type': power_type.title(),
+            'total_items': len(series),
+            'items': [{'key': key, 'series': points} for key, points in series.items()]
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_unit_history: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
 @military_bp.route('/search', methods=['GET'])
 def search_military_data():
-    """Search across all military data"""
+    """Search across all military data; ?fields= selects record fields"""
     try:
         query = request.args.get('q', '').strip()
         country_filter = request.args.get('country', '').strip()
@@ -251,6 +1149,14 @@ def search_military_data():
                 'error': 'Search query parameter "q" is required'
             }), 400
         
+        fields, error_response = _requested_fields()
+        if error_response:
+            return error_response
+        # The endpoint link needs the country even when it is not selected
+        projection = record_projection(fields)
+        if projection:
+            projection['country'] = 1
+        
         results = []
         power_types = ['airpower', 'navalpower', 'droneforce', 'landpower']
         
@@ -264,6 +1170,10 @@ def search_military_data():
                     'error': f'Invalid power_type. Valid types: {", ".join(power_types)}'
                 }), 400
         
+        # Descriptions live in the equipment catalog, shared by every country fielding the model
+        described = [entry['_id'] for entry in military_service.catalog.collection.find(
+            {'description': {'$regex': query, '$options': 'i'}}, {'_id': 1})]
+        
         # Search across power types
         for power_type in power_types:
             collection = military_service.db[power_type]
@@ -274,7 +1184,8 @@ def search_military_data():
                     {'name': {'$regex': query, '$options': 'i'}},
                     {'model': {'$regex': query, '$options': 'i'}},
                     {'role': {'$regex': query, '$options': 'i'}},
-                    {'description': {'$regex': query, '$options': 'i'}}
+                    {'description': {'$regex': query, '$options': 'i'}},
+                    {'catalog_id': {'$in': described}}
                 ]
             }
             
@@ -285,20 +1196,18 @@ def search_military_data():
                     search_filter['country_id'] = country_id
             
             # Execute search
-            cursor = collection.find(search_filter).limit(limit)
+            cursor = collection.find(search_filter, projection).limit(limit)
             
             for doc in cursor:
-                # Clean up document
-                doc.pop('_id', None)
-                doc.pop('country_id', None)
-                doc.pop('scraped_at', None)
-                doc.pop('last_updated', None)
-                
                 # Add metadata
                 doc['power_type'] = power_type
                 doc['endpoint'] = f"/{doc.get('country', 'unknown')}/{power_type}"
+                if fields and 'country' not in fields:
+                    doc.pop('country', None)
                 
                 results.append(doc)
+        # Clean up documents and join catalog fields
+        military_service.prepare_records(results, fields)
         
         return jsonify({
             'success': True,
@@ -1,6 +1,5 @@
 from flask import Blueprint, jsonify
 import os
-import requests
 from datetime import datetime, timedelta
 
 # Create a Blueprint for news routes
@@ -12,6 +11,8 @@ def get_latest_news():
     Fetch 5 latest military news across the world
     using GNews API
     """
+    from models.http_transport import http_get
+    
     try:
         # Get API key from environment variables
         api_key = os.getenv('GNEWS_API_KEY')
@@ -38,7 +39,7 @@ def get_latest_news():
         }
         
         # Make the request to GNews API
-        response = requests.get(url, params=params)
+        response = http_get(url, params=params)
         
         # Check if the request was successful
         if response.status_code == 200:
@@ -0,0 +1,131 @@
+import json
+import os
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from flask import Response, has_request_context, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+MSGPACK_MIMETYPE = 'application/msgpack'
+# Documents pulled from the cursor, enriched and written per chunk; bounds memory for any result size
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '500'))
+
+
+def encode_default(value):
+    """Values the encoders do not handle natively; dates keep Flask's HTTP-date format"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, date):
+        return http_date(value)
+    if type(value).__module__ == 'numpy':
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_bytes(obj, sort_keys: bool = False, indent: bool = False) -> bytes:
+        options = _ORJSON_OPTIONS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=encode_default, option=options)
+else:
+    def dumps_bytes(obj, sort_keys: bool = False, indent: bool = False) -> bytes:
+        return json.dumps(obj, default=encode_default, sort_keys=sort_keys, indent=2 if indent else None,
+                          separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def _accepted(mimetypes: List[str]) -> str:
+    return request.accept_mimetypes.best_match(mimetypes, default=JSON_MIMETYPE)
+
+
+def wants_ndjson() -> bool:
+    """True when the client prefers newline-delimited JSON over a single JSON document"""
+    return _accepted([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def wants_msgpack() -> bool:
+    """True when the client prefers MessagePack and it is installed"""
+    return MSGPACK_AVAILABLE and _accepted([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    jsonify backed by orjson (stdlib json when it is missing), with ObjectId, datetime and
+    numpy values encoded in the serializer itself. Requests that prefer
+    Accept: application/msgpack get the same payload as MessagePack.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj, kwargs.get('sort_keys', self.sort_keys), bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if ORJSON_AVAILABLE and not kwargs else super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        negotiable = has_request_context()
+        if negotiable and wants_msgpack():
+            body, mimetype = msgpack.packb(obj, default=encode_default, datetime=False), MSGPACK_MIMETYPE
+        else:
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            body, mimetype = dumps_bytes(obj, self.sort_keys, indent) + b'\n', self.mimetype
+
+        response = self._app.response_class(body, mimetype=mimetype)
+        if negotiable and MSGPACK_AVAILABLE:
+            response.vary.add('Accept')
+        return response
+
+
+def batched(documents: Iterable[Dict], size: int = STREAM_BATCH_SIZE) -> Iterable[List[Dict]]:
+    """Group an iterable (typically a Mongo cursor) into lists of at most size documents"""
+    batch = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _ndjson_lines(batches: Iterable[List[Dict]], on_close: Optional[Callable[[], None]]):
+    try:
+        for batch in batches:
+            yield b''.join(dumps_bytes(doc) + b'\n' for doc in batch)
+    finally:
+        if on_close:
+            on_close()
+
+
+def ndjson_response(batches: Iterable[List[Dict]], headers: Optional[Dict] = None,
+                    on_close: Optional[Callable[[], None]] = None) -> Response:
+    """
+    Stream documents as one JSON object per line. Batches are produced lazily (e.g. from
+    batched(cursor)) and each is written before the next is read, so only one batch is
+    held in memory; on_close runs once the stream finishes or the client disconnects.
+    """
+    return Response(
+        stream_with_context(_ndjson_lines(batches, on_close)),
+        mimetype=NDJSON_MIMETYPE,
+        headers={'X-Accel-Buffering': 'no', **(headers or {})}
+    )
@@ -0,0 +1,80 @@
+from flask import Blueprint, request, jsonify
+import hmac
+import logging
+import os
+
+from services.refresh_scheduler import refresh_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Start/stop are admin operations; they stay disabled unless a token is configured
+SCHEDULER_ADMIN_TOKEN = os.getenv('SCHEDULER_ADMIN_TOKEN', '')
+
+# Create Blueprint
+scheduler_bp = Blueprint('scheduler', __name__)
+
+@scheduler_bp.route('/', methods=['GET'])
+def get_schedule():
+    """
+    GET endpoint returning scheduler state and the refresh schedule, stalest first
+    Query params: limit (default 50)
+    """
+    try:
+        limit = request.args.get('limit', default=50, type=int)
+        schedule = refresh_scheduler.build_schedule()
+        
+        return jsonify({
+            'success': True,
+            'scheduler': refresh_scheduler.describe(),
+            'total_targets': len(schedule),
+            'schedule': schedule[:limit]
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_schedule: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Internal server error: {str(e)}'
+        }), 500
+
+def check_admin_token():
+    """Return an error response unless the request carries the scheduler admin token, else None"""
+    if not SCHEDULER_ADMIN_TOKEN:
+        return jsonify({
+            'success': False,
+            'message': 'Scheduler control is disabled; set SCHEDULER_ADMIN_TOKEN to enable it'
+        }), 403
+    header = request.headers.get('Authorization', '')
+    token = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+    if not hmac.compare_digest(token.encode(), SCHEDULER_ADMIN_TOKEN.encode()):
+        return jsonify({
+            'success': False,
+            'message': 'Missing or invalid admin token'
+        }), 401
+    return None
+
+@scheduler_bp.route('/start', methods=['POST'])
+def start_scheduler():
+    """POST endpoint to start the background refresh scheduler (Authorization: Bearer <SCHEDULER_ADMIN_TOKEN>)"""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    started = refresh_scheduler.start()
+    return jsonify({
+        'success': True,
+        'message': 'Scheduler started' if started else 'Scheduler already running',
+        'scheduler': refresh_scheduler.describe()
+    }), 200
+
+@scheduler_bp.route('/stop', methods=['POST'])
+def stop_scheduler():
+    """POST endpoint to stop the background refresh scheduler (Authorization: Bearer <SCHEDULER_ADMIN_TOKEN>)"""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    refresh_scheduler.stop()
+    return jsonify({
+        'success': True,
+        'message': 'Scheduler stopping',
+        'scheduler': refresh_scheduler.describe()
+    }), 200
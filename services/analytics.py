@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from models.scrapper import register_commit_listener
+from models.sync import dataset_id, COUNTERS_COLLECTION, CHANGE_TOKEN_COUNTER, DATASETS_COLLECTION
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+POWER_TYPES = ['airpower', 'navalpower', 'droneforce', 'landpower']
+TEXT_COLUMNS = ['country', 'power_type', 'service', 'name', 'model', 'role', 'assessment']
+# Columns a query can group by; 'units' is the measure
+DIMENSIONS = tuple(TEXT_COLUMNS)
+AGGREGATIONS = ('sum', 'count', 'mean', 'min', 'max')
+# Filters matched exactly (comma-separated lists) and by substring
+EXACT_FILTERS = ('country', 'power_type')
+CONTAINS_FILTERS = ('service', 'name', 'model', 'role', 'assessment')
+
+
+def _category_mask(column: pd.Series, match) -> np.ndarray:
+    """Evaluate match over the distinct categories only, then select rows by category"""
+    categories = column.cat.categories
+    hits = categories[match(categories.str.lower())]
+    return column.isin(hits).to_numpy()
+
+
+class EquipmentAnalytics:
+    """
+    Columnar copy of every equipment record (one pandas DataFrame, text columns as
+    categoricals) for vectorized group-by queries.
+
+    Saves in this process mark their dataset for reload through a commit listener;
+    writes from other processes are picked up by comparing the global change token.
+    Either way only the changed (country, power_type) datasets are reloaded.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.frame = None
+        self.token = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        register_commit_listener(self.invalidate)
+
+    def invalidate(self, country_id: str, power_type: str, change_token: Optional[int]):
+        if change_token is not None:
+            with self._lock:
+                self._pending.add(dataset_id(country_id, power_type))
+
+    def _current_token(self) -> int:
+        counter = self.db[COUNTERS_COLLECTION].find_one({'_id': CHANGE_TOKEN_COUNTER})
+        return counter['value'] if counter else 0
+
+    def _load(self, datasets: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Records of the given datasets (power_type:country_id ids), or of everything"""
+        import pandas as pd
+        columns = {column: [] for column in TEXT_COLUMNS + ['country_id', 'units']}
+        for power_type in POWER_TYPES:
+            query = {}
+            if datasets is not None:
+                country_ids = [d.split(':', 1)[1] for d in datasets if d.startswith(f"{power_type}:")]
+                if not country_ids:
+                    continue
+                query = {'country_id': {'$in': country_ids}}
+
+            projection = {field: 1 for field in TEXT_COLUMNS + ['country_id', 'units'] if field != 'power_type'}
+            projection['_id'] = 0
+            for doc in self.db[power_type].find(query, projection):
+                for column in TEXT_COLUMNS:
+                    columns[column].append(power_type if column == 'power_type' else str(doc.get(column, 'Unknown')))
+                columns['country_id'].append(doc.get('country_id'))
+                columns['units'].append(doc.get('units') or 0)
+
+        frame = pd.DataFrame(columns)
+        frame['units'] = pd.to_numeric(frame['units'], errors='coerce').fillna(0).astype('int64')
+        frame['dataset'] = frame['power_type'] + ':' + frame['country_id']
+        return frame
+
+    @staticmethod
+    def _categorize(frame: pd.DataFrame) -> pd.DataFrame:
+        for column in TEXT_COLUMNS + ['country_id', 'dataset']:
+            frame[column] = frame[column].astype('category')
+        return frame
+
+    def snapshot(self) -> pd.DataFrame:
+        """The current frame, after reloading any datasets changed since the last call"""
+        import pandas as pd
+        with self._lock:
+            # Read the token before the data so a concurrent write is picked up next time
+            token = self._current_token()
+            if self.frame is None:
+                self.frame = self._categorize(self._load())
+                self._pending.clear()
+                self.token = token
+                logger.info(f"Analytics frame loaded: {len(self.frame)} records")
+                return self.frame
+
+            if token > self.token:
+                changed = self.db[DATASETS_COLLECTION].find({'version': {'$gt': self.token}}, {'_id': 1})
+                self._pending.update(dataset['_id'] for dataset in changed)
+
+            if self._pending:
+                pending = sorted(self._pending)
+                kept = self.frame[~self.frame['dataset'].isin(pending).to_numpy()]
+                fresh = self._load(pending)
+                self.frame = self._categorize(pd.concat(
+                    [kept.astype({c: 'object' for c in TEXT_COLUMNS + ['country_id', 'dataset']}), fresh],
+                    ignore_index=True))
+                self._pending.clear()
+                logger.info(f"Analytics frame refreshed {len(pending)} datasets")
+            self.token = token
+            return self.frame
+
+    def query(self, group_by: List[str], agg: str = 'sum', filters: Optional[Dict[str, str]] = None,
+              top: Optional[int] = None) -> Dict:
+        """
+        Aggregate units (or count records) over the filtered frame, grouped by
+        the given dimensions and sorted by value, largest first.
+        """
+        import numpy as np
+        
+        frame = self.snapshot()
+        mask = np.ones(len(frame), dtype=bool)
+        for name, value in (filters or {}).items():
+            if name in EXACT_FILTERS:
+                wanted = [v.strip().lower() for v in value.split(',') if v.strip()]
+                mask &= _category_mask(frame[name], lambda categories: categories.isin(wanted))
+            elif name in CONTAINS_FILTERS:
+                text = value.strip().lower()
+                mask &= _category_mask(frame[name], lambda categories: categories.str.contains(text, regex=False))
+
+        selected = frame[mask]
+        if not group_by:
+            if agg == 'count':
+                value = len(selected)
+            elif selected.empty:
+                value = None
+            else:
+                value = getattr(selected['units'], agg)().item()
+                value = round(value, 2) if agg == 'mean' else value
+            return {'total_groups': 1, 'matched_records': len(selected), 'rows': [{'value': value}]}
+
+        grouped = selected.groupby(group_by, observed=True)['units']
+        result = grouped.size() if agg == 'count' else getattr(grouped, agg)()
+        if agg == 'mean':
+            result = result.round(2)
+        result = result.sort_values(ascending=False, kind='stable')
+        total_groups = len(result)
+        if top:
+            result = result.head(top)
+
+        return {
+            'total_groups': total_groups,
+            'matched_records': len(selected),
+            'rows': result.reset_index(name='value').to_dict('records')
+        }
@@ -0,0 +1,92 @@
+import gzip
+import logging
+import os
+import re
+import tempfile
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_ENABLED = os.getenv('ARTIFACTS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Local disk (e.g. /tmp on serverless hosts); artifacts are a cache and can be rebuilt at any time
+ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', os.path.join(tempfile.gettempdir(), 'military-artifacts'))
+# Also write a .gz next to every artifact so compressed reads cost no CPU
+ARTIFACT_PRECOMPRESS = os.getenv('ARTIFACT_PRECOMPRESS', 'true').lower() in ('1', 'true', 'yes')
+# Background threads that re-render artifacts after saves; saves only queue the work
+ARTIFACT_RENDER_WORKERS = int(os.getenv('ARTIFACT_RENDER_WORKERS', '1'))
+
+SAFE_NAME = re.compile(r'^[a-z0-9_-]+$')
+
+
+class ArtifactStore:
+    """
+    Rendered API responses on local disk, one file per (country, name, version), where
+    name is a power type or 'summary' and version is the dataset version the body was
+    rendered from. Writes are atomic and replace older versions of the same artifact.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR, enabled: bool = ARTIFACTS_ENABLED,
+                 precompress: bool = ARTIFACT_PRECOMPRESS):
+        self.root = root
+        self.enabled = enabled
+        self.precompress = precompress
+
+    def path(self, country: str, name: str, version: int) -> Optional[str]:
+        if not (SAFE_NAME.match(country) and SAFE_NAME.match(name)):
+            return None
+        return os.path.join(self.root, country, f"{name}.v{version}.json")
+
+    def lookup(self, country: str, name: str, version: int, gzip_ok: bool = False) -> Tuple[Optional[str], Optional[str]]:
+        """(path, content encoding) of the artifact for this version, or (None, None)"""
+        if not self.enabled or not version:
+            return None, None
+        path = self.path(country, name, version)
+        if path is None:
+            return None, None
+        if gzip_ok and os.path.exists(path + '.gz'):
+            return path + '.gz', 'gzip'
+        if os.path.exists(path):
+            return path, None
+        return None, None
+
+    @staticmethod
+    def _write_atomic(path: str, body: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def write(self, country: str, name: str, version: int, body: bytes) -> Optional[str]:
+        """Store a rendered body; returns its path (None when disabled or not storable)"""
+        if not self.enabled or not version:
+            return None
+        path = self.path(country, name, version)
+        if path is None:
+            return None
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_atomic(path, body)
+            if self.precompress:
+                self._write_atomic(path + '.gz', gzip.compress(body, mtime=0))
+            self._prune(country, name, version)
+        except OSError as e:
+            logger.error(f"Error writing artifact {path}: {e}")
+            return None
+        return path
+
+    def _prune(self, country: str, name: str, version: int):
+        """Remove versions older than version (a slower writer never deletes a newer one)"""
+        directory = os.path.join(self.root, country)
+        pattern = re.compile(rf'^{name}\.v(\d+)\.json(\.gz)?$')
+        for filename in os.listdir(directory):
+            match = pattern.match(filename)
+            if match and int(match.group(1)) < version:
+                try:
+                    os.unlink(os.path.join(directory, filename))
+                except OSError:
+                    pass
@@ -0,0 +1,215 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional
+
+from models.scrapper import register_commit_listener
+from models.sync import dataset_id, COUNTERS_COLLECTION, CHANGE_TOKEN_COUNTER, DATASETS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+POWER_TYPES = ['airpower', 'navalpower', 'droneforce', 'landpower']
+SUGGEST_FIELDS = ('name', 'model', 'role')
+MAX_SUGGESTIONS = 20
+# Results for prefixes this short span large ranges, so their top matches are cached
+SHORT_PREFIX_LENGTH = 2
+# How often a query checks the change token for writes made by other processes
+SYNC_INTERVAL_SECONDS = float(os.getenv('AUTOCOMPLETE_SYNC_SECONDS', '30'))
+# Characters after which a word starts, so 'raf' also finds 'Dassault Rafale'
+WORD_BREAKS = ' -/(,'
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def index_keys(text: str) -> List[str]:
+    """The full text plus every suffix starting at a word boundary"""
+    keys = [text]
+    for i, char in enumerate(text[:-1]):
+        if char in WORD_BREAKS and text[i + 1] not in WORD_BREAKS:
+            keys.append(text[i + 1:])
+    return list(dict.fromkeys(keys))
+
+
+class AutocompleteIndex:
+    """
+    In-memory typeahead over equipment names, models and roles.
+
+    A sorted array of (key, entry) pairs answers a prefix with a bisect plus a
+    scan of the matching range; entries are ranked by total units across all
+    datasets. Each (country, power_type) dataset's contribution is tracked, so a
+    save replaces only that dataset's share of the index.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._built = False
+        self._entries = {}      # (kind, normalized text) -> entry dict
+        self._keys = []         # sorted [(key, (kind, normalized text))]
+        self._datasets = {}     # dataset id -> {(kind, normalized text): units}
+        self._short_cache = {}  # short prefix -> ranked entry keys
+        self._token = 0
+        self._last_sync = 0.0
+        register_commit_listener(self.on_commit)
+
+    # Building and updating
+
+    def warm(self):
+        """Build the index in the background so the first keystroke does not pay for it"""
+        threading.Thread(target=self._ensure_built, name='autocomplete-build', daemon=True).start()
+
+    def _ensure_built(self):
+        with self._lock:
+            if self._built:
+                return
+            started = time.perf_counter()
+            self._token = self._current_token()
+            for power_type in POWER_TYPES:
+                by_country = {}
+                for doc in self.db[power_type].find({}, self._projection()):
+                    by_country.setdefault(doc.get('country_id'), []).append(doc)
+                for country_id, records in by_country.items():
+                    self._apply_dataset(dataset_id(country_id, power_type), power_type, records, sort_keys=False)
+            self._keys.sort()
+            self._built = True
+            self._last_sync = time.monotonic()
+            logger.info(f"Autocomplete index built: {len(self._entries)} terms, {len(self._keys)} keys "
+                        f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    @staticmethod
+    def _projection():
+        return {'_id': 0, 'country_id': 1, 'country': 1, 'units': 1, **{field: 1 for field in SUGGEST_FIELDS}}
+
+    def _current_token(self) -> int:
+        counter = self.db[COUNTERS_COLLECTION].find_one({'_id': CHANGE_TOKEN_COUNTER})
+        return counter['value'] if counter else 0
+
+    def _apply_dataset(self, ds_id: str, power_type: str, records: List[Dict], sort_keys: bool = True):
+        """Replace one dataset's contribution with the given records"""
+        contribution = {}
+        displays = {}
+        country = None
+        for record in records:
+            country = country or record.get('country')
+            units = record.get('units') or 0
+            for kind in SUGGEST_FIELDS:
+                text = str(record.get(kind) or '').strip()
+                if not text or text == 'Unknown':
+                    continue
+                entry_key = (kind, normalize(text))
+                contribution[entry_key] = contribution.get(entry_key, 0) + (units if isinstance(units, int) else 0)
+                displays.setdefault(entry_key, text)
+
+        previous = self._datasets.pop(ds_id, {})
+        for entry_key in previous.keys() - contribution.keys():
+            entry = self._entries[entry_key]
+            entry['datasets'].pop(ds_id, None)
+            if entry['datasets']:
+                entry['units'] = sum(units for units, _, _ in entry['datasets'].values())
+            else:
+                self._remove_entry(entry_key)
+
+        for entry_key, units in contribution.items():
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                entry = {'text': displays[entry_key], 'kind': entry_key[0], 'units': 0, 'datasets': {}}
+                self._entries[entry_key] = entry
+                for key in index_keys(entry_key[1]):
+                    if sort_keys:
+                        insort(self._keys, (key, entry_key))
+                    else:
+                        self._keys.append((key, entry_key))
+            entry['datasets'][ds_id] = (units, country, power_type)
+            entry['units'] = sum(units for units, _, _ in entry['datasets'].values())
+
+        if contribution:
+            self._datasets[ds_id] = contribution
+        self._short_cache.clear()
+
+    def _remove_entry(self, entry_key):
+        del self._entries[entry_key]
+        for key in index_keys(entry_key[1]):
+            position = bisect_left(self._keys, (key, entry_key))
+            if position < len(self._keys) and self._keys[position] == (key, entry_key):
+                del self._keys[position]
+
+    def _reload_dataset(self, country_id: str, power_type: str):
+        records = list(self.db[power_type].find({'country_id': country_id}, self._projection()))
+        with self._lock:
+            self._apply_dataset(dataset_id(country_id, power_type), power_type, records)
+
+    def on_commit(self, country_id: str, power_type: str, change_token: Optional[int]):
+        """Commit listener: re-index the saved dataset (once the index exists)"""
+        if change_token is None or not self._built:
+            return
+        try:
+            self._reload_dataset(country_id, power_type)
+        except Exception as e:
+            logger.error(f"Error updating autocomplete index for {power_type}:{country_id}: {e}")
+
+    def _sync_external_writes(self):
+        """Pick up datasets saved by other processes, at most once per SYNC_INTERVAL_SECONDS"""
+        now = time.monotonic()
+        if now - self._last_sync < SYNC_INTERVAL_SECONDS:
+            return
+        self._last_sync = now
+        token = self._current_token()
+        if token <= self._token:
+            return
+        for dataset in self.db[DATASETS_COLLECTION].find({'version': {'$gt': self._token}},
+                                                         {'country_id': 1, 'power_type': 1}):
+            self._reload_dataset(dataset['country_id'], dataset['power_type'])
+        self._token = token
+
+    # Queries
+
+    @staticmethod
+    def _rank(entry: Dict):
+        return -entry['units'], len(entry['text']), entry['text'].lower()
+
+    def _range(self, prefix: str):
+        """Entry keys whose index keys start with prefix (each entry once)"""
+        seen = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+            entry_key = self._keys[position][1]
+            if entry_key not in seen:
+                seen.add(entry_key)
+                yield entry_key
+            position += 1
+
+    def suggest(self, prefix: str, limit: int = 10, kinds: Optional[List[str]] = None) -> List[Dict]:
+        """Top entries matching prefix, most units first"""
+        self._ensure_built()
+        self._sync_external_writes()
+        prefix = normalize(prefix)
+        limit = min(limit, MAX_SUGGESTIONS)
+
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH and not kinds:
+                ranked = self._short_cache.get(prefix)
+                if ranked is None:
+                    ranked = heapq.nsmallest(MAX_SUGGESTIONS, self._range(prefix), key=lambda k: self._rank(self._entries[k]))
+                    self._short_cache[prefix] = ranked
+                top = ranked[:limit]
+            else:
+                candidates = (k for k in self._range(prefix) if not kinds or k[0] in kinds)
+                top = heapq.nsmallest(limit, candidates, key=lambda k: self._rank(self._entries[k]))
+
+            suggestions = []
+            for entry_key in top:
+                entry = self._entries[entry_key]
+                details = entry['datasets'].values()
+                suggestions.append({
+                    'text': entry['text'],
+                    'kind': entry['kind'],
+                    'units': entry['units'],
+                    'countries': sorted({country for _, country, _ in details if country}),
+                    'power_types': sorted({power_type for _, _, power_type in details})
+                })
+            return suggestions
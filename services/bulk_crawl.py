@@ -0,0 +1,243 @@
+"""
+Non-interactive bulk crawler for refreshing many countries in one run.
+
+Examples:
+    python -m services.bulk_crawl --countries india,russia --workers 4
+    python -m services.bulk_crawl --all --power-types airpower,navalpower
+    python -m services.bulk_crawl --all --checkpoint nightly.jsonl
+
+Completed targets are appended to a JSON-lines checkpoint file, so rerunning
+the same command after a crash resumes with the targets that are left. Once a
+run finishes, the next one starts over; --reset discards an unfinished run.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from models.scrapper import DatabaseManager, MilitaryDataPipeline
+
+logger = logging.getLogger(__name__)
+
+POWER_TYPES = ['airpower', 'navalpower', 'droneforce', 'landpower']
+DEFAULT_CHECKPOINT = 'bulk_crawl_checkpoint.jsonl'
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines record of one run: a header with the run's targets, an entry
+    per finished (country, power_type) target and a footer once the run completes
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        lines = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    lines.append(json.loads(line))
+                except ValueError:
+                    # A crash can leave a truncated last line
+                    continue
+        return lines
+
+    def begin(self, targets: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """
+        Resume the checkpointed run if it is unfinished and has the same targets, returning
+        the targets it completed; otherwise start a new run and return an empty set
+        """
+        lines = self._read()
+        header = lines[0] if lines else {}
+        resumable = ('run_started_at' in header and [tuple(target) for target in header.get('targets', [])] == targets
+                     and not any('run_finished_at' in entry for entry in lines))
+        if resumable:
+            return {(entry['country_name'], entry['power_type']) for entry in lines[1:]
+                    if entry.get('status') == 'success'}
+
+        self.reset()
+        self.record({'run_started_at': datetime.utcnow().isoformat(), 'targets': [list(target) for target in targets]})
+        return set()
+
+    def finish(self):
+        self.record({'run_finished_at': datetime.utcnow().isoformat()})
+
+    def record(self, entry: Dict):
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkCrawler:
+    """Runs MilitaryDataPipeline over many targets with a worker pool"""
+
+    def __init__(self, workers: int, checkpoint: Checkpoint):
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self._local = threading.local()
+        self._pipelines = []
+        self._country_ids = {}
+        self._lock = threading.Lock()
+
+    def _pipeline(self) -> MilitaryDataPipeline:
+        """One pipeline (and Mongo connection) per worker thread"""
+        pipeline = getattr(self._local, 'pipeline', None)
+        if pipeline is None:
+            pipeline = MilitaryDataPipeline()
+            self._local.pipeline = pipeline
+            with self._lock:
+                self._pipelines.append(pipeline)
+        return pipeline
+
+    def _country_id(self, pipeline: MilitaryDataPipeline, country_name: str) -> str:
+        with self._lock:
+            if country_name not in self._country_ids:
+                self._country_ids[country_name] = pipeline.db_manager.get_or_create_country(country_name)
+            return self._country_ids[country_name]
+
+    def _run_target(self, country_name: str, power_type: str) -> Dict:
+        started = time.perf_counter()
+        try:
+            pipeline = self._pipeline()
+            country_id = self._country_id(pipeline, country_name)
+            result = pipeline.process_power_type(country_id, country_name, power_type)
+        except Exception as e:
+            logger.error(f"Error crawling {power_type} for {country_name}: {e}")
+            result = {'status': 'failed', 'message': str(e), 'count': 0, 'timings': {}}
+
+        entry = {
+            'country_name': country_name,
+            'power_type': power_type,
+            'status': result['status'],
+            'message': result['message'],
+            'count': result['count'],
+            'seconds': round(time.perf_counter() - started, 3),
+            'timings': {stage: round(value, 3) for stage, value in result['timings'].items()},
+            'finished_at': datetime.utcnow().isoformat()
+        }
+        self.checkpoint.record(entry)
+        return entry
+
+    def run(self, targets: List[Tuple[str, str]]) -> List[Dict]:
+        """Crawl all targets and return their checkpoint entries in completion order"""
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self._run_target, country, power_type): (country, power_type)
+                           for country, power_type in targets}
+                for i, future in enumerate(as_completed(futures), 1):
+                    entry = future.result()
+                    results.append(entry)
+                    logger.info(f"[{i}/{len(targets)}] {entry['country_name']}/{entry['power_type']}: "
+                                f"{entry['status']} ({entry['count']} records, {entry['seconds']}s)")
+        finally:
+            for pipeline in self._pipelines:
+                pipeline.cleanup()
+        return results
+
+
+def build_report(results: List[Dict], skipped: int, wall_seconds: float) -> Dict:
+    """Summarize throughput and timing for a crawl run"""
+    durations = sorted(entry['seconds'] for entry in results)
+    records = sum(entry['count'] for entry in results)
+    stage_totals = {}
+    for entry in results:
+        for stage, value in entry['timings'].items():
+            stage_totals[stage] = stage_totals.get(stage, 0) + value
+
+    return {
+        'targets_run': len(results),
+        'targets_skipped': skipped,
+        'succeeded': sum(1 for entry in results if entry['status'] == 'success'),
+        'failed': [f"{entry['country_name']}/{entry['power_type']}" for entry in results if entry['status'] != 'success'],
+        'records': records,
+        'wall_seconds': round(wall_seconds, 2),
+        'targets_per_minute': round(len(results) / wall_seconds * 60, 2) if wall_seconds else None,
+        'records_per_second': round(records / wall_seconds, 2) if wall_seconds else None,
+        'target_seconds': {
+            'p50': round(statistics.median(durations), 3) if durations else None,
+            'p95': round(durations[int(0.95 * (len(durations) - 1))], 3) if durations else None,
+            'max': durations[-1] if durations else None
+        },
+        'stage_seconds': {stage: round(value, 2) for stage, value in stage_totals.items()}
+    }
+
+
+def known_countries() -> List[str]:
+    """All countries already stored in the database"""
+    db_manager = DatabaseManager()
+    try:
+        return sorted(country['name'] for country in db_manager.db['countries'].find({}, {'name': 1}))
+    finally:
+        db_manager.close_connection()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk, resumable military data crawl')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--countries', help='Comma-separated country names, e.g. india,russia')
+    source.add_argument('--all', action='store_true', help='Crawl every country known to the database')
+    parser.add_argument('--power-types', default='all', help="Comma-separated power types or 'all'")
+    parser.add_argument('--workers', type=int, default=4, help='Number of targets crawled in parallel')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Checkpoint file used to resume')
+    parser.add_argument('--reset', action='store_true', help='Start over even if the checkpointed run is unfinished')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Main execution function"""
+    args = parse_args(argv)
+
+    if args.power_types == 'all':
+        power_types = POWER_TYPES
+    else:
+        power_types = [p.strip().lower() for p in args.power_types.split(',') if p.strip()]
+        invalid = [p for p in power_types if p not in POWER_TYPES]
+        if invalid:
+            logger.error(f"Invalid power types: {', '.join(invalid)}. Available types: {', '.join(POWER_TYPES)}")
+            return 2
+
+    countries = known_countries() if args.all else [c.strip().lower() for c in args.countries.split(',') if c.strip()]
+
+    all_targets = [(country, power_type) for country in countries for power_type in power_types]
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.reset:
+        checkpoint.reset()
+    completed = checkpoint.begin(all_targets)
+    targets = [target for target in all_targets if target not in completed]
+    skipped = len(all_targets) - len(targets)
+    logger.info(f"Crawling {len(targets)} targets ({skipped} already completed) with {args.workers} workers")
+
+    started = time.perf_counter()
+    try:
+        results = BulkCrawler(args.workers, checkpoint).run(targets)
+    except KeyboardInterrupt:
+        logger.info("Crawl interrupted; rerun the same command to resume from the checkpoint")
+        return 130
+    checkpoint.finish()
+
+    report = build_report(results, skipped, time.perf_counter() - started)
+    print(json.dumps(report, indent=2))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
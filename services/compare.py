@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from models.sync import dataset_id, DATASETS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+COMPARE_CACHE_SIZE = int(os.getenv('COMPARE_CACHE_SIZE', '256'))
+
+
+def compare_pipeline(country_ids: List[str]) -> List[Dict]:
+    """One aggregation per collection: totals, role and assessment breakdowns, and models only one country fields"""
+    return [
+        {'$match': {'country_id': {'$in': country_ids}}},
+        {'$facet': {
+            'totals': [
+                {'$group': {'_id': '$country_id', 'units': {'$sum': '$units'}, 'records': {'$sum': 1}}}
+            ],
+            'by_role': [
+                {'$group': {'_id': {'country_id': '$country_id', 'role': '$role'},
+                            'units': {'$sum': '$units'}, 'records': {'$sum': 1}}}
+            ],
+            'by_assessment': [
+                {'$group': {'_id': {'country_id': '$country_id', 'assessment': '$assessment'},
+                            'units': {'$sum': '$units'}, 'records': {'$sum': 1}}}
+            ],
+            'unique_models': [
+                {'$match': {'model': {'$ne': 'Unknown'}}},
+                {'$group': {'_id': '$model', 'countries': {'$addToSet': '$country_id'}}},
+                {'$match': {'countries': {'$size': 1}}},
+                {'$group': {'_id': {'$arrayElemAt': ['$countries', 0]}, 'models': {'$push': '$_id'}}}
+            ]
+        }}
+    ]
+
+
+class CompareService:
+    """
+    Server-side country comparison. Results are cached per power type and country
+    set, keyed by the datasets' versions, so an entry is never served after any
+    of its datasets changes.
+    """
+
+    def __init__(self, db, cache_size: int = COMPARE_CACHE_SIZE):
+        self.db = db
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _versions(self, country_ids: List[str], power_types: List[str]) -> Dict[str, int]:
+        ids = [dataset_id(country_id, power_type) for power_type in power_types for country_id in country_ids]
+        return {dataset['_id']: dataset.get('version')
+                for dataset in self.db[DATASETS_COLLECTION].find({'_id': {'$in': ids}}, {'version': 1})}
+
+    def _aggregate(self, power_type: str, country_ids: List[str]) -> Dict[str, Dict]:
+        facets = next(self.db[power_type].aggregate(compare_pipeline(country_ids)), {})
+        result = {country_id: {'total_units': 0, 'total_records': 0, 'by_role': {}, 'by_assessment': {},
+                               'unique_models': []} for country_id in country_ids}
+
+        for row in facets.get('totals', []):
+            result[row['_id']].update(total_units=row['units'], total_records=row['records'])
+        for facet, field in (('by_role', 'role'), ('by_assessment', 'assessment')):
+            for row in sorted(facets.get(facet, []), key=lambda r: (-r['units'], str(r['_id'].get(field)))):
+                result[row['_id']['country_id']][facet][str(row['_id'].get(field, 'Unknown'))] = {
+                    'units': row['units'], 'records': row['records']}
+        for row in facets.get('unique_models', []):
+            result[row['_id']]['unique_models'] = sorted(row['models'])
+        return result
+
+    def compare(self, countries: Dict[str, str], power_types: List[str]) -> Tuple[Dict, bool]:
+        """
+        countries: {country name: country_id}. Returns ({country name: {power_type: comparison}}, cached).
+        """
+        country_ids = sorted(countries.values())
+        versions = self._versions(country_ids, power_types)
+        key = (tuple(power_types), tuple(country_ids),
+               tuple(versions.get(dataset_id(c, p)) for p in power_types for c in country_ids))
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._cache[key], True
+            self.stats['misses'] += 1
+
+        names = {country_id: name for name, country_id in countries.items()}
+        result = {name: {} for name in countries}
+        for power_type in power_types:
+            for country_id, comparison in self._aggregate(power_type, country_ids).items():
+                result[names[country_id]][power_type] = comparison
+
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result, False
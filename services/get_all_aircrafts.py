@@ -1,10 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
 import os
 from urllib.parse import urljoin
 
+from models.html_parsing import make_soup, WARPOWER_ITEMS
+from models.http_transport import http_get
+from models.extractors import WARPOWER_ITEM_ENGINE, Field, image_src
+
+# The standalone scraper also reads the flag image and derives the country from it
+AIRCRAFT_ENGINE = WARPOWER_ITEM_ENGINE.extend([Field('flag_url', 'img', 'flagMinStyling', image_src)])
+FLAG_COUNTRY_PATTERN = re.compile(r'/flags/([^.]+)\.(jpg|png|webp)')
+
 def scrape_aircraft_data(power_name,country_name):
     """
     Scrape aircraft information from warpowerindia.com and store in JSON format
@@ -14,14 +20,14 @@ def scrape_aircraft_data(power_name,country_name):
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
-    response = requests.get(url, headers=headers)
+    response = http_get(url, headers=headers)
     
     if response.status_code != 200:
         print(f"Failed to retrieve the webpage. Status code: {response.status_code}")
         return None
     
     # Parse the HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = make_soup(response.text, WARPOWER_ITEMS)
     
     # Find all aircraft elements (based on the provided structure)
     aircraft_elements = soup.find_all('div', class_='mainCol')
@@ -33,70 +39,32 @@ def scrape_aircraft_data(power_name,country_name):
     # Process each aircraft element
     for element in aircraft_elements:
         try:
-            # Extract service information
-            service_element = element.find('span', class_='textWhite textNormal textBold')
-            service = service_element.text.strip() if service_element else "Unknown"
-            
-            # Extract image URL
-            img_element = element.find('img', class_='entryImg')
-            img_url = urljoin(base_url, img_element['src']) if img_element and img_element.get('src') else None
-            
-            # Extract assessment information
-            assessment_element = element.find('div', class_='assessmentBox')
-            assessment = assessment_element.find('span', class_='textNormal textWhite').text.strip() if assessment_element else "Unknown"
-            
-            # Extract flag and country information
-            flag_element = element.find('img', class_='flagMinStyling')
-            flag_url = urljoin(base_url, flag_element['src']) if flag_element and flag_element.get('src') else None
+            fields = AIRCRAFT_ENGINE.extract(element, {'base_url': base_url})
             
             # Extract country from flag URL if possible
             country = "Unknown"
+            flag_url = fields['flag_url']
             if flag_url:
-                country_match = re.search(r'/flags/([^.]+)\.(jpg|png|webp)', flag_url)
+                country_match = FLAG_COUNTRY_PATTERN.search(flag_url)
                 if country_match:
                     country = country_match.group(1).capitalize()
             
-            # Extract units count
-            units_element = element.find('span', class_='textJumbo')
-            units = int(units_element.text.strip()) if units_element else 0
-            
-            # Extract aircraft name and model
-            name_element = element.find('span', class_='textYellowOrange')
-            model_element = element.find('span', class_='textWhite textLarge textBold')
-            
-            aircraft_name = name_element.text.strip() if name_element else "Unknown"
-            full_model_text = model_element.text.strip() if model_element else ""
-            
-            # Extract model in parentheses if it exists
-            model = "Unknown"
-            model_match = re.search(r'\((.*?)\)', full_model_text)
-            if model_match:
-                model = model_match.group(1).strip()
-            
-            # Extract role
-            role_element = element.find('span', class_='textNormal textLtstGray')
-            role = role_element.text.replace('Role:', '').strip() if role_element else "Unknown"
-            
-            # Extract description
-            desc_element = element.find('span', class_='textSmall1 textWhite')
-            description = desc_element.text.strip() if desc_element else "No description available"
-            
             # Compile all information
             aircraft_info = {
-                "service": service,
-                "name": aircraft_name,
-                "model": model,
+                "service": fields['service'],
+                "name": fields['name'],
+                "model": fields['model'],
                 "country": country,
-                "units": units,
-                "role": role,
-                "assessment": assessment,
-                "description": description,
-                "image_url": img_url,
+                "units": fields['units'],
+                "role": fields['role'],
+                "assessment": fields['assessment'],
+                "description": fields['description'],
+                "image_url": fields['image_url'],
                 "flag_url": flag_url
             }
             
             aircraft_data.append(aircraft_info)
-            print(f"Successfully scraped data for {aircraft_name}")
+            print(f"Successfully scraped data for {aircraft_info['name']}")
             
         except Exception as e:
             print(f"Error processing an aircraft element: {e}")
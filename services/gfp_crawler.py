@@ -0,0 +1,199 @@
+"""
+Global Firepower crawler for every ranked country.
+
+Country pages are fetched concurrently (bounded per host), parsed with
+extract_container_data in a process pool, and written to the gfp_metrics
+collection in one unordered bulk write.
+
+Examples:
+    python -m services.gfp_crawler --all
+    python -m services.gfp_crawler --countries india,bhutan --fetch-workers 4 --per-host 2
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from models.http_transport import http_get
+from models.military_man_power import parse_gfp_html
+from models.scrapper import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+GFP_BASE_URL = 'https://www.globalfirepower.com/'
+GFP_LISTING_URL = f'{GFP_BASE_URL}countries-listing.php'
+GFP_DETAIL_URL = GFP_BASE_URL + 'country-military-strength-detail.php?country_id={country_id}'
+COUNTRY_ID_PATTERN = re.compile(r'country-military-strength-detail\.php\?country_id=([a-z0-9-]+)')
+
+DEFAULT_FETCH_WORKERS = int(os.getenv('GFP_FETCH_WORKERS', '8'))
+DEFAULT_PER_HOST_LIMIT = int(os.getenv('GFP_PER_HOST_LIMIT', '4'))
+DEFAULT_PARSE_WORKERS = int(os.getenv('GFP_PARSE_WORKERS', str(os.cpu_count() or 1)))
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+def detail_url(country_id: str) -> str:
+    return GFP_DETAIL_URL.format(country_id=country_id)
+
+
+def discover_country_ids() -> List[str]:
+    """All ranked country ids linked from the GFP countries listing"""
+    response = http_get(GFP_LISTING_URL, headers=HEADERS, timeout=30)
+    response.raise_for_status()
+    # dict.fromkeys keeps the listing (rank) order while dropping duplicate links
+    return list(dict.fromkeys(COUNTRY_ID_PATTERN.findall(response.text)))
+
+
+def parse_country_page(country_id: str, html: bytes) -> Tuple[str, List[Dict]]:
+    """Process pool entry point: parse one country page into metric entries"""
+    # parse_gfp_html prints a container count per page
+    with contextlib.redirect_stdout(io.StringIO()):
+        return country_id, parse_gfp_html(html)
+
+
+class HostLimiter:
+    """Caps in-flight requests per host, independent of the fetch pool size"""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.per_host)
+            return self._semaphores[host]
+
+
+class GFPCrawler:
+    """Fetch -> parse -> bulk write for many Global Firepower country pages"""
+
+    def __init__(self, fetch_workers: int = DEFAULT_FETCH_WORKERS, per_host: int = DEFAULT_PER_HOST_LIMIT,
+                 parse_workers: int = DEFAULT_PARSE_WORKERS):
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.limiter = HostLimiter(per_host)
+
+    def fetch(self, country_id: str) -> Optional[bytes]:
+        url = detail_url(country_id)
+        with self.limiter.slot(url):
+            try:
+                response = http_get(url, headers=HEADERS, timeout=30)
+                response.raise_for_status()
+                return response.content
+            except Exception as e:
+                logger.error(f"Error fetching GFP page for {country_id}: {e}")
+                return None
+
+    def crawl(self, country_ids: List[str]) -> Tuple[Dict[str, List[Dict]], List[str]]:
+        """Return ({country_id: metric entries}, failed country ids)"""
+        parsed = {}
+        failed = []
+        # Parsing starts as soon as each page arrives, so CPU work overlaps the remaining fetches
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        try:
+            parse_futures = {}
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool:
+                fetches = {fetch_pool.submit(self.fetch, country_id): country_id for country_id in country_ids}
+                for future in as_completed(fetches):
+                    country_id = fetches[future]
+                    html = future.result()
+                    if html is None:
+                        failed.append(country_id)
+                    else:
+                        pool = parse_pool or fetch_pool
+                        parse_futures[pool.submit(parse_country_page, country_id, html)] = country_id
+
+            for future, country_id in parse_futures.items():
+                try:
+                    _, entries = future.result()
+                except Exception as e:
+                    logger.error(f"Error parsing GFP page for {country_id}: {e}")
+                    failed.append(country_id)
+                    continue
+                if entries:
+                    parsed[country_id] = entries
+                else:
+                    logger.warning(f"No GFP metrics found for {country_id}")
+                    failed.append(country_id)
+        finally:
+            if parse_pool:
+                parse_pool.shutdown()
+
+        return parsed, failed
+
+    @staticmethod
+    def build_documents(parsed: Dict[str, List[Dict]]) -> List[Dict]:
+        now = datetime.utcnow()
+        return [{
+            'country_id': country_id,
+            'source_url': detail_url(country_id),
+            'metric_count': len(entries),
+            'metrics': entries,
+            'scraped_at': now,
+            'last_updated': now
+        } for country_id, entries in parsed.items()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Global Firepower crawl for all ranked countries')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--countries', help='Comma-separated GFP country ids, e.g. india,united-states-of-america')
+    source.add_argument('--all', action='store_true', help='Crawl every country on the GFP countries listing')
+    parser.add_argument('--fetch-workers', type=int, default=DEFAULT_FETCH_WORKERS, help='Concurrent page fetches')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST_LIMIT, help='Concurrent requests per host')
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS,
+                        help='Parser processes (0 parses in the fetch threads)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Main execution function"""
+    args = parse_args(argv)
+
+    if args.all:
+        country_ids = discover_country_ids()
+        logger.info(f"Discovered {len(country_ids)} ranked countries")
+    else:
+        country_ids = [c.strip().lower() for c in args.countries.split(',') if c.strip()]
+
+    crawler = GFPCrawler(args.fetch_workers, args.per_host, args.parse_workers)
+    started = time.perf_counter()
+    parsed, failed = crawler.crawl(country_ids)
+    crawled_seconds = time.perf_counter() - started
+
+    db_manager = DatabaseManager()
+    try:
+        written = db_manager.save_gfp_metrics(crawler.build_documents(parsed))
+    finally:
+        db_manager.close_connection()
+
+    wall_seconds = time.perf_counter() - started
+    print(json.dumps({
+        'countries_requested': len(country_ids),
+        'countries_saved': written,
+        'failed': sorted(failed),
+        'metrics': sum(len(entries) for entries in parsed.values()),
+        'crawl_seconds': round(crawled_seconds, 2),
+        'wall_seconds': round(wall_seconds, 2),
+        'pages_per_second': round(len(parsed) / crawled_seconds, 2) if crawled_seconds else None
+    }, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
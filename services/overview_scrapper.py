@@ -1,36 +1,57 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
 import logging
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from urllib.parse import urljoin
 
+from models.mongo import ASCENDING
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class WarPowerIndiaScraper:
-    def __init__(self):
-        self.base_url = "https://www.warpowerindia.com"
-        self.target_pages = [
-            "airpower.php",
-            "landpower.php", 
-            "navalpower.php",
-            "droneforce.php",
-            "china-military-ranks.php",
-            "manpower.php"
-        ]
+OVERVIEWS_COLLECTION = 'overviews'
+# Cached overviews older than this are served as stale and refreshed in the background
+OVERVIEW_TTL_HOURS = float(os.getenv('OVERVIEW_TTL_HOURS', '24'))
+# Overviews not refreshed for this long are dropped by a Mongo TTL index
+OVERVIEW_RETENTION_DAYS = float(os.getenv('OVERVIEW_RETENTION_DAYS', '30'))
+OVERVIEW_REFRESH_WORKERS = int(os.getenv('OVERVIEW_REFRESH_WORKERS', '4'))
+# Background refreshes of a homepage that failed are not retried sooner than this
+OVERVIEW_RETRY_MINUTES = float(os.getenv('OVERVIEW_RETRY_MINUTES', '10'))
+
+SECTION_PAGES = ["airpower.php", "landpower.php", "navalpower.php", "droneforce.php", "manpower.php"]
+# Each country site links one rival's ranks page, e.g. china-military-ranks.php on warpowerindia.com
+RANKS_PAGE_PATTERN = re.compile(r'^[a-z-]+-military-ranks\.php$')
+
+
+class WarPowerOverviewScraper:
+    """Scrapes the section overview from a warpower country homepage (warpower<country>.com)"""
+
+    def __init__(self, country_name: str):
+        self.country_name = country_name.lower()
+        self.base_url = f"https://www.warpower{self.country_name}.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+    def is_target_page(self, page_name):
+        return page_name in SECTION_PAGES or RANKS_PAGE_PATTERN.match(page_name) is not None
+
     def get_homepage_content(self):
         """Fetch homepage content"""
+        from models.http_transport import http_get, RequestException
+        
         try:
-            response = requests.get(self.base_url, headers=self.headers, timeout=10)
+            response = http_get(self.base_url, headers=self.headers, timeout=10)
             response.raise_for_status()
             return response.text
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching homepage: {e}")
+        except RequestException as e:
+            logger.error(f"Error fetching homepage for {self.country_name}: {e}")
             return None
     
     def extract_section_divs(self, soup):
@@ -49,7 +70,7 @@ class WarPowerIndiaScraper:
                 
                 # Check if this is one of our target pages
                 page_name = href.lstrip('/')  # Remove leading slash
-                if page_name not in self.target_pages:
+                if not self.is_target_page(page_name):
                     continue
                 
                 # Extract image URL
@@ -85,8 +106,18 @@ class WarPowerIndiaScraper:
         
         return scraped_data
     
-    def save_to_json(self, data, filename="india_overview.json"):
+    def scrape(self):
+        """Fetch and parse the homepage; None if it could not be fetched"""
+        from models.html_parsing import make_soup, OVERVIEW_SECTIONS
+        
+        html_content = self.get_homepage_content()
+        if not html_content:
+            return None
+        return self.extract_section_divs(make_soup(html_content, OVERVIEW_SECTIONS))
+
+    def save_to_json(self, data, filename=None):
         """Save extracted data to JSON file"""
+        filename = filename or f"{self.country_name}_overview.json"
         try:
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
@@ -96,54 +127,129 @@ class WarPowerIndiaScraper:
             logger.error(f"Error saving to JSON: {e}")
             return False
     
-    def run(self):
-        """Main execution method"""
-        logger.info("Starting War Power India homepage scraper...")
         
-        # Get homepage content
-        html_content = self.get_homepage_content()
-        if not html_content:
-            logger.error("Failed to fetch homepage content")
-            return
+class WarPowerIndiaScraper(WarPowerOverviewScraper):
+    def __init__(self):
+        super().__init__('india')
         
-        # Parse HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Extract section data
-        scraped_data = self.extract_section_divs(soup)
+class OverviewService:
+    """
+    Database-cached country overviews. Reads never scrape: a missing or stale
+    overview is refreshed in the background and picked up by later requests.
+    """
         
-        if scraped_data:
-            # Save to JSON
-            if self.save_to_json(scraped_data):
-                print(f"\n✅ Scraping completed successfully!")
-                print(f"📊 Total sections scraped: {len(scraped_data)}")
-                print(f"💾 Data saved to: india_overview.json")
+    def __init__(self, db, ttl_hours: float = OVERVIEW_TTL_HOURS):
+        self.collection = db[OVERVIEWS_COLLECTION]
+        self.ttl = timedelta(hours=ttl_hours)
+        self._executor = None
+        self._refreshing = set()
+        self._failed_at = {}
+        self._lock = threading.Lock()
+        self._indexed = False
                 
-                # Show summary of scraped sections
-                print(f"\n📋 Scraped sections:")
-                for i, item in enumerate(scraped_data, 1):
-                    section_name = item['url'].split('/')[-1]
-                    print(f"  {i}. {section_name}: {item['title']}")
+    def _ensure_indexes(self):
+        if not self._indexed:
+            self.collection.create_index([('expires_at', ASCENDING)], expireAfterSeconds=0)
+            self._indexed = True
                 
-                # Show sample data structure
-                if scraped_data:
-                    print(f"\n🔍 Sample entry structure:")
-                    sample = scraped_data[0]
-                    for key, value in sample.items():
-                        display_value = value[:60] + "..." if len(str(value)) > 60 else value
-                        print(f"  {key}: {display_value}")
+    def refresh(self, country_name: str) -> bool:
+        """Scrape one country's homepage and store its overview"""
+        country_name = country_name.lower()
+        sections = WarPowerOverviewScraper(country_name).scrape()
+        if sections is None:
+            return False
                         
-            else:
-                logger.error("Failed to save data to JSON")
+        self._ensure_indexes()
+        now = datetime.utcnow()
+        self.collection.update_one({'_id': country_name}, {'$set': {
+            'country': country_name,
+            'sections': sections,
+            'fetched_at': now,
+            'expires_at': now + timedelta(days=OVERVIEW_RETENTION_DAYS)
+        }}, upsert=True)
+        logger.info(f"Stored overview for {country_name} ({len(sections)} sections)")
+        return True
+
+    def refresh_many(self, country_names, workers: int = OVERVIEW_REFRESH_WORKERS):
+        """Refresh several countries concurrently; returns {country: success}"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.refresh, name): name for name in country_names}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    logger.error(f"Error refreshing overview for {futures[future]}: {e}")
+                    results[futures[future]] = False
+        return results
+
+    def refresh_in_background(self, country_name: str) -> bool:
+        """Queue a refresh unless one is already running for the country"""
+        country_name = country_name.lower()
+        with self._lock:
+            failed_at = self._failed_at.get(country_name)
+            if country_name in self._refreshing or (
+                    failed_at and datetime.utcnow() - failed_at < timedelta(minutes=OVERVIEW_RETRY_MINUTES)):
+                return False
+            self._refreshing.add(country_name)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=OVERVIEW_REFRESH_WORKERS)
+
+        def run():
+            ok = False
+            try:
+                ok = self.refresh(country_name)
+            except Exception as e:
+                logger.error(f"Error refreshing overview for {country_name}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(country_name)
+                    if ok:
+                        self._failed_at.pop(country_name, None)
+                    else:
+                        self._failed_at[country_name] = datetime.utcnow()
+
+        self._executor.submit(run)
+        return True
+
+    def get_overview(self, country_name: str):
+        """(overview document or None, stale flag); queues a refresh when missing or stale"""
+        doc = self.collection.find_one({'_id': country_name.lower()}, {'_id': 0, 'expires_at': 0})
+        stale = doc is None or datetime.utcnow() - doc['fetched_at'] >= self.ttl
+        if stale:
+            self.refresh_in_background(country_name)
+        return doc, stale
+
+
+def main(argv=None):
+    """Refresh stored overviews from the command line"""
+    parser = argparse.ArgumentParser(description='Refresh warpower homepage overviews')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--countries', default='india', help='Comma-separated country names (default: india)')
+    source.add_argument('--all', action='store_true', help='Every country known to the database')
+    parser.add_argument('--workers', type=int, default=OVERVIEW_REFRESH_WORKERS, help='Homepages fetched in parallel')
+    args = parser.parse_args(argv)
+
+    from models.scrapper import DatabaseManager
+
+    db_manager = DatabaseManager()
+    try:
+        if args.all:
+            countries = sorted(country['name'] for country in db_manager.db['countries'].find({}, {'name': 1}))
         else:
-            logger.warning("No matching sections found on homepage")
-            print("❌ No data was scraped. Please check if the website structure has changed.")
+            countries = [c.strip().lower() for c in args.countries.split(',') if c.strip()]
 
-def main():
-    scraper = WarPowerIndiaScraper()
-    scraper.run()
+        results = OverviewService(db_manager.db).refresh_many(countries, args.workers)
+    finally:
+        db_manager.close_connection()
 
-if __name__ == "__main__":
-    main()
+    failed = sorted(country for country, ok in results.items() if not ok)
+    print(f"Refreshed {len(results) - len(failed)}/{len(results)} overviews")
+    for country in failed:
+        print(f"  failed: {country}")
+    return 1 if failed else 0
 
 
+if __name__ == "__main__":
+    sys.exit(main())
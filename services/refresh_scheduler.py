@@ -0,0 +1,260 @@
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from models.scrapper import DatabaseManager
+from models.sync import DATASETS_COLLECTION
+from services.task_store import get_task_store
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+POWER_TYPES = ['airpower', 'navalpower', 'droneforce', 'landpower']
+
+
+def parse_offpeak_window(value: str) -> Optional[Tuple[int, int]]:
+    """Parse an 'HH-HH' UTC hour window such as '1-6' or '22-4'. Empty means always allowed."""
+    if not value:
+        return None
+    try:
+        start, end = value.split('-')
+        return int(start) % 24, int(end) % 24
+    except ValueError:
+        # A bad setting must not take the app down at import; run without a window instead
+        logger.error(f"Ignoring malformed SCHEDULER_OFFPEAK_HOURS {value!r}, expected 'HH-HH'")
+        return None
+
+
+class RefreshScheduler:
+    """Background scheduler that refreshes the stalest (country, power_type) targets first"""
+
+    def __init__(self):
+        self.max_concurrency = int(os.getenv('SCHEDULER_MAX_CONCURRENCY', '2'))
+        self.stale_after = timedelta(hours=float(os.getenv('SCHEDULER_STALE_AFTER_HOURS', '168')))
+        self.tick_seconds = int(os.getenv('SCHEDULER_TICK_SECONDS', '300'))
+        self.jitter_seconds = int(os.getenv('SCHEDULER_JITTER_SECONDS', '120'))
+        self.offpeak_window = parse_offpeak_window(os.getenv('SCHEDULER_OFFPEAK_HOURS', ''))
+        # Failed scrapes leave the last scrape time untouched, so back off before retrying them
+        self.retry_after = timedelta(hours=float(os.getenv('SCHEDULER_RETRY_AFTER_HOURS', '24')))
+
+        self.in_flight = {}  # task_id -> (country_name, power_type)
+        self.last_attempts = {}  # (country_name, power_type) -> datetime of last dispatch
+        self.last_tick_at = None
+        self.next_tick_at = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_offpeak_window(self, now: datetime) -> bool:
+        """Check whether scheduled scrapes may start at `now` (UTC)"""
+        if not self.offpeak_window:
+            return True
+        start, end = self.offpeak_window
+        if start <= end:
+            return start <= now.hour < end
+        return now.hour >= start or now.hour < end
+
+    def next_window_start(self, now: datetime) -> datetime:
+        """Return `now` if inside the off-peak window, else the next time it opens"""
+        if self.in_offpeak_window(now):
+            return now
+        start_hour = self.offpeak_window[0]
+        candidate = now.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def collect_targets(self) -> List[Dict]:
+        """Read the last scrape time per (country, power_type), stalest first"""
+        db_manager = DatabaseManager()
+        try:
+            countries = list(db_manager.db['countries'].find({}, {'name': 1}))
+            last_updated = {}
+            for dataset in db_manager.db[DATASETS_COLLECTION].find({}, {'country_id': 1, 'power_type': 1, 'last_scraped_at': 1}):
+                last_updated[(dataset['country_id'], dataset['power_type'])] = dataset['last_scraped_at']
+
+            # Data saved before datasets were tracked only carries per-record last_updated
+            for power_type in POWER_TYPES:
+                untracked = [str(c['_id']) for c in countries if (str(c['_id']), power_type) not in last_updated]
+                if not untracked:
+                    continue
+                pipeline = [
+                    {'$match': {'country_id': {'$in': untracked}}},
+                    {'$group': {'_id': '$country_id', 'last_updated': {'$max': '$last_updated'}}}
+                ]
+                for row in db_manager.db[power_type].aggregate(pipeline):
+                    last_updated[(row['_id'], power_type)] = row['last_updated']
+        finally:
+            db_manager.close_connection()
+
+        targets = []
+        for country in countries:
+            for power_type in POWER_TYPES:
+                targets.append({
+                    'country_name': country['name'],
+                    'power_type': power_type,
+                    'last_updated': last_updated.get((str(country['_id']), power_type))
+                })
+
+        # Never-scraped targets (last_updated None) sort first
+        targets.sort(key=lambda t: t['last_updated'] or datetime.min)
+        return targets
+
+    def build_schedule(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Return every target with its due time and estimated next run, in run order"""
+        now = now or datetime.utcnow()
+        window_start = self.next_window_start(now)
+        tick = timedelta(seconds=self.tick_seconds)
+        running = {target for target in self.in_flight.values()}
+
+        schedule = []
+        queue_position = 0
+        for target in self.collect_targets():
+            last_updated = target['last_updated']
+            due_at = last_updated + self.stale_after if last_updated else now
+            key = (target['country_name'], target['power_type'])
+            if due_at <= now and self._attempted_recently(key, last_updated, now):
+                due_at = self.last_attempts[key] + self.retry_after
+
+            if key in running:
+                next_run_at = None
+            elif due_at <= now:
+                # Due targets drain max_concurrency per tick, starting when the window opens
+                next_run_at = window_start + tick * (queue_position // self.max_concurrency)
+                queue_position += 1
+            else:
+                next_run_at = self.next_window_start(due_at)
+
+            schedule.append({
+                **target,
+                'age_hours': round((now - last_updated).total_seconds() / 3600, 1) if last_updated else None,
+                'due_at': due_at,
+                'next_run_at': next_run_at,
+                'in_flight': key in running
+            })
+
+        schedule.sort(key=lambda t: (t['next_run_at'] is None, t['next_run_at'] or now))
+        return schedule
+
+    def _reap_finished(self):
+        """Drop in-flight tasks that have reached a terminal status"""
+        task_store = get_task_store()
+        for task_id in list(self.in_flight):
+            if task_id.startswith('pending:'):
+                continue
+            status_info = task_store.get(task_id)
+            if not status_info or status_info['status'] in ('completed', 'error'):
+                self.in_flight.pop(task_id, None)
+
+    def _attempted_recently(self, key: Tuple[str, str], last_updated: Optional[datetime], now: datetime) -> bool:
+        """True if the last dispatch for this target failed to refresh it and is within the retry backoff"""
+        last_attempt = self.last_attempts.get(key)
+        if last_attempt is None or (last_updated and last_updated >= last_attempt):
+            return False
+        return now - last_attempt < self.retry_after
+
+    def _dispatch(self, country_name: str, power_type: str):
+        # Imported here to avoid a circular import with the routes module
+        from routes.dynamic_scraper import submit_scrape_job
+
+        if self._stop_event.is_set():
+            return
+        task_id, coalesced = submit_scrape_job(country_name, [power_type])
+        with self._lock:
+            self.in_flight[task_id] = (country_name, power_type)
+        logger.info(f"Scheduler started {power_type} refresh for {country_name} (task {task_id}, coalesced={coalesced})")
+
+    def tick(self):
+        """Dispatch the stalest due targets up to the global concurrency cap"""
+        now = datetime.utcnow()
+        self.last_tick_at = now
+        with self._lock:
+            self._reap_finished()
+            free_slots = self.max_concurrency - len(self.in_flight)
+
+        if free_slots <= 0 or not self.in_offpeak_window(now):
+            return
+
+        running = set(self.in_flight.values())
+        due = [
+            t for t in self.collect_targets()
+            if (t['country_name'], t['power_type']) not in running
+            and (t['last_updated'] is None or now - t['last_updated'] >= self.stale_after)
+            and not self._attempted_recently((t['country_name'], t['power_type']), t['last_updated'], now)
+        ]
+
+        for target in due[:free_slots]:
+            # Reserve the slot now; the jittered timer fills in the real task_id
+            placeholder = f"pending:{target['country_name']}:{target['power_type']}"
+            with self._lock:
+                self.in_flight[placeholder] = (target['country_name'], target['power_type'])
+                self.last_attempts[(target['country_name'], target['power_type'])] = now
+            delay = random.uniform(0, self.jitter_seconds)
+            timer = threading.Timer(delay, self._dispatch_reserved, args=(placeholder, target['country_name'], target['power_type']))
+            timer.daemon = True
+            timer.start()
+
+    def _dispatch_reserved(self, placeholder: str, country_name: str, power_type: str):
+        try:
+            self._dispatch(country_name, power_type)
+        except Exception as e:
+            logger.error(f"Scheduler failed to start {power_type} refresh for {country_name}: {e}")
+        finally:
+            with self._lock:
+                self.in_flight.pop(placeholder, None)
+
+    def _run(self):
+        logger.info("Refresh scheduler started")
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Refresh scheduler tick failed: {e}")
+            self.next_tick_at = datetime.utcnow() + timedelta(seconds=self.tick_seconds)
+            self._stop_event.wait(self.tick_seconds)
+        logger.info("Refresh scheduler stopped")
+
+    def start(self) -> bool:
+        """Start the background loop. Returns False if it is already running."""
+        if self.running:
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the background loop after the current tick. In-flight scrapes keep running."""
+        self._stop_event.set()
+        self.next_tick_at = None
+
+    def describe(self) -> Dict:
+        """Return scheduler configuration and state for the API"""
+        return {
+            'running': self.running,
+            'max_concurrency': self.max_concurrency,
+            'stale_after_hours': self.stale_after.total_seconds() / 3600,
+            'tick_seconds': self.tick_seconds,
+            'jitter_seconds': self.jitter_seconds,
+            'offpeak_window_utc': f"{self.offpeak_window[0]}-{self.offpeak_window[1]}" if self.offpeak_window else None,
+            'last_tick_at': self.last_tick_at,
+            'next_tick_at': self.next_tick_at,
+            'in_flight': [
+                {'task_id': task_id, 'country_name': country_name, 'power_type': power_type}
+                for task_id, (country_name, power_type) in self.in_flight.items()
+            ]
+        }
+
+
+refresh_scheduler = RefreshScheduler()
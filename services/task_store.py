@@ -0,0 +1,364 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.getenv('TASK_STORE_TTL_SECONDS', '86400'))
+DEFAULT_MAX_TASKS = int(os.getenv('TASK_STORE_MAX_TASKS', '1000'))
+# How often waiters re-read the store to pick up updates made by other processes
+CHANGE_POLL_INTERVAL_SECONDS = float(os.getenv('TASK_STORE_POLL_INTERVAL_SECONDS', '1.0'))
+
+# Fields used for bookkeeping that are never returned to API clients
+INTERNAL_FIELDS = ('_id', 'expires_at', 'active_job_key')
+# Tasks in these states own their job key: identical submissions join them
+ACTIVE_STATUSES = ('queued', 'running')
+# Claims lost to a task that vanished before it could be joined are retried this many times
+CLAIM_ATTEMPTS = 3
+
+
+def _apply_dotted(doc: Dict, set_fields: Dict, inc_fields: Dict):
+    """Apply Mongo-style dotted $set/$inc paths to a plain dict"""
+    for path, value in set_fields.items():
+        target, key = _resolve_path(doc, path)
+        target[key] = value
+    for path, amount in inc_fields.items():
+        target, key = _resolve_path(doc, path)
+        target[key] = target.get(key, 0) + amount
+
+
+def _resolve_path(doc: Dict, path: str):
+    parts = path.split('.')
+    target = doc
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    return target, parts[-1]
+
+
+def is_reusable(doc: Optional[Dict], reuse_window: float) -> bool:
+    """True for a task that is in flight or completed less than reuse_window seconds ago"""
+    if not doc:
+        return False
+    if doc['status'] in ACTIVE_STATUSES:
+        return True
+    finished_at = doc.get('finished_at')
+    return doc['status'] == 'completed' and bool(finished_at) and time.time() - finished_at < reuse_window
+
+
+class TaskStatusStore(ABC):
+    """Base class for scrape task status storage with TTL eviction and a max size"""
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_tasks: int = DEFAULT_MAX_TASKS):
+        self.ttl_seconds = ttl_seconds
+        self.max_tasks = max_tasks
+        # Bumped on every local write so waiters in this process wake up immediately
+        self._changed = threading.Condition()
+        self._change_counter = 0
+
+    def _notify_change(self):
+        with self._changed:
+            self._change_counter += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, task_id: str, since: float, timeout: float) -> Optional[Dict]:
+        """
+        Block until the task's updated_at moves past `since` or the timeout elapses.
+        Returns the latest task document (or None if it no longer exists).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._changed:
+                seen_counter = self._change_counter
+            doc = self.get(task_id)
+            remaining = deadline - time.monotonic()
+            if doc is None or doc.get('updated_at', 0) > since or remaining <= 0:
+                return doc
+            with self._changed:
+                if self._change_counter == seen_counter:
+                    self._changed.wait(min(remaining, CHANGE_POLL_INTERVAL_SECONDS))
+
+    @abstractmethod
+    def create(self, task_id: str, fields: Dict):
+        """Insert a new task document"""
+
+    @abstractmethod
+    def claim(self, job_key: str, task_id: str, fields: Dict, reuse_window: float,
+              force: bool = False) -> Tuple[str, bool]:
+        """
+        Create task_id for job_key unless a reusable task (see is_reusable) already holds it,
+        atomically across processes; force always creates. Returns (task_id, created).
+        """
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict]:
+        """Return a task by id, or None if missing or expired"""
+
+    @abstractmethod
+    def update(self, task_id: str, set_fields: Optional[Dict] = None, inc_fields: Optional[Dict] = None):
+        """Partially update a task. Keys may be dotted paths such as 'data.airpower'"""
+
+    @abstractmethod
+    def find_latest_by_job_key(self, job_key: str) -> Optional[Dict]:
+        """Return the most recently created task for a job key"""
+
+    @abstractmethod
+    def list_tasks(self, offset: int = 0, limit: int = 50) -> Tuple[List[Dict], int]:
+        """Return a page of tasks (newest first) and the total task count"""
+
+
+class MongoTaskStatusStore(TaskStatusStore):
+    """Task status store backed by a MongoDB collection with a TTL index"""
+
+    def __init__(self, mongo_uri: Optional[str] = None, collection_name: str = 'scrape_tasks', **kwargs):
+        super().__init__(**kwargs)
+        from pymongo import ASCENDING, DESCENDING
+        from models.mongo import create_mongo_client
+
+        mongo_uri = mongo_uri or os.getenv('MONGO_URI')
+        if not mongo_uri:
+            raise ValueError("MONGO_URI not found in environment variables")
+
+        self.client = create_mongo_client(mongo_uri)
+        self.collection = self.client['militaryDB'][collection_name]
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self.collection.create_index([('job_key', ASCENDING), ('created_at', DESCENDING)])
+        self.collection.create_index([('created_at', DESCENDING)])
+        # Only in-flight tasks carry active_job_key, so this allows one in-flight task per job key
+        self.collection.create_index('active_job_key', unique=True, sparse=True)
+
+    def _expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+
+    def _clean(self, doc: Optional[Dict]) -> Optional[Dict]:
+        if not doc:
+            return None
+        # The TTL monitor only runs about once a minute, so filter expired tasks here too
+        expires_at = doc.get('expires_at')
+        if expires_at and expires_at < datetime.utcnow():
+            return None
+        doc['task_id'] = doc['_id']
+        for field in INTERNAL_FIELDS:
+            doc.pop(field, None)
+        return doc
+
+    def create(self, task_id: str, fields: Dict):
+        now = time.time()
+        doc = dict(fields, _id=task_id, created_at=now, updated_at=now, expires_at=self._expiry())
+        if fields.get('job_key') and fields.get('status') in ACTIVE_STATUSES:
+            doc['active_job_key'] = fields['job_key']
+        self.collection.insert_one(doc)
+        self._enforce_max_size()
+        self._notify_change()
+
+    def claim(self, job_key: str, task_id: str, fields: Dict, reuse_window: float,
+              force: bool = False) -> Tuple[str, bool]:
+        from pymongo.errors import DuplicateKeyError
+
+        for _ in range(CLAIM_ATTEMPTS):
+            if force:
+                self.collection.update_many({'active_job_key': job_key}, {'$unset': {'active_job_key': ''}})
+            else:
+                latest = self.find_latest_by_job_key(job_key)
+                if is_reusable(latest, reuse_window):
+                    return latest['task_id'], False
+
+            try:
+                self.create(task_id, dict(fields, job_key=job_key))
+                return task_id, True
+            except DuplicateKeyError:
+                # Another process created the in-flight task for this job first
+                holder = self.collection.find_one({'active_job_key': job_key})
+                winner = self._clean(holder)
+                if winner is not None:
+                    return winner['task_id'], False
+                if holder is not None:
+                    # Expired but not yet removed by the TTL monitor; it no longer owns the key
+                    self.collection.update_one({'_id': holder['_id']}, {'$unset': {'active_job_key': ''}})
+                # Otherwise the winner finished or was evicted in between; claim again
+        raise RuntimeError(f"Could not claim a task for job {job_key}")
+
+    def _enforce_max_size(self):
+        excess = self.collection.estimated_document_count() - self.max_tasks
+        if excess <= 0:
+            return
+        oldest = self.collection.find({}, {'_id': 1}).sort('created_at', 1).limit(excess)
+        self.collection.delete_many({'_id': {'$in': [doc['_id'] for doc in oldest]}})
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        return self._clean(self.collection.find_one({'_id': task_id}))
+
+    def update(self, task_id: str, set_fields: Optional[Dict] = None, inc_fields: Optional[Dict] = None):
+        update = {'$set': dict(set_fields or {}, updated_at=time.time(), expires_at=self._expiry())}
+        if inc_fields:
+            update['$inc'] = inc_fields
+        if (set_fields or {}).get('status', ACTIVE_STATUSES[0]) not in ACTIVE_STATUSES:
+            # A finished task releases its job key for the next submission
+            update['$unset'] = {'active_job_key': ''}
+        self.collection.update_one({'_id': task_id}, update)
+        self._notify_change()
+
+    def find_latest_by_job_key(self, job_key: str) -> Optional[Dict]:
+        doc = self.collection.find_one({'job_key': job_key}, sort=[('created_at', -1)])
+        return self._clean(doc)
+
+    def list_tasks(self, offset: int = 0, limit: int = 50) -> Tuple[List[Dict], int]:
+        query = {'expires_at': {'$gt': datetime.utcnow()}}
+        total = self.collection.count_documents(query)
+        cursor = self.collection.find(query).sort('created_at', -1).skip(offset).limit(limit)
+        return [self._clean(doc) for doc in cursor], total
+
+
+class SQLiteTaskStatusStore(TaskStatusStore):
+    """Task status store backed by a local SQLite file, shared by workers on one host"""
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path or os.getenv('TASK_STORE_PATH') or os.path.join(tempfile.gettempdir(), 'military_tasks.sqlite3')
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    job_key TEXT,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    doc TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_job_key ON tasks (job_key, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the write lock up front so read-modify-write is atomic across processes"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _load(self, row) -> Optional[Dict]:
+        if not row:
+            return None
+        doc = json.loads(row[0])
+        doc['task_id'] = row[1]
+        return doc
+
+    def _insert(self, conn: sqlite3.Connection, task_id: str, fields: Dict):
+        now = time.time()
+        doc = dict(fields, created_at=now, updated_at=now)
+        conn.execute(
+            "INSERT INTO tasks (task_id, job_key, created_at, expires_at, doc) VALUES (?, ?, ?, ?, ?)",
+            (task_id, fields.get('job_key'), now, now + self.ttl_seconds, json.dumps(doc))
+        )
+        conn.execute("DELETE FROM tasks WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM tasks WHERE task_id IN "
+            "(SELECT task_id FROM tasks ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_tasks,)
+        )
+
+    def create(self, task_id: str, fields: Dict):
+        with self._transaction() as conn:
+            self._insert(conn, task_id, fields)
+        self._notify_change()
+
+    def claim(self, job_key: str, task_id: str, fields: Dict, reuse_window: float,
+              force: bool = False) -> Tuple[str, bool]:
+        # The lookup and the insert share one write transaction, so no other process can slip in between
+        with self._transaction() as conn:
+            if not force:
+                latest = self._load(conn.execute(
+                    "SELECT doc, task_id FROM tasks WHERE job_key = ? AND expires_at >= ? ORDER BY created_at DESC LIMIT 1",
+                    (job_key, time.time())
+                ).fetchone())
+                if is_reusable(latest, reuse_window):
+                    return latest['task_id'], False
+            self._insert(conn, task_id, dict(fields, job_key=job_key))
+        self._notify_change()
+        return task_id, True
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT doc, task_id FROM tasks WHERE task_id = ? AND expires_at >= ?",
+            (task_id, time.time())
+        ).fetchone()
+        return self._load(row)
+
+    def update(self, task_id: str, set_fields: Optional[Dict] = None, inc_fields: Optional[Dict] = None):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT doc FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row:
+                doc = json.loads(row[0])
+                _apply_dotted(doc, dict(set_fields or {}, updated_at=now), inc_fields or {})
+                conn.execute(
+                    "UPDATE tasks SET doc = ?, expires_at = ? WHERE task_id = ?",
+                    (json.dumps(doc), now + self.ttl_seconds, task_id)
+                )
+        self._notify_change()
+
+    def find_latest_by_job_key(self, job_key: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT doc, task_id FROM tasks WHERE job_key = ? AND expires_at >= ? ORDER BY created_at DESC LIMIT 1",
+            (job_key, time.time())
+        ).fetchone()
+        return self._load(row)
+
+    def list_tasks(self, offset: int = 0, limit: int = 50) -> Tuple[List[Dict], int]:
+        conn = self._connection()
+        now = time.time()
+        total = conn.execute("SELECT COUNT(*) FROM tasks WHERE expires_at >= ?", (now,)).fetchone()[0]
+        rows = conn.execute(
+            "SELECT doc, task_id FROM tasks WHERE expires_at >= ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (now, limit, offset)
+        ).fetchall()
+        return [self._load(row) for row in rows], total
+
+
+_task_store = None
+_task_store_lock = threading.Lock()
+
+
+def get_task_store() -> TaskStatusStore:
+    """
+    Return the process-wide task store.
+    TASK_STORE_BACKEND selects 'mongo' or 'sqlite'; defaults to mongo when MONGO_URI is set.
+    """
+    global _task_store
+    if _task_store is None:
+        with _task_store_lock:
+            if _task_store is None:
+                backend = os.getenv('TASK_STORE_BACKEND') or ('mongo' if os.getenv('MONGO_URI') else 'sqlite')
+                if backend == 'mongo':
+                    _task_store = MongoTaskStatusStore()
+                elif backend == 'sqlite':
+                    _task_store = SQLiteTaskStatusStore()
+                else:
+                    raise ValueError(f"Unknown TASK_STORE_BACKEND: {backend}")
+                logger.info(f"Using {backend} task status store")
+    return _task_store
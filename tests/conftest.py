@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+# Every test runs against the in-memory Mongo stand-in and a throwaway artifact directory
+os.environ['MONGO_URI'] = 'mongomock://'
+os.environ['ARTIFACT_DIR'] = tempfile.mkdtemp(prefix='military-artifacts-')
+os.environ.setdefault('TASK_STORE_BACKEND', 'mongo')
+os.environ['SKETCHFAB_RATE_LIMIT_SECONDS'] = '0'
+
+from benchmarks.common import FIXTURE_DIR, patch_mongomock_bulk_sort  # noqa: E402
+
+patch_mongomock_bulk_sort()
+
+
+@pytest.fixture(autouse=True)
+def fresh_mongo():
+    """A new, empty stand-in server (and no cached state built on the previous one) per test"""
+    from models import catalog, mongo
+
+    mongo._standin_store = None
+    catalog._cache.clear()
+    yield
+    import routes.military_info_power as military
+    military._military_service = None
+
+
+@pytest.fixture
+def db_manager():
+    from models.scrapper import DatabaseManager
+
+    manager = DatabaseManager()
+    yield manager
+    manager.close_connection()
+
+
+@pytest.fixture
+def fixture_html():
+    def load(filename):
+        with open(os.path.join(FIXTURE_DIR, filename), encoding='utf-8') as f:
+            return f.read()
+    return load
+
+
+
+@pytest.fixture
+def replay_transport(tmp_path):
+    """Replay-only HTTP transport serving the fixture pages as warpowerindia.com, plus their Sketchfab searches"""
+    from benchmarks.bench_pipeline import seed_cassettes_from_fixtures
+    from models.http_transport import HttpTransport, set_transport
+
+    transport = HttpTransport(mode='replay', cassette_dir=str(tmp_path / 'cassettes'))
+    seed_cassettes_from_fixtures(transport, 'india')
+    set_transport(transport)
+    yield transport
+    set_transport(None)
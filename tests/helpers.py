@@ -0,0 +1,14 @@
+"""Builders shared by the test modules"""
+
+
+def make_record(name, model=None, units=1, role='Fighter', **extra):
+    """A scraped warpower record as save_military_data receives it"""
+    return dict({
+        'name': name,
+        'model': model or name,
+        'units': units,
+        'role': role,
+        'description': 'No description available',
+        'image_url': None,
+        'sketchfab_embed_url': 'NOT FOUND'
+    }, **extra)
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+
+import pytest
+
+from helpers import make_record
+
+
+@pytest.fixture
+def service():
+    from routes.military_info_power import get_military_service
+
+    service = get_military_service()
+    yield service
+    if service._render_executor:
+        service._render_executor.shutdown(wait=True)
+
+
+def drain(service):
+    """Wait for every render queued so far (the executor runs them in order)"""
+    service._render_executor.submit(lambda: None).result(timeout=10)
+
+
+def test_saves_only_queue_rendering(service, db_manager, monkeypatch):
+    rendered_on = []
+    monkeypatch.setattr(service, 'render_artifacts',
+                        lambda country_id, power_type: rendered_on.append(threading.current_thread().name))
+
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Tejas')])
+    drain(service)
+
+    assert len(rendered_on) == 1
+    assert rendered_on[0].startswith('artifact-render')
+
+
+def test_queued_dataset_is_rendered_once(service, db_manager, monkeypatch):
+    release = threading.Event()
+    rendered = []
+    service.queue_artifacts('blocker', 'airpower')
+    monkeypatch.setattr(service, 'render_artifacts', lambda country_id, power_type: (release.wait(5), rendered.append(country_id)))
+    service._render_executor.submit(release.wait, 5)
+
+    assert service.queue_artifacts('c1', 'airpower') is True
+    assert service.queue_artifacts('c1', 'airpower') is False
+    assert service.queue_artifacts('c1', 'navalpower') is True
+    release.set()
+    drain(service)
+    assert rendered.count('c1') == 2
+
+
+def test_rendered_artifact_matches_the_live_response(service, db_manager):
+    from app import app
+
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Tejas', units=30), make_record('Rafale')])
+    drain(service)
+
+    version = db_manager.db['datasets'].find_one()['version']
+    path = service.artifacts.path('india', 'airpower', version)
+    assert os.path.exists(path)
+
+    client = app.test_client()
+    served = client.get('/api/military/india/airpower')
+    with open(path, 'rb') as f:
+        assert served.data == f.read()
+    service.artifacts.enabled = False
+    try:
+        live = client.get('/api/military/india/airpower')
+    finally:
+        service.artifacts.enabled = True
+    assert json.loads(served.data) == live.json
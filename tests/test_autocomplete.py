@@ -0,0 +1,116 @@
+import pytest
+
+from models import scrapper
+from models.sync import dataset_id
+from services import autocomplete
+from services.autocomplete import AutocompleteIndex
+
+from helpers import make_record
+
+PREFIXES = ['r', 'ra', 'raf', 'su', 'su-3', 'fi', 'fighter', 'tr', 'ki', 'omni', 'mig', 'x']
+
+
+@pytest.fixture
+def countries(db_manager):
+    ids = {name: db_manager.get_or_create_country(name) for name in ('india', 'france', 'russia')}
+    db_manager.save_military_data(ids['india'], 'airpower', [
+        make_record('Su-30MKI', units=260, country='India'), make_record('Dassault Rafale', model='Rafale', units=36, country='India'),
+        make_record('Hawk', units=100, role='Trainer', country='India')])
+    db_manager.save_military_data(ids['france'], 'airpower', [
+        make_record('Dassault Rafale', model='Rafale', units=200, role='Omnirole', country='France')])
+    db_manager.save_military_data(ids['russia'], 'navalpower', [
+        make_record('Kilo', units=20, role='Submarine', country='Russia')])
+    return ids
+
+
+@pytest.fixture
+def index(db_manager, countries):
+    index = AutocompleteIndex(db_manager.db)
+    index.suggest('warm')
+    return index
+
+
+def texts(suggestions):
+    return [(s['kind'], s['text']) for s in suggestions]
+
+
+def test_suggestions_are_ranked_by_units_across_datasets(index):
+    suggestions = index.suggest('ra')
+    assert texts(suggestions) == [('model', 'Rafale'), ('name', 'Dassault Rafale')]
+    assert (suggestions[0]['units'], suggestions[0]['countries'], suggestions[0]['power_types']) == \
+        (236, ['France', 'India'], ['airpower'])
+
+
+def test_prefixes_match_at_word_starts_and_ignore_case(index):
+    assert ('name', 'Dassault Rafale') in texts(index.suggest('RAF'))
+    assert texts(index.suggest('  dassault   r')) == [('name', 'Dassault Rafale')]
+    assert index.suggest('afale') == []
+
+
+def test_kind_filter_and_limit(index):
+    assert texts(index.suggest('s', kinds=['name'])) == [('name', 'Su-30MKI')]
+    assert texts(index.suggest('s', limit=2)) == [('model', 'Su-30MKI'), ('name', 'Su-30MKI')]
+
+
+def test_saves_update_only_their_dataset(index, db_manager, countries, monkeypatch):
+    applied = []
+    apply_dataset = index._apply_dataset
+
+    def spy(ds_id, *args, **kwargs):
+        applied.append(ds_id)
+        return apply_dataset(ds_id, *args, **kwargs)
+
+    index.suggest('ra')  # cached short prefix
+    monkeypatch.setattr(index, '_apply_dataset', spy)
+
+    db_manager.save_military_data(countries['india'], 'airpower', [
+        make_record('Su-30MKI', units=270, country='India'), make_record('Tejas', units=40, country='India')])
+
+    assert applied == [dataset_id(countries['india'], 'airpower')]
+
+    assert index.suggest('ra')[0]['units'] == 200
+    assert index.suggest('ra')[0]['countries'] == ['France']
+    assert texts(index.suggest('te')) == [('model', 'Tejas'), ('name', 'Tejas')]
+    assert index.suggest('hawk') == [] and index.suggest('trainer') == []
+    assert index.suggest('su')[0]['units'] == 270
+
+
+def test_incremental_index_matches_a_rebuilt_one(index, db_manager, countries):
+    db_manager.save_military_data(countries['russia'], 'airpower', [
+        make_record('Su-30MKI', units=120, country='Russia'), make_record('MiG-29', units=90, country='Russia')])
+    db_manager.save_military_data(countries['france'], 'airpower', [])
+    db_manager.save_military_data(countries['india'], 'navalpower', [
+        make_record('Kilo', units=7, role='Submarine', country='India')])
+    db_manager.save_military_data(countries['russia'], 'navalpower', [
+        make_record('Kirov', units=1, role='Cruiser', country='Russia')])
+
+    rebuilt = AutocompleteIndex(db_manager.db)
+    for prefix in PREFIXES:
+        assert index.suggest(prefix, limit=20) == rebuilt.suggest(prefix, limit=20), prefix
+
+
+def test_writes_from_other_processes_are_picked_up(index, db_manager, countries, monkeypatch):
+    # Another process saves: no commit listener runs here
+    monkeypatch.setattr(scrapper, '_commit_listeners', [])
+    db_manager.save_military_data(countries['france'], 'airpower', [make_record('Mirage 2000', units=40, country='France')])
+
+    monkeypatch.setattr(autocomplete, 'SYNC_INTERVAL_SECONDS', 3600)
+    assert index.suggest('mirage') == []
+
+    monkeypatch.setattr(autocomplete, 'SYNC_INTERVAL_SECONDS', 0)
+    assert texts(index.suggest('mirage')) == [('model', 'Mirage 2000'), ('name', 'Mirage 2000')]
+    assert index.suggest('ra')[0]['countries'] == ['India']
+
+
+@pytest.fixture
+def client(countries):
+    from app import app
+
+    return app.test_client()
+
+
+def test_autocomplete_endpoint(client):
+    response = client.get('/api/military/autocomplete?prefix=Ra&kind=model').json
+    assert (response['total_suggestions'], response['suggestions'][0]['text']) == (1, 'Rafale')
+    assert client.get('/api/military/autocomplete').status_code == 400
+    assert client.get('/api/military/autocomplete?prefix=ra&kind=country').status_code == 400
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from helpers import make_record
+
+
+@pytest.fixture
+def client(db_manager):
+    from app import app
+
+    for country, units in (('india', 30), ('russia', 40)):
+        country_id = db_manager.get_or_create_country(country)
+        db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', units=units)])
+        db_manager.save_military_data(country_id, 'navalpower', [make_record('Kilo', units=units // 10, role='Submarine')])
+    return app.test_client()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+
+@pytest.mark.parametrize('fields', ['', 'compact', 'units'])
+def test_streamed_batch_lines_carry_country_and_power_type(client, fields):
+    response = client.get(f'/api/military/batch?countries=india,russia,atlantis&fields={fields}',
+                          headers={'Accept': 'application/x-ndjson'})
+    lines = ndjson(response)
+    records = [line for line in lines if 'error' not in line]
+
+    attributed = {(line['country'], line['power_type'], line['units']) for line in records}
+    assert attributed == {('india', 'airpower', 30), ('russia', 'airpower', 40),
+                          ('india', 'navalpower', 3), ('russia', 'navalpower', 4)}
+    assert all('country_id' not in line for line in records)
+    assert {line['country'] for line in lines if 'error' in line} == {'atlantis'}
+
+
+def test_streamed_batch_matches_grouped_batch(client):
+    url = '/api/military/batch?countries=india,russia&power_types=airpower&fields=compact'
+    grouped = client.get(url).json['results']
+    streamed = ndjson(client.get(url, headers={'Accept': 'application/x-ndjson'}))
+
+    regrouped = {}
+    for line in streamed:
+        country, power_type = line.pop('country'), line.pop('power_type')
+        regrouped.setdefault(country, {}).setdefault(power_type, []).append(line)
+    assert regrouped == {country: {power_type: entry['data'] for power_type, entry in power_types.items()}
+                         for country, power_types in grouped.items()}
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from models.scrapper import MilitaryDataPipeline
+from services import bulk_crawl
+from services.bulk_crawl import Checkpoint
+
+TARGETS = [('india', 'airpower'), ('india', 'navalpower'), ('atlantis', 'airpower'), ('atlantis', 'navalpower')]
+
+
+@pytest.fixture
+def crawled(replay_transport, monkeypatch):
+    """Targets the pipeline was run for; atlantis has no cassettes, so its targets fail"""
+    calls = []
+    process = MilitaryDataPipeline.process_power_type
+
+    def record_call(self, country_id, country_name, power_type):
+        calls.append((country_name, power_type))
+        return process(self, country_id, country_name, power_type)
+
+    monkeypatch.setattr(MilitaryDataPipeline, 'process_power_type', record_call)
+    return calls
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    return str(tmp_path / 'crawl.jsonl')
+
+
+def crawl(checkpoint_path, capsys, *extra, countries='india,atlantis'):
+    code = bulk_crawl.main(['--countries', countries, '--power-types', 'airpower,navalpower',
+                            '--workers', '2', '--checkpoint', checkpoint_path, *extra])
+    return code, json.loads(capsys.readouterr().out)
+
+
+def write_interrupted_run(path):
+    """A run that crashed: one target done, one failed, and a half-written line"""
+    lines = [
+        json.dumps({'run_started_at': '2026-01-01T00:00:00', 'targets': [list(target) for target in TARGETS]}),
+        json.dumps({'country_name': 'india', 'power_type': 'airpower', 'status': 'success', 'count': 36}),
+        json.dumps({'country_name': 'india', 'power_type': 'navalpower', 'status': 'failed', 'count': 0}),
+        '{"country_name": "atlantis", "power_ty'
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def test_interrupted_run_resumes_with_the_targets_left(crawled, checkpoint_path, capsys):
+    write_interrupted_run(checkpoint_path)
+    code, report = crawl(checkpoint_path, capsys)
+
+    assert sorted(crawled) == sorted(TARGETS[1:])
+    assert (code, report['targets_skipped'], report['targets_run']) == (1, 1, 3)
+    assert set(report['failed']) == {'atlantis/airpower', 'atlantis/navalpower'}
+    assert report['records'] == 30
+
+
+def test_finished_run_starts_over(crawled, checkpoint_path, capsys):
+    crawl(checkpoint_path, capsys)
+    crawled.clear()
+    code, report = crawl(checkpoint_path, capsys)
+
+    assert sorted(crawled) == sorted(TARGETS)
+    assert report['targets_skipped'] == 0
+    entries = [json.loads(line) for line in open(checkpoint_path, encoding='utf-8')]
+    assert 'run_started_at' in entries[0] and 'run_finished_at' in entries[-1]
+    assert len(entries) == len(TARGETS) + 2
+
+
+@pytest.mark.parametrize('extra, countries', [(['--reset'], 'india,atlantis'), ([], 'india')],
+                         ids=['reset', 'different-targets'])
+def test_unfinished_run_is_discarded(crawled, checkpoint_path, capsys, extra, countries):
+    write_interrupted_run(checkpoint_path)
+    code, report = crawl(checkpoint_path, capsys, *extra, countries=countries)
+
+    expected = [target for target in TARGETS if target[0] in countries.split(',')]
+    assert sorted(crawled) == sorted(expected)
+    assert report['targets_skipped'] == 0
+
+
+def test_only_successful_targets_count_as_completed(checkpoint_path):
+    write_interrupted_run(checkpoint_path)
+    assert Checkpoint(checkpoint_path).begin(TARGETS) == {('india', 'airpower')}
+    # Resuming does not rewrite the file
+    assert Checkpoint(checkpoint_path).begin(TARGETS) == {('india', 'airpower')}
@@ -0,0 +1,78 @@
+from models.catalog import CATALOG_COLLECTION, catalog_id, migrate_to_catalog
+from models.sync import get_dataset
+
+from helpers import make_record
+
+
+def entry(db_manager, power_type, name):
+    return db_manager.db[CATALOG_COLLECTION].find_one({'_id': catalog_id({'name': name}, power_type)})
+
+
+def test_same_name_in_two_power_types_gets_two_entries(db_manager):
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Vikrant', description='A jet')])
+    db_manager.save_military_data(country_id, 'navalpower', [make_record('Vikrant', description='A carrier')])
+
+    assert entry(db_manager, 'airpower', 'Vikrant')['description'] == 'A jet'
+    assert entry(db_manager, 'navalpower', 'Vikrant')['description'] == 'A carrier'
+    served = {power_type: db_manager.get_military_data(country_id, power_type)[0]['description']
+              for power_type in ('airpower', 'navalpower')}
+    assert served == {'airpower': 'A jet', 'navalpower': 'A carrier'}
+
+
+def test_newer_real_value_replaces_older_one(db_manager):
+    india = db_manager.get_or_create_country('india')
+    russia = db_manager.get_or_create_country('russia')
+    db_manager.save_military_data(india, 'airpower', [make_record('Su-30MKI', description='Old copy', image_url='old.png')])
+    db_manager.save_military_data(russia, 'airpower', [make_record('Su-30MKI', description='New copy', image_url='new.png')])
+
+    stored = entry(db_manager, 'airpower', 'Su-30MKI')
+    assert (stored['description'], stored['image_url']) == ('New copy', 'new.png')
+    # The other country's record serves the new copy and was stamped for delta sync
+    assert db_manager.get_military_data(india, 'airpower')[0]['description'] == 'New copy'
+    assert get_dataset(db_manager.db, india, 'airpower')['version'] == get_dataset(db_manager.db, russia, 'airpower')['version']
+
+
+def test_placeholder_never_replaces_a_real_value(db_manager):
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', description='Real copy')])
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI')])
+
+    assert entry(db_manager, 'airpower', 'Su-30MKI')['description'] == 'Real copy'
+
+
+def test_curated_fields_survive_later_scrapes(db_manager):
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', description='Scraped', image_url='a.png')])
+    version = get_dataset(db_manager.db, country_id, 'airpower')['version']
+
+    assert db_manager.curate_catalog_entry(catalog_id({'name': 'Su-30MKI'}, 'airpower'), {'description': 'Curated'})
+    assert get_dataset(db_manager.db, country_id, 'airpower')['version'] > version
+    assert db_manager.get_military_data(country_id, 'airpower')[0]['description'] == 'Curated'
+
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', description='Rescraped', image_url='b.png')])
+    stored = entry(db_manager, 'airpower', 'Su-30MKI')
+    assert (stored['description'], stored['image_url']) == ('Curated', 'b.png')
+
+
+def test_curating_a_missing_entry_changes_nothing(db_manager):
+    assert not db_manager.curate_catalog_entry('airpower:nothing', {'description': 'Curated'})
+    assert db_manager.db[CATALOG_COLLECTION].count_documents({}) == 0
+
+
+def test_migration_rekeys_entries_without_power_type(db_manager):
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.db[CATALOG_COLLECTION].insert_one({'_id': 'kilo', 'description': 'A submarine', 'image_url': 'kilo.png'})
+    db_manager.db['navalpower'].insert_many([
+        dict(make_record('Kilo', role='Submarine'), country_id=country_id, catalog_id='kilo'),
+        dict(make_record('Talwar', role='Frigate', description='A frigate'), country_id=country_id),
+    ])
+    for doc in db_manager.db['navalpower'].find({'catalog_id': 'kilo'}):
+        db_manager.db['navalpower'].update_one({'_id': doc['_id']}, {'$unset': {'description': '', 'image_url': ''}})
+
+    assert migrate_to_catalog(db_manager.db)['navalpower'] == 2
+    assert migrate_to_catalog(db_manager.db)['navalpower'] == 0
+    assert entry(db_manager, 'navalpower', 'Kilo')['description'] == 'A submarine'
+    served = {doc['name']: (doc['catalog_id'], doc['description'])
+              for doc in db_manager.get_military_data(country_id, 'navalpower')}
+    assert served == {'Kilo': ('navalpower:kilo', 'A submarine'), 'Talwar': ('navalpower:talwar', 'A frigate')}
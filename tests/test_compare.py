@@ -0,0 +1,124 @@
+from collections import defaultdict
+
+import pytest
+
+from services.compare import CompareService
+
+from helpers import make_record
+
+INVENTORIES = {
+    'india': {
+        'airpower': [make_record('Su-30MKI', units=260, assessment='Active'), make_record('Rafale', units=36, assessment='Active'),
+                     make_record('Tejas', units=40, assessment='Reserve'), make_record('Hawk', units=100, role='Trainer')],
+        'navalpower': [make_record('Kilo', units=7, role='Submarine')],
+    },
+    'russia': {
+        'airpower': [make_record('Su-30MKI', units=120, assessment='Active'), make_record('Su-57', units=22, assessment='Active'),
+                     make_record('Unknown jet', model='Unknown', units=5)],
+        'navalpower': [make_record('Kilo', units=20, role='Submarine'), make_record('Kirov', units=1, role='Cruiser')],
+    },
+    'pakistan': {
+        'airpower': [make_record('JF-17', units=150), make_record('Hawk', units=10, role='Trainer')],
+    },
+}
+
+
+def expected_comparison(countries, power_types):
+    """The same comparison computed record by record"""
+    fielded = defaultdict(set)
+    for country in countries:
+        for power_type in power_types:
+            for record in INVENTORIES[country].get(power_type, []):
+                if record['model'] != 'Unknown':
+                    fielded[(power_type, record['model'])].add(country)
+
+    result = {}
+    for country in countries:
+        result[country] = {}
+        for power_type in power_types:
+            records = INVENTORIES[country].get(power_type, [])
+            comparison = {'total_units': sum(r['units'] for r in records), 'total_records': len(records),
+                          'by_role': {}, 'by_assessment': {},
+                          'unique_models': sorted(m for (p, m), owners in fielded.items() if p == power_type and owners == {country})}
+            for facet, field in (('by_role', 'role'), ('by_assessment', 'assessment')):
+                for record in records:
+                    bucket = comparison[facet].setdefault(str(record.get(field, 'Unknown')), {'units': 0, 'records': 0})
+                    bucket['units'] += record['units']
+                    bucket['records'] += 1
+            result[country][power_type] = comparison
+    return result
+
+
+@pytest.fixture
+def country_ids(db_manager):
+    ids = {}
+    for country, inventory in INVENTORIES.items():
+        ids[country] = db_manager.get_or_create_country(country)
+        for power_type, records in inventory.items():
+            db_manager.save_military_data(ids[country], power_type, records)
+    return ids
+
+
+@pytest.mark.parametrize('countries', [('india', 'russia'), ('india', 'russia', 'pakistan')])
+def test_facet_comparison_matches_a_record_by_record_count(db_manager, country_ids, countries):
+    power_types = ['airpower', 'navalpower', 'droneforce']
+    comparison, cached = CompareService(db_manager.db).compare({c: country_ids[c] for c in countries}, power_types)
+
+    assert not cached
+    assert comparison == expected_comparison(countries, power_types)
+    # Breakdowns are ordered by units, largest first
+    assert list(comparison['india']['airpower']['by_role']) == ['Fighter', 'Trainer']
+
+
+def test_cached_until_a_compared_dataset_changes(db_manager, country_ids):
+    service = CompareService(db_manager.db)
+    countries = {'india': country_ids['india'], 'russia': country_ids['russia']}
+    first, _ = service.compare(countries, ['airpower'])
+    assert service.compare(countries, ['airpower']) == (first, True)
+
+    # Another country's save leaves the entry valid
+    db_manager.save_military_data(country_ids['pakistan'], 'airpower', [make_record('JF-17', units=160)])
+    assert service.compare(countries, ['airpower'])[1] is True
+
+    db_manager.save_military_data(country_ids['russia'], 'airpower', [make_record('Su-57', units=30)])
+    refreshed, cached = service.compare(countries, ['airpower'])
+    assert not cached
+    assert refreshed['russia']['airpower']['total_units'] == 30
+    assert refreshed['india']['airpower']['unique_models'] == ['Hawk', 'Rafale', 'Su-30MKI', 'Tejas']
+    assert service.stats == {'hits': 2, 'misses': 2}
+
+
+def test_cache_evicts_the_least_recently_used_entry(db_manager, country_ids):
+    service = CompareService(db_manager.db, cache_size=2)
+    pairs = [{'india': country_ids['india'], other: country_ids[other]} for other in ('russia', 'pakistan')]
+    for countries in pairs:
+        service.compare(countries, ['airpower'])
+    service.compare(pairs[0], ['airpower'])
+    service.compare(pairs[0], ['navalpower'])
+
+    assert service.compare(pairs[0], ['airpower'])[1] is True
+    assert service.compare(pairs[1], ['airpower'])[1] is False
+
+
+@pytest.fixture
+def client(country_ids):
+    from app import app
+
+    return app.test_client()
+
+
+def test_compare_endpoint(client):
+    response = client.get('/api/military/compare?countries=India,russia,india&power_type=navalpower')
+    assert response.status_code == 200
+    assert response.json['countries'] == ['india', 'russia']
+    assert response.json['comparison'] == expected_comparison(('india', 'russia'), ['navalpower'])
+    assert client.get('/api/military/compare?countries=india,russia&power_type=navalpower').json['cached'] is True
+
+
+@pytest.mark.parametrize('query, status', [
+    ('countries=india', 400),
+    ('countries=india,russia&power_type=spacepower', 400),
+    ('countries=india,atlantis', 404),
+])
+def test_compare_endpoint_rejects_bad_requests(client, query, status):
+    assert client.get(f'/api/military/compare?{query}').status_code == status
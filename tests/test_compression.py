@@ -0,0 +1,122 @@
+import gzip
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from routes import compression
+from routes.compression import CompressionCache, init_compression
+
+from helpers import make_record
+
+LARGE = {'items': [{'name': f'Item {n}', 'units': n} for n in range(200)]}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CompressionCache()
+    monkeypatch.setattr(compression, 'compression_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    app = Flask(__name__)
+    init_compression(app)
+    payload = {'large': LARGE}
+
+    @app.route('/large')
+    def large():
+        return jsonify(payload['large'])
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/missing')
+    def missing():
+        return jsonify(dict(LARGE, error='not found')), 404
+
+    @app.route('/stream')
+    def stream():
+        return Response((f'{n}\n' * 100 for n in range(50)), mimetype='text/plain')
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' * 1000, mimetype='image/png')
+
+    client = app.test_client()
+    client.payload = payload
+    return client
+
+
+def test_gzip_when_accepted(client):
+    plain = client.get('/large')
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data)
+    assert 'Accept-Encoding' in plain.headers['Vary'] and 'Accept-Encoding' in compressed.headers['Vary']
+
+
+@pytest.mark.parametrize('accept', [None, 'identity', 'gzip;q=0', 'deflate', 'br;q=0'])
+def test_identity_unless_a_supported_encoding_is_accepted(client, accept):
+    headers = {'Accept-Encoding': accept} if accept else {}
+    response = client.get('/large', headers=headers)
+    assert 'Content-Encoding' not in response.headers
+    assert response.json == LARGE
+
+
+def test_brotli_is_preferred_when_available(client, monkeypatch):
+    monkeypatch.setitem(compression.ENCODERS, 'br', lambda body: b'br:' + body)
+    assert client.get('/large', headers={'Accept-Encoding': 'gzip, br'}).headers['Content-Encoding'] == 'br'
+    assert client.get('/large', headers={'Accept-Encoding': 'gzip, br;q=0'}).headers['Content-Encoding'] == 'gzip'
+
+
+@pytest.mark.parametrize('path', ['/small', '/missing', '/stream', '/image'])
+def test_ineligible_responses_are_sent_as_is(client, path):
+    response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_identical_bodies_are_compressed_once(client, cache):
+    first = client.get('/large', headers={'Accept-Encoding': 'gzip'}).data
+    second = client.get('/large', headers={'Accept-Encoding': 'gzip'}).data
+
+    assert first == second
+    assert (cache.stats['cache_misses'], cache.stats['cache_hits']) == (1, 1)
+    assert cache.describe()['cache_entries'] == 1
+
+
+def test_changed_body_is_never_served_stale(client, cache):
+    client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    client.payload['large'] = dict(LARGE, version=2)
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+    assert gzip.decompress(response.data) == client.get('/large').data
+    assert (cache.stats['cache_misses'], cache.stats['cache_hits']) == (2, 0)
+
+
+def test_cache_is_bounded_by_size():
+    cache = CompressionCache(max_bytes=100)
+    cache.put('a', b'x' * 40)
+    cache.put('b', b'x' * 40)
+    cache.get('a')
+    cache.put('c', b'x' * 40)
+    cache.put('huge', b'x' * 101)
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c'), cache.get('huge')) == (b'x' * 40, None, b'x' * 40, None)
+    assert cache.describe()['cache_bytes'] == 80
+
+
+def test_app_compresses_api_responses(db_manager):
+    from app import app
+
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record(f'Type {n}', units=n) for n in range(60)])
+    client = app.test_client()
+    plain = client.get('/api/military/india/airpower?limit=100')
+    compressed = client.get('/api/military/india/airpower?limit=100', headers={'Accept-Encoding': 'gzip'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
@@ -0,0 +1,109 @@
+import copy
+import re
+from urllib.parse import urljoin
+
+import pytest
+
+from benchmarks.common import WARPOWER_LIST, load_fixtures
+from models.html_parsing import make_soup
+from models.scrapper import WebScraper
+
+BASE_URL = 'https://www.warpowerindia.com/'
+
+
+def legacy_extract_element_data(element, base_url, country_name):
+    """WebScraper._extract_element_data as it was before the compiled extractor, find() by find()"""
+    try:
+        service_element = element.find('span', class_='textWhite textNormal textBold')
+        service = service_element.text.strip() if service_element else "Unknown"
+        img_element = element.find('img', class_='entryImg')
+        img_url = urljoin(base_url, img_element['src']) if img_element and img_element.get('src') else None
+        assessment_element = element.find('div', class_='assessmentBox')
+        assessment = assessment_element.find('span', class_='textNormal textWhite').text.strip() if assessment_element else "Unknown"
+        flag_url = f"flags/{country_name.lower()}.jpg"
+        units_element = element.find('span', class_='textJumbo')
+        units = int(units_element.text.strip()) if units_element else 0
+        name_element = element.find('span', class_='textYellowOrange')
+        model_element = element.find('span', class_='textWhite textLarge textBold')
+        aircraft_name = name_element.text.strip() if name_element else "Unknown"
+        full_model_text = model_element.text.strip() if model_element else ""
+        model = "Unknown"
+        model_match = re.search(r'\((.*?)\)', full_model_text)
+        if model_match:
+            model = model_match.group(1).strip()
+        role_element = element.find('span', class_='textNormal textLtstGray')
+        role = role_element.text.replace('Role:', '').strip() if role_element else "Unknown"
+        desc_element = element.find('span', class_='textSmall1 textWhite')
+        description = desc_element.text.strip() if desc_element else "No description available"
+        return {
+            "service": service, "name": aircraft_name, "model": model, "country": country_name.title(),
+            "units": units, "role": role, "assessment": assessment, "description": description,
+            "image_url": img_url, "flag_url": flag_url
+        }
+    except Exception:
+        return None
+
+
+def fixture_items():
+    for filename, html in load_fixtures(WARPOWER_LIST):
+        for element in make_soup(html, backend='html.parser').find_all('div', class_='mainCol'):
+            yield filename, element
+
+
+def first_item():
+    return copy.copy(next(fixture_items())[1])
+
+
+def test_compiled_extractor_matches_legacy_on_every_fixture_item():
+    scraper = WebScraper()
+    compared = 0
+    for filename, element in fixture_items():
+        expected = legacy_extract_element_data(element, BASE_URL, 'india')
+        assert scraper._extract_element_data(element, BASE_URL, 'india') == expected, filename
+        compared += 1
+    assert compared == 36 + 40 + 30 + 18
+
+
+def set_units(element, value):
+    element.find('span', class_='textJumbo').string = value
+
+
+def drop_assessment_value(element):
+    element.find('div', class_='assessmentBox').find('span', class_='textNormal textWhite').decompose()
+
+
+def drop_assessment_box(element):
+    element.find('div', class_='assessmentBox').decompose()
+
+
+def drop_every(tag, css_class):
+    def mutate(element):
+        for node in element.find_all(tag, class_=css_class):
+            node.decompose()
+    return mutate
+
+
+@pytest.mark.parametrize('mutate', [
+    lambda element: set_units(element, '1,200'),
+    lambda element: set_units(element, ' 42 '),
+    lambda element: set_units(element, 'n/a'),
+    drop_assessment_value,
+    drop_assessment_box,
+    drop_every('span', 'textJumbo'),
+    drop_every('img', 'entryImg'),
+    drop_every('span', 'textYellowOrange'),
+    drop_every('span', 'textSmall1 textWhite'),
+], ids=['units-with-separator', 'units-padded', 'units-text', 'assessment-without-value',
+        'no-assessment-box', 'no-units', 'no-image', 'no-name', 'no-description'])
+def test_compiled_extractor_matches_legacy_on_edge_cases(mutate):
+    element = first_item()
+    mutate(element)
+    expected = legacy_extract_element_data(element, BASE_URL, 'india')
+    assert WebScraper()._extract_element_data(element, BASE_URL, 'india') == expected
+
+
+def test_items_the_legacy_code_dropped_are_still_dropped():
+    for mutate in (lambda element: set_units(element, '1,200'), drop_assessment_value):
+        element = first_item()
+        mutate(element)
+        assert WebScraper()._extract_element_data(element, BASE_URL, 'india') is None
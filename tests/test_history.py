@@ -0,0 +1,107 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.history import HEADS_COLLECTION, SNAPSHOTS_COLLECTION, SnapshotHistory, equipment_key, keyed_records
+
+from helpers import make_record
+
+STREAM = 'airpower:india'
+RAFALE = equipment_key(make_record('Rafale'))
+START = datetime(2026, 1, 1)
+
+
+def evolve(records, rng):
+    """Next scrape: some unit counts change, a field comes or goes, a record is dropped or added"""
+    records = [dict(record) for record in records]
+    for record in rng.sample(records, k=min(2, len(records))):
+        record['units'] += rng.randint(1, 5)
+    flagged = rng.choice(records)
+    if 'assessment' in flagged:
+        del flagged['assessment']
+    else:
+        flagged['assessment'] = rng.choice(['Active', 'Reserve'])
+    if len(records) > 3 and rng.random() < 0.5:
+        records.remove(rng.choice(records))
+    if rng.random() < 0.6:
+        records.append(make_record(f"Type {rng.randint(100, 999)}.{rng.choice('$ab')}", units=rng.randint(1, 50)))
+    return records
+
+
+@pytest.fixture
+def history(db_manager):
+    return SnapshotHistory(db_manager.db, keyframe_interval=4)
+
+
+@pytest.fixture
+def scrapes(history):
+    """Twelve recorded scrapes of one stream, one hour apart: [(version, taken_at, records)]"""
+    rng = random.Random(37)
+    # Two records share a key (same service/name/model) and must both survive the round trip
+    records = [make_record('Su-30MKI', units=200), make_record('Su-30MKI', units=12, role='Trainer'),
+               make_record('Rafale', units=36), make_record('Tejas', units=40)]
+    recorded = []
+    for n in range(12):
+        if n:
+            records = evolve(records, rng)
+        taken_at = START + timedelta(hours=n)
+        version = history.record(STREAM, records, taken_at=taken_at)
+        assert version == n + 1
+        recorded.append((version, taken_at, records))
+    return recorded
+
+
+def test_every_version_reconstructs_exactly(history, scrapes):
+    # The seeded scrapes exercise every kind of change
+    summaries = [version['summary'] for version in history.versions(STREAM)[1:]]
+    assert all(any(summary[kind] for summary in summaries) for kind in ('added', 'removed', 'changed'))
+    for version, taken_at, records in scrapes:
+        assert history.snapshot_at(STREAM, seq=version) == (version, keyed_records(records, equipment_key))
+        assert history.snapshot_at(STREAM, at=taken_at + timedelta(minutes=30)) == (version, keyed_records(records, equipment_key))
+
+
+def test_keyframes_bound_each_reconstruction(history, scrapes):
+    kinds = {version['seq']: version['kind'] for version in history.versions(STREAM)}
+    assert [seq for seq, kind in sorted(kinds.items()) if kind == 'keyframe'] == [1, 5, 9]
+    # Either side of each keyframe boundary
+    for seq in (4, 5, 6, 8, 9, 10, 12):
+        assert history.snapshot_at(STREAM, seq=seq)[1] == keyed_records(scrapes[seq - 1][2], equipment_key)
+
+
+def test_nothing_before_the_first_version(history, scrapes):
+    assert history.snapshot_at(STREAM, at=START - timedelta(seconds=1)) == (None, {})
+    assert history.snapshot_at('airpower:nowhere') == (None, {})
+
+
+def test_metadata_only_changes_add_no_versions(history, db_manager):
+    records = [make_record('Rafale', units=36), make_record('Tejas', units=40)]
+    assert history.record(STREAM, records, taken_at=START) == 1
+
+    restamped = [dict(record, _id=n, country_id='india', scraped_at=START, last_updated=START,
+                      record_key=f'key-{n}', change_token=99) for n, record in enumerate(records)]
+    checked_at = START + timedelta(days=1)
+    assert history.record(STREAM, restamped, taken_at=checked_at) is None
+
+    assert db_manager.db[SNAPSHOTS_COLLECTION].count_documents({'stream': STREAM}) == 1
+    head = db_manager.db[HEADS_COLLECTION].find_one({'stream': STREAM})
+    assert (head['seq'], head['last_changed_at'], head['last_checked_at']) == (1, START, checked_at)
+
+    # A real change after the metadata-only scrape is a delta against the unchanged head
+    records[0]['units'] = 40
+    assert history.record(STREAM, records, taken_at=checked_at + timedelta(hours=1)) == 2
+    delta = db_manager.db[SNAPSHOTS_COLLECTION].find_one({'stream': STREAM, 'seq': 2})['delta']
+    assert delta == {'added': [], 'removed': [],
+                     'changed': [{'key': RAFALE, 'set': {'units': 40}, 'unset': []}]}
+
+
+def test_field_series_spans_keyframes(history):
+    for n, units in enumerate([10, 10, 12, 12, 12, 15, None, 20]):
+        records = [make_record('Tejas', units=40)]
+        if units is not None:
+            records.append(make_record('Rafale', units=units, description=f'scrape {n}'))
+        history.record(STREAM, records, taken_at=START + timedelta(hours=n))
+
+    series = history.field_series(STREAM, 'units', lambda key, record: record.get('name') == 'Rafale')
+    assert [(point['seq'], point['units']) for point in series[RAFALE]] == \
+        [(1, 10), (3, 12), (6, 15), (7, None), (8, 20)]
@@ -0,0 +1,57 @@
+import importlib
+
+import pytest
+
+from benchmarks.bench_parsers import EXTRACTORS
+from benchmarks.common import GFP_DETAIL, WARPOWER_LIST, load_fixtures, page_kind
+from models import html_parsing
+
+BACKENDS = [backend for backend in html_parsing.BACKENDS if backend != 'lxml' or html_parsing.LXML_AVAILABLE]
+PAGES = load_fixtures()
+
+
+def test_full_parse_is_the_default(monkeypatch):
+    monkeypatch.delenv('HTML_PARSER_BACKEND', raising=False)
+    try:
+        assert importlib.reload(html_parsing).DEFAULT_BACKEND == 'html.parser'
+        monkeypatch.setenv('HTML_PARSER_BACKEND', 'strained')
+        assert importlib.reload(html_parsing).DEFAULT_BACKEND == 'strained'
+    finally:
+        monkeypatch.undo()
+        importlib.reload(html_parsing)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('filename, html', PAGES, ids=[filename for filename, _ in PAGES])
+def test_every_backend_extracts_what_the_full_parse_extracts(filename, html, backend):
+    extract = EXTRACTORS[page_kind(filename)]
+    expected = extract(html, 'html.parser')
+    assert expected
+    assert extract(html, backend) == expected
+
+
+def fixture(kind):
+    return next(html for filename, html in PAGES if page_kind(filename) == kind)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('edit', [
+    # Items nested deeper than usual, inside unrelated wrappers
+    lambda html: html.replace('<div class="mainCol picTrans2"', '<section><div class="mainCol picTrans2"', 1)
+                     .replace('</body>', '</section></body>', 1),
+    # Extra classes and whitespace around the one the strainer matches
+    lambda html: html.replace('class="mainCol picTrans2"', 'class="  wide mainCol   picTrans2 "'),
+], ids=['nested-items', 'class-whitespace'])
+def test_strainer_keeps_items_in_unusual_markup(edit, backend):
+    html = edit(fixture(WARPOWER_LIST))
+    extract = EXTRACTORS[WARPOWER_LIST]
+    assert extract(html, backend) == extract(html, 'html.parser')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_gfp_page_without_content_wrapper_falls_back_to_a_full_parse(backend):
+    html = fixture(GFP_DETAIL).replace('contentSpecs', 'contentBlock')
+    extract = EXTRACTORS[GFP_DETAIL]
+    expected = extract(html, 'html.parser')
+    assert expected
+    assert extract(html, backend) == expected
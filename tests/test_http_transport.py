@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+import requests
+
+from models import http_transport
+from models.http_transport import CassetteMissError, HttpTransport, InjectedConnectionError
+from models.scrapper import MilitaryDataPipeline
+
+URL = 'https://gnews.io/api/v4/search'
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError('replay mode must not touch the network')
+    monkeypatch.setattr(requests, 'get', refuse)
+
+
+@pytest.fixture
+def transport(tmp_path):
+    return HttpTransport(mode='replay', cassette_dir=str(tmp_path))
+
+
+def test_replay_serves_the_recorded_response(transport):
+    transport.save_cassette(URL, {'q': 'navy', 'apikey': 'secret'}, 200, 'Ünïcode body'.encode('latin-1'),
+                            'text/plain; charset=latin-1', 'latin-1')
+    # Credentials are not part of the key: a different key replays the same cassette
+    response = transport.get(URL, params={'apikey': 'other', 'q': 'navy'})
+
+    assert (response.status_code, response.text, response.headers['Content-Type']) == \
+        (200, 'Ünïcode body', 'text/plain; charset=latin-1')
+    path = transport.cassette_path(URL, {'q': 'navy'})
+    with open(path, encoding='utf-8') as f:
+        cassette = json.load(f)
+    assert cassette['request']['params'] == {'q': 'navy'}
+    assert 'secret' not in json.dumps(cassette)
+    assert os.path.dirname(path).endswith('gnews.io')
+    assert transport.stats == {'requests': 1, 'replayed': 1, 'recorded': 1, 'misses': 0, 'injected_errors': 0}
+
+
+def test_missing_cassette_raises_a_connection_error(transport):
+    with pytest.raises(http_transport.RequestException):
+        transport.get(URL, params={'q': 'unrecorded'})
+    with pytest.raises(CassetteMissError):
+        transport.get(URL, params={'q': 'unrecorded'})
+    assert transport.stats['misses'] == 2
+
+
+@pytest.mark.parametrize('kind', ['status', 'connection'])
+def test_injected_faults(tmp_path, kind):
+    transport = HttpTransport(mode='replay', cassette_dir=str(tmp_path), error_rate=1, error_kind=kind)
+    transport.save_cassette(URL, None, 200, b'ok')
+    if kind == 'status':
+        assert transport.get(URL).status_code == 503
+    else:
+        with pytest.raises(InjectedConnectionError):
+            transport.get(URL)
+    assert transport.stats['injected_errors'] == 1
+
+
+def test_seeded_fault_injection_is_deterministic(tmp_path):
+    def outcomes(seed):
+        transport = HttpTransport(mode='replay', cassette_dir=str(tmp_path), error_rate=0.3, error_kind='mixed', seed=seed)
+        transport.save_cassette(URL, None, 200, b'ok')
+        results = []
+        for _ in range(40):
+            try:
+                results.append(transport.get(URL).status_code)
+            except InjectedConnectionError:
+                results.append('connection')
+        return results
+
+    first = outcomes(7)
+    assert first == outcomes(7)
+    assert {200, 503, 'connection'} <= set(first)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        HttpTransport(mode='offline')
+
+
+def test_pipeline_runs_end_to_end_from_cassettes(replay_transport, db_manager):
+    pipeline = MilitaryDataPipeline()
+    country_id = pipeline.db_manager.get_or_create_country('india')
+    result = pipeline.process_power_type(country_id, 'india', 'airpower')
+
+    assert (result['status'], result['count']) == ('success', 36)
+    records = db_manager.get_military_data(country_id, 'airpower')
+    assert len(records) == 36
+    assert all(record['sketchfab_embed_url'].startswith('https://sketchfab.com/models/')
+               for record in records if record['model'] != 'Unknown')
+    assert replay_transport.stats['misses'] == 0
+
+    # A rerun finds every Sketchfab link in the catalog and only fetches the page again
+    replayed = replay_transport.stats['replayed']
+    assert pipeline.process_power_type(country_id, 'india', 'airpower')['status'] == 'success'
+    assert replay_transport.stats['replayed'] == replayed + 1
+    pipeline.cleanup()
+
+
+def test_pipeline_reports_pages_without_cassettes(replay_transport):
+    pipeline = MilitaryDataPipeline()
+    country_id = pipeline.db_manager.get_or_create_country('atlantis')
+    result = pipeline.process_power_type(country_id, 'atlantis', 'airpower')
+
+    assert (result['status'], result['count']) == ('failed', 0)
+    assert replay_transport.stats['misses'] == 1
+    pipeline.cleanup()
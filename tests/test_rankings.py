@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pytest
+
+from models.ranking_index import RANKINGS_COLLECTION, RankingIndex
+
+
+def metric(label, value, rank=None, total=None):
+    entry = {'label': label, 'value': f'{value:,}', 'numeric_value': value, 'percentage': None}
+    if rank:
+        entry['ranking'] = {'current_rank': rank, 'total_countries': total}
+    return entry
+
+
+def gfp_doc(country_id, *metrics):
+    return {'country_id': country_id, 'scraped_at': datetime.utcnow(), 'metrics': list(metrics)}
+
+
+def leaderboard(db_manager, slug):
+    rows, total = RankingIndex(db_manager.db).top(slug, limit=50)
+    return [(row['country_id'], row['rank']) for row in rows], total
+
+
+@pytest.fixture
+def ranked(db_manager):
+    db_manager.save_gfp_metrics([
+        gfp_doc('india', metric('Tanks:', 4201), metric('Aircraft Carriers', 2, rank=6, total=145)),
+        gfp_doc('russia', metric('Tanks:', 14777), metric('Aircraft Carriers', 1, rank=9, total=145)),
+        gfp_doc('china', metric('Tanks:', 4950)),
+    ])
+    return db_manager
+
+
+def test_value_ranks_follow_the_values(ranked):
+    assert leaderboard(ranked, 'tanks') == ([('russia', 1), ('china', 2), ('india', 3)], 3)
+    row = RankingIndex(ranked.db).rank_of('tanks', 'india')
+    assert (row['label'], row['display_value'], row['total_countries'], row['rank_source']) == ('Tanks', '4,201', 3, 'value')
+
+
+def test_published_ranks_are_kept(ranked):
+    assert leaderboard(ranked, 'aircraft-carriers') == ([('india', 6), ('russia', 9)], 2)
+    assert RankingIndex(ranked.db).rank_of('aircraft-carriers', 'russia')['total_countries'] == 145
+
+
+def test_updating_one_country_reranks_its_metrics(ranked):
+    ranked.save_gfp_metrics([gfp_doc('india', metric('Tanks', 20000), metric('Aircraft Carriers', 2, rank=6, total=145))])
+    assert leaderboard(ranked, 'tanks') == ([('india', 1), ('russia', 2), ('china', 3)], 3)
+
+    # Ties share a rank
+    ranked.save_gfp_metrics([gfp_doc('china', metric('Tanks', 14777))])
+    rows, total = leaderboard(ranked, 'tanks')
+    assert (dict(rows), total) == ({'india': 1, 'china': 2, 'russia': 2}, 3)
+
+
+def test_dropped_metric_leaves_its_leaderboard(ranked):
+    ranked.save_gfp_metrics([gfp_doc('russia', metric('Aircraft Carriers', 1, rank=9, total=145))])
+    assert leaderboard(ranked, 'tanks') == ([('china', 1), ('india', 2)], 2)
+    assert ranked.db[RANKINGS_COLLECTION].count_documents({'country_id': 'russia'}) == 1
+
+
+def test_text_values_are_ranked_by_their_number(db_manager):
+    db_manager.save_gfp_metrics([
+        gfp_doc('india', {'label': 'Defense Budget', 'value': '$75,000,000,000'}),
+        gfp_doc('japan', {'label': 'Defense Budget', 'value': '$57,000,000,000'}),
+        gfp_doc('bhutan', {'label': 'Defense Budget', 'value': 'n/a'}),
+    ])
+    assert leaderboard(db_manager, 'defense-budget') == ([('india', 1), ('japan', 2)], 2)
+
+
+@pytest.fixture
+def client(ranked):
+    from app import app
+
+    return app.test_client()
+
+
+def test_rankings_endpoints(client):
+    metrics = client.get('/api/military/rankings').json
+    assert {(row['metric'], row['countries']) for row in metrics['metrics']} == {('tanks', 3), ('aircraft-carriers', 2)}
+
+    page = client.get('/api/military/rankings/Tanks?limit=2').json
+    assert [row['country_id'] for row in page['rankings']] == ['russia', 'china']
+    assert page['pagination'] == {'limit': 2, 'offset': 0, 'has_more': True, 'next_offset': 2}
+
+    assert client.get('/api/military/rankings/tanks?country=India').json['ranking']['rank'] == 3
+    assert client.get('/api/military/rankings/tanks?country=atlantis').status_code == 404
+    assert client.get('/api/military/rankings/submarines').status_code == 404
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+import routes.scheduler as scheduler_routes
+from services.refresh_scheduler import RefreshScheduler, parse_offpeak_window
+
+
+@pytest.mark.parametrize('value', ['1-6-9', 'night', '1', 'a-b', '-'])
+def test_malformed_offpeak_window_falls_back_to_no_window(value, caplog):
+    assert parse_offpeak_window(value) is None
+    assert 'SCHEDULER_OFFPEAK_HOURS' in caplog.text
+
+
+def test_offpeak_window_parses_and_wraps_midnight(monkeypatch):
+    assert parse_offpeak_window('22-4') == (22, 4)
+    monkeypatch.setenv('SCHEDULER_OFFPEAK_HOURS', '22-4')
+    scheduler = RefreshScheduler()
+    assert scheduler.in_offpeak_window(datetime(2026, 1, 1, 23))
+    assert not scheduler.in_offpeak_window(datetime(2026, 1, 1, 12))
+
+
+def test_malformed_offpeak_window_does_not_break_the_scheduler(monkeypatch):
+    monkeypatch.setenv('SCHEDULER_OFFPEAK_HOURS', 'nightly')
+    scheduler = RefreshScheduler()
+    assert scheduler.offpeak_window is None
+    assert scheduler.in_offpeak_window(datetime(2026, 1, 1, 12))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from app import app
+
+    started = []
+    monkeypatch.setattr(scheduler_routes.refresh_scheduler, 'start', lambda: started.append(True) or True)
+    monkeypatch.setattr(scheduler_routes.refresh_scheduler, 'stop', lambda: None)
+    client = app.test_client()
+    client.started = started
+    return client
+
+
+@pytest.mark.parametrize('path', ['/api/scheduler/start', '/api/scheduler/stop'])
+def test_scheduler_control_is_disabled_without_a_token(client, monkeypatch, path):
+    monkeypatch.setattr(scheduler_routes, 'SCHEDULER_ADMIN_TOKEN', '')
+    response = client.post(path, headers={'Authorization': 'Bearer anything'})
+    assert response.status_code == 403
+    assert client.started == []
+
+
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 's3cret'}])
+def test_scheduler_control_rejects_a_bad_token(client, monkeypatch, headers):
+    monkeypatch.setattr(scheduler_routes, 'SCHEDULER_ADMIN_TOKEN', 's3cret')
+    response = client.post('/api/scheduler/start', headers=headers)
+    assert response.status_code == 401
+    assert client.started == []
+
+
+def test_scheduler_control_accepts_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(scheduler_routes, 'SCHEDULER_ADMIN_TOKEN', 's3cret')
+    response = client.post('/api/scheduler/start', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert response.json['success'] is True
+    assert client.started == [True]
+    assert client.post('/api/scheduler/stop', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
@@ -0,0 +1,146 @@
+import pytest
+
+from models import scrapper, sync
+from models.history import equipment_key
+from models.sync import changes_since, committed_token, next_change_token, finish_change_token
+
+from helpers import make_record
+
+
+def replicate(replica, db, country_id, since):
+    """Apply one delta-sync round to a {record_key: units} replica, as a client would"""
+    until = committed_token(db)
+    upserts, deletes = changes_since(db, country_id, 'airpower', since, until)
+    for doc in upserts:
+        replica[doc['record_key']] = doc['units']
+    for tombstone in deletes:
+        replica.pop(tombstone['record_key'], None)
+    return max(since, until)
+
+
+def stored(db, country_id):
+    return {doc['record_key']: doc['units'] for doc in db['airpower'].find({'country_id': country_id})}
+
+
+def test_committed_token_waits_for_lower_tokens(db_manager):
+    db = db_manager.db
+    first = next_change_token(db)
+    second = next_change_token(db)
+    finish_change_token(db, second)
+    assert committed_token(db) == first - 1
+
+    finish_change_token(db, first)
+    assert committed_token(db) == second
+
+
+def test_interleaved_saves_are_not_skipped_by_delta_sync(db_manager, monkeypatch):
+    db = db_manager.db
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', units=10)])
+    replica = {}
+    since = replicate(replica, db, country_id, 0)
+
+    allocate = sync.next_change_token
+    synced_mid_save = {}
+
+    def slow_save_allocates(database):
+        # Save A takes its token, then save B runs start to finish and a client syncs,
+        # all before A writes anything
+        token = allocate(database)
+        monkeypatch.setattr(scrapper, 'next_change_token', allocate)
+        db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', units=10),
+                                                               make_record('Tejas', units=30)])
+        synced_mid_save['since'] = replicate(replica, db, country_id, since)
+        return token
+
+    monkeypatch.setattr(scrapper, 'next_change_token', slow_save_allocates)
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Su-30MKI', units=12),
+                                                           make_record('Rafale', units=36)])
+
+    # B's token is higher than A's but must not be handed out while A is in flight
+    assert synced_mid_save['since'] < sync.committed_token(db)
+    replicate(replica, db, country_id, synced_mid_save['since'])
+    assert replica == stored(db, country_id)
+
+
+def test_failed_save_releases_its_token(db_manager, monkeypatch):
+    db = db_manager.db
+    country_id = db_manager.get_or_create_country('india')
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('write failed')
+
+    monkeypatch.setattr(scrapper, 'record_dataset_scrape', fail)
+    assert db_manager.save_military_data(country_id, 'airpower', [make_record('Tejas')]) is False
+    assert committed_token(db) == db['counters'].find_one({'_id': sync.CHANGE_TOKEN_COUNTER})['value']
+
+
+@pytest.fixture
+def client():
+    from app import app
+
+    return app.test_client()
+
+
+def apply_changes(replica, changes):
+    """Apply a delta-sync response in change_token order, keyed by record_key"""
+    events = [(doc['change_token'], 1, doc['record_key'], doc) for doc in changes['upserts']]
+    events += [(tombstone['change_token'], 0, tombstone['record_key'], None) for tombstone in changes['deletes']]
+    for _, _, key, doc in sorted(events, key=lambda event: event[:3]):
+        if doc is None:
+            replica.pop(key, None)
+        else:
+            replica[key] = (doc['name'], doc['units'], doc['description'])
+
+
+def full_state(client):
+    response = client.get('/api/military/india/airpower?limit=1000').json
+    return {doc['record_key']: (doc['name'], doc['units'], doc['description']) for doc in response['data']}
+
+
+def test_delta_sync_sends_upserts_and_tombstones(db_manager, client):
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [
+        make_record('Su-30MKI', units=260), make_record('Rafale', units=36), make_record('MiG-21', units=40)])
+    first = client.get('/api/military/india/airpower').json
+    replica = {doc['record_key']: (doc['name'], doc['units'], doc['description']) for doc in first['data']}
+
+    db_manager.save_military_data(country_id, 'airpower', [
+        make_record('Su-30MKI', units=260), make_record('Rafale', units=62, description='Omnirole fighter'),
+        make_record('Tejas', units=40)])
+    changes = client.get(f"/api/military/india/airpower?since={first['sync_token']}").json
+
+    assert sorted(doc['name'] for doc in changes['upserts']) == ['Rafale', 'Tejas']
+    assert [tombstone['record_key'] for tombstone in changes['deletes']] == [equipment_key(make_record('MiG-21'))]
+    assert changes['total_changes'] == 3 and changes['sync_token'] > first['sync_token']
+    apply_changes(replica, changes)
+    assert replica == full_state(client)
+
+    # Nothing changed since: an empty delta with the same token, and a resave allocates no token
+    db_manager.save_military_data(country_id, 'airpower', [
+        make_record('Su-30MKI', units=260), make_record('Rafale', units=62, description='Omnirole fighter'),
+        make_record('Tejas', units=40)])
+    unchanged = client.get(f"/api/military/india/airpower?since={changes['sync_token']}").json
+    assert (unchanged['total_changes'], unchanged['sync_token']) == (0, changes['sync_token'])
+
+
+def test_removed_then_restored_record_ends_up_present(db_manager, client):
+    country_id = db_manager.get_or_create_country('india')
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Rafale', units=36), make_record('Tejas', units=40)])
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Rafale', units=36)])
+    db_manager.save_military_data(country_id, 'airpower', [make_record('Rafale', units=36), make_record('Tejas', units=42)])
+
+    replica = {}
+    apply_changes(replica, client.get('/api/military/india/airpower?since=0').json)
+    assert replica == full_state(client)
+    assert replica[equipment_key(make_record('Tejas'))][1] == 42
+
+
+@pytest.mark.parametrize('url, status', [
+    ('/api/military/india/airpower?since=latest', 400),
+    ('/api/military/india/airpower?since=999999', 410),
+    ('/api/military/atlantis/airpower?since=1', 404),
+])
+def test_delta_sync_rejects_bad_requests(db_manager, client, url, status):
+    db_manager.save_military_data(db_manager.get_or_create_country('india'), 'airpower', [make_record('Rafale')])
+    assert client.get(url).status_code == status
@@ -0,0 +1,124 @@
+import multiprocessing
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.task_store import MongoTaskStatusStore, SQLiteTaskStatusStore, TaskStatusStore
+
+JOB = 'india:airpower'
+QUEUED = {'status': 'queued', 'progress': 0}
+
+
+@pytest.fixture
+def mongo_store():
+    return MongoTaskStatusStore()
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return SQLiteTaskStatusStore(path=str(tmp_path / 'tasks.sqlite3'))
+
+
+@pytest.fixture(params=['mongo', 'sqlite'])
+def make_store(request, tmp_path):
+    """Builds a store of either backend with the given TTL / size settings"""
+    def make(**kwargs):
+        if request.param == 'mongo':
+            return MongoTaskStatusStore(**kwargs)
+        return SQLiteTaskStatusStore(path=str(tmp_path / 'tasks.sqlite3'), **kwargs)
+    return make
+
+
+def seed_active(store, task_id, expires_at):
+    now = time.time()
+    store.collection.insert_one({'_id': task_id, 'job_key': JOB, 'active_job_key': JOB, 'status': 'running',
+                                 'created_at': now, 'updated_at': now, 'expires_at': expires_at})
+
+
+def test_base_store_is_abstract():
+    with pytest.raises(TypeError):
+        TaskStatusStore()
+
+
+@pytest.mark.parametrize('store_name', ['mongo_store', 'sqlite_store'])
+def test_claim_joins_in_flight_and_recent_jobs(store_name, request):
+    store = request.getfixturevalue(store_name)
+    assert store.claim(JOB, 'first', QUEUED, reuse_window=300) == ('first', True)
+    assert store.claim(JOB, 'second', QUEUED, reuse_window=300) == ('first', False)
+
+    store.update('first', {'status': 'completed', 'finished_at': time.time()})
+    assert store.claim(JOB, 'third', QUEUED, reuse_window=300) == ('first', False)
+    assert store.claim(JOB, 'fourth', QUEUED, reuse_window=0) == ('fourth', True)
+    assert store.claim(JOB, 'fifth', QUEUED, reuse_window=300, force=True) == ('fifth', True)
+
+
+@pytest.mark.parametrize('store_name', ['mongo_store', 'sqlite_store'])
+def test_failed_job_is_not_reused(store_name, request):
+    store = request.getfixturevalue(store_name)
+    store.claim(JOB, 'first', QUEUED, reuse_window=300)
+    store.update('first', {'status': 'error'})
+    assert store.claim(JOB, 'second', QUEUED, reuse_window=300) == ('second', True)
+
+
+def test_tasks_expire_unless_updated_within_the_ttl(make_store):
+    store = make_store(ttl_seconds=1)
+    store.claim('india:airpower', 'kept', QUEUED, reuse_window=300)
+    store.claim('russia:airpower', 'idle', QUEUED, reuse_window=300)
+    time.sleep(0.6)
+    store.update('kept', {'progress': 50})
+    time.sleep(0.6)
+
+    assert store.get('kept')['progress'] == 50
+    assert store.get('idle') is None
+    assert store.find_latest_by_job_key('russia:airpower') is None
+    tasks, total = store.list_tasks()
+    assert ([task['task_id'] for task in tasks], total) == (['kept'], 1)
+    # An expired in-flight task no longer holds its job
+    assert store.claim('russia:airpower', 'retry', QUEUED, reuse_window=300) == ('retry', True)
+
+
+def test_oldest_tasks_are_evicted_past_the_max_size(make_store):
+    store = make_store(max_tasks=3)
+    for n in range(5):
+        store.create(f'task-{n}', {'status': 'completed'})
+        time.sleep(0.01)
+
+    tasks, total = store.list_tasks()
+    assert ([task['task_id'] for task in tasks], total) == (['task-4', 'task-3', 'task-2'], 3)
+    assert store.get('task-0') is None
+    assert [task['task_id'] for task in store.list_tasks(offset=1, limit=1)[0]] == ['task-3']
+
+
+def test_mongo_claim_losing_the_insert_race_joins_the_winner(mongo_store, monkeypatch):
+    seed_active(mongo_store, 'winner', datetime.utcnow() + timedelta(hours=1))
+    # The winner was inserted after this process looked for a reusable task
+    monkeypatch.setattr(mongo_store, 'find_latest_by_job_key', lambda job_key: None)
+    assert mongo_store.claim(JOB, 'loser', QUEUED, reuse_window=300) == ('winner', False)
+    assert mongo_store.get('loser') is None
+
+
+def test_mongo_claim_retries_when_the_winner_is_gone(mongo_store):
+    # Expired, so the TTL monitor is about to remove it, but it still holds the unique key
+    seed_active(mongo_store, 'evicted', datetime.utcnow() - timedelta(seconds=1))
+    assert mongo_store.claim(JOB, 'next', QUEUED, reuse_window=300) == ('next', True)
+    assert mongo_store.get('next')['status'] == 'queued'
+
+
+def _claim_in_process(path, task_id, results):
+    store = SQLiteTaskStatusStore(path=path)
+    results.put(store.claim(JOB, task_id, QUEUED, reuse_window=300))
+
+
+def test_sqlite_claim_is_atomic_across_processes(tmp_path):
+    path = str(tmp_path / 'tasks.sqlite3')
+    SQLiteTaskStatusStore(path=path)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_claim_in_process, args=(path, f'task-{i}', results)) for i in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    claims = [results.get() for _ in workers]
+    assert sum(created for _, created in claims) == 1
+    assert len({task_id for task_id, _ in claims}) == 1